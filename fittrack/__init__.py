@@ -0,0 +1 @@
+# FitTrack package
@@ -0,0 +1,3 @@
+from fittrack.cli import main
+
+main()
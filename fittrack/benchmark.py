@@ -0,0 +1,301 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+from fittrack.synthetic import DEFAULT_SEED, generate
+
+# GUI benchmark suite on synthetic databases
+#
+#   python -m fittrack.benchmark --sizes 1k,100k,1m --out results.json
+#   python -m fittrack.benchmark --sizes 1k,100k --save-baseline baseline.json
+#   python -m fittrack.benchmark --sizes 1k,100k --baseline baseline.json
+#   python -m fittrack.benchmark --coach --sizes 1k,10k,100k,1m
+#
+# For every size a seeded database is generated (and kept in --cache-dir),
+# then a fresh process builds the FitTrack window on the offscreen Qt
+# platform against it and times load_table, search_entries, update_stats,
+# update_mini_chart and generate_chart for every chart type and time range.
+# Each operation runs --runs times; the best and median wall times are
+# kept along with the process's peak RSS after the operation. Charts are
+# timed from the call to the finished image, with the chart cache cleared
+# so every run renders.
+#
+# --coach times the coaching model (fittrack.coach) instead, without Qt:
+# building the training rows, a full fit, an incremental fit on the newest
+# 1% of rows, saving and loading the model, a train() call with nothing new
+# to learn, and one recommendation. scikit-learn is imported before the
+# timings start.
+#
+# With --baseline, any operation slower than the baseline by more than
+# --tolerance (and by at least --min-delta seconds, so sub-millisecond
+# noise doesn't count) or with a peak RSS above it by more than
+# --rss-tolerance is reported and the exit status is 1.
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = "1k,10k,100k"
+SEARCH_TEXT = "morning run"
+SIZE_SUFFIXES = {"k": 1000, "m": 1000000}
+
+
+# "100k" -> 100000
+def parse_size(text):
+    text = text.strip().lower()
+    multiplier = SIZE_SUFFIXES.get(text[-1:], 1)
+    if multiplier != 1:
+        text = text[:-1]
+    return int(float(text) * multiplier)
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# Benchmark process: time the window's operations on one database
+def run_child(db_path, runs):
+    sys.path.insert(0, REPO_DIR)
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication([sys.argv[0]])
+
+    import main
+    from fittrack.chart_options import TIME_RANGES, chart_types
+
+    # Message boxes would block the offscreen event loop: record them instead
+    messages = []
+    def record(parent, title, text, *args):
+        messages.append(f"{title}: {text}")
+        return main.QMessageBox.Yes
+    for name in ("information", "warning", "critical", "question"):
+        setattr(main.QMessageBox, name, staticmethod(record))
+
+    window = main.FitTrack(eager_tabs=True, db_path=db_path)
+    window.resize(1000, 800)
+    window.show()
+    app.processEvents()
+    # Let the first deferred refreshes run before timing anything, and the
+    # coach model they start training (see FitTrack.update_coach)
+    window.refresh.flush()
+    app.processEvents()
+    while window.coach_job is not None:
+        app.processEvents()
+        time.sleep(0.001)
+
+    results = {}
+
+    def measure(name, operation, prepare=None):
+        times = []
+        for _ in range(runs):
+            if prepare:
+                prepare()
+            del messages[:]
+            start = time.perf_counter()
+            operation()
+            times.append(time.perf_counter() - start)
+            if messages:
+                raise RuntimeError(f"{name}: {messages[0]}")
+        results[name] = {"best": min(times), "median": statistics.median(times),
+                         "peak_rss_mb": _peak_rss_mb()}
+
+    def search():
+        window.search_box.setText(SEARCH_TEXT)
+        window.search_entries()
+
+    def chart():
+        window.generate_chart()
+        while window.chart_job is not None:
+            app.processEvents()
+            time.sleep(0.001)
+        app.processEvents()
+
+    measure("load_table", window.load_table)
+    measure("search_entries", search)
+    measure("update_stats", window.update_stats)
+    measure("update_mini_chart", window.update_mini_chart)
+    for chart_type in chart_types():
+        for time_range in TIME_RANGES:
+            window.chart_type.setCurrentText(chart_type)
+            window.time_range.setCurrentText(time_range)
+            measure(f"generate_chart[{chart_type} | {time_range}]", chart,
+                    prepare=window.chart_cache.clear)
+
+    window.close()
+    return results
+
+
+# Coach process: training and prediction times for one history size
+def run_coach_child(db_path, runs):
+    import copy
+    import shutil
+    import tempfile
+
+    sys.path.insert(0, REPO_DIR)
+    from fittrack import coach
+    from fittrack.connections import connect
+    from fittrack.migrations import migrate
+
+    coach.new_model()
+    results = {}
+
+    def measure(name, operation, prepare=None):
+        times = []
+        for _ in range(runs):
+            if prepare:
+                prepare()
+            start = time.perf_counter()
+            operation()
+            times.append(time.perf_counter() - start)
+        results[name] = {"best": min(times), "median": statistics.median(times),
+                         "peak_rss_mb": _peak_rss_mb()}
+
+    # The model file is written next to the database: work on a copy
+    with tempfile.TemporaryDirectory() as directory:
+        path = shutil.copy(db_path, directory)
+        conn = connect(path, autocommit=True)
+        migrate(conn)
+        ids, features, targets = coach.training_data(conn)
+        recent = max(1, len(ids) // 100)
+        base = coach.new_model()
+        coach.fit(base, features[:-recent], targets[:-recent])
+        state = {}
+
+        def fresh():
+            state["model"] = coach.new_model()
+
+        def seeded():
+            state["model"] = copy.deepcopy(base)
+
+        measure("coach.training_data", lambda: coach.training_data(conn))
+        measure("coach.fit[full]", lambda: coach.fit(state["model"], features, targets),
+                prepare=fresh)
+        measure("coach.fit[incremental 1%]",
+                lambda: coach.fit(state["model"], features[-recent:], targets[-recent:]),
+                prepare=seeded)
+        coach.train(path, force=True)
+        model = coach.load_model(path)
+        measure("coach.save_model", lambda: coach.save_model(path, model))
+        measure("coach.load_model[cold]", lambda: coach.load_model(path),
+                prepare=coach._models.clear)
+        measure("coach.train[no new rows]", lambda: coach.train(path))
+        measure("coach.recommend", lambda: coach.recommend(conn, model))
+        conn.close()
+    return results
+
+
+def _cached_database(cache_dir, rows, seed):
+    path = os.path.join(cache_dir, f"synthetic-{rows}-seed{seed}.db")
+    if not os.path.exists(path):
+        print(f"generating {rows} rows -> {path}", file=sys.stderr)
+        generate(path, rows, seed)
+    return path
+
+
+# Run the suite in a fresh offscreen process per size
+def run(sizes, seed=DEFAULT_SEED, runs=3, cache_dir=".benchmark-cache", timeout=3600,
+        coach=False):
+    os.makedirs(cache_dir, exist_ok=True)
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    report = {"meta": {"seed": seed, "runs": runs, "python": platform.python_version(),
+                       "platform": platform.platform(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+              "results": {}}
+    suite = ["--coach"] if coach else []
+    for rows in sizes:
+        db_path = _cached_database(cache_dir, rows, seed)
+        print(f"benchmarking {rows} rows", file=sys.stderr)
+        output = subprocess.run([sys.executable, "-m", "fittrack.benchmark", "--child", db_path,
+                                 "--runs", str(runs)] + suite,
+                                cwd=REPO_DIR, env=env, capture_output=True, text=True,
+                                timeout=timeout)
+        if output.returncode != 0:
+            raise RuntimeError(f"benchmark of {rows} rows failed:\n{output.stderr}")
+        report["results"][str(rows)] = json.loads(output.stdout.splitlines()[-1])
+    return report
+
+
+# Regressions of `report` against `baseline`, as readable lines
+def compare(report, baseline, tolerance=0.25, min_delta=0.005, rss_tolerance=0.25):
+    regressions = []
+    for size, results in report["results"].items():
+        base_results = baseline["results"].get(size, {})
+        for name, result in results.items():
+            base = base_results.get(name)
+            if base is None:
+                continue
+            slower = result["best"] - base["best"]
+            if slower > min_delta and result["best"] > base["best"] * (1 + tolerance):
+                regressions.append(f"{size} rows, {name}: {result['best'] * 1000:.1f} ms "
+                                   f"(baseline {base['best'] * 1000:.1f} ms, "
+                                   f"+{slower / base['best'] * 100:.0f}%)")
+            if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + rss_tolerance):
+                regressions.append(f"{size} rows, {name}: peak RSS {result['peak_rss_mb']:.0f} MB "
+                                   f"(baseline {base['peak_rss_mb']:.0f} MB)")
+    return regressions
+
+
+def print_report(report):
+    for size, results in report["results"].items():
+        print(f"{int(size):,} rows:")
+        for name, result in results.items():
+            print(f"  {name:<60} best {result['best'] * 1000:9.1f} ms  "
+                  f"median {result['median'] * 1000:9.1f} ms  "
+                  f"peak RSS {result['peak_rss_mb']:6.0f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark FitTrack on synthetic databases")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"comma-separated row counts, e.g. 1k,1m (default: {DEFAULT_SIZES})")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--runs", type=int, default=3, help="runs per operation (default: 3)")
+    parser.add_argument("--cache-dir", default=".benchmark-cache",
+                        help="where generated databases are kept (default: .benchmark-cache)")
+    parser.add_argument("--out", help="write the results as JSON")
+    parser.add_argument("--baseline", help="fail if slower than these saved results")
+    parser.add_argument("--save-baseline", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown as a fraction (default: 0.25)")
+    parser.add_argument("--min-delta", type=float, default=0.005,
+                        help="slowdowns under this many seconds are ignored (default: 0.005)")
+    parser.add_argument("--rss-tolerance", type=float, default=0.25,
+                        help="allowed peak RSS growth as a fraction (default: 0.25)")
+    parser.add_argument("--coach", action="store_true",
+                        help="time coaching model training and prediction instead of the GUI")
+    parser.add_argument("--child", metavar="DB", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child = run_coach_child if args.coach else run_child
+        print(json.dumps(child(args.child, args.runs)))
+        return 0
+
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    report = run(sizes, args.seed, args.runs, args.cache_dir, coach=args.coach)
+    print_report(report)
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance, args.min_delta,
+                              args.rss_tolerance)
+        if regressions:
+            print(f"\nPERFORMANCE REGRESSION: {len(regressions)} operation(s) worse than "
+                  f"{args.baseline}", file=sys.stderr)
+            for line in regressions:
+                print("  " + line, file=sys.stderr)
+            return 1
+        print(f"\nNo regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
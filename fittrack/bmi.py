@@ -0,0 +1,19 @@
+# BMI formula and categories shared by the form and the importer
+
+
+# BMI from weight in kg and height in cm, 0 when the height is not usable
+def compute_bmi(weight, height_cm):
+    height = height_cm / 100  # convert to meters
+    if height <= 0:
+        return 0
+    return weight / (height * height)
+
+
+def bmi_category(bmi):
+    if bmi < 18.5:
+        return "Underweight"
+    elif bmi < 25:
+        return "Normal"
+    elif bmi < 30:
+        return "Overweight"
+    return "Obese"
@@ -0,0 +1,72 @@
+from collections import OrderedDict, namedtuple
+
+# LRU cache of rendered charts
+#
+# Entries are keyed by everything that affects the picture: the database
+# (profile), chart type, the time range and its cutoff date, the theme, the
+# pixel size and the data version (bumped by a trigger on every insert,
+# update and delete). Values
+# are (rgba bytes, width, height) as returned by charts.render_chart, and
+# the cache evicts least recently used entries to stay under max_bytes.
+
+ChartKey = namedtuple("ChartKey",
+                      "database chart_type time_range cutoff theme width height data_version")
+
+
+class ChartCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entries=64):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        image = self._entries.get(key)
+        if image is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return image
+
+    def put(self, key, image):
+        size = len(image[0])
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= len(self._entries.pop(key)[0])
+        self._entries[key] = image
+        self._bytes += size
+        while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted[0])
+            self.evictions += 1
+
+    # Drop every entry of `database` rendered from an older data version
+    # (every database's when it is None)
+    def discard_stale(self, data_version, database=None):
+        for key in [k for k in self._entries if k.data_version != data_version
+                    and (database is None or k.database == database)]:
+            self._bytes -= len(self._entries.pop(key)[0])
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._entries)
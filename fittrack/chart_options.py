@@ -0,0 +1,108 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+from importlib import import_module
+
+# Chart registry and time ranges offered by the GUI
+#
+# Every chart type is registered as a ChartSpec:
+#   columns         workout columns it plots ("date" is always included)
+#   level           rollup level ("daily", "weekly", "monthly") the chart is
+#                   always drawn from, for aggregate-only charts
+#   all_data_level  rollup level used instead of every row for "All Data"
+#   render          draw(figure, data) onto an empty figure, or a
+#                   "module:function" string imported on first use
+#   loader          load(conn, since) returning the chart's arrays, for charts
+#                   drawn from derived data rather than workout columns
+#                   (same "module:function" form; None for the default)
+#   options         keyword options the render function accepts (e.g.
+#                   hexbin_threshold), passed through charts.draw_chart
+# charts.load_chart_data fetches only those columns (or the rollup, or calls
+# the loader) and charts.draw_chart calls the render function. New charts
+# only need a register_chart() call; the combo box and the CLI list
+# chart_types().
+#
+# Kept free of NumPy and matplotlib so the window can fill its combo boxes
+# without loading either.
+
+ChartSpec = namedtuple("ChartSpec", "name columns level all_data_level render loader options")
+
+# Workout column -> rollup field holding its per-period value
+ROLLUP_COLUMNS = {"calories": "calories", "distance": "distance", "heart_rate": "hr_mean"}
+
+_charts = {}
+
+
+def register_chart(name, columns, render, level=None, all_data_level=None, loader=None,
+                   options=()):
+    columns = tuple(c for c in columns if c != "date")
+    missing = [c for c in columns if c not in ROLLUP_COLUMNS]
+    if (level or all_data_level) and missing:
+        raise ValueError(f"{name}: rollups have no {', '.join(missing)} column")
+    spec = ChartSpec(name, columns, level, all_data_level, render, loader, tuple(options))
+    _charts[name] = spec
+    return spec
+
+
+# Registered chart names, in registration order
+def chart_types():
+    return list(_charts)
+
+
+def get_chart(name):
+    spec = _charts.get(name)
+    if spec is None:
+        raise ValueError(f"Unknown chart type: {name}")
+    return spec
+
+
+def _resolve(function):
+    if callable(function):
+        return function
+    module, _, name = function.partition(":")
+    return getattr(import_module(module), name)
+
+
+def render_function(spec):
+    return _resolve(spec.render)
+
+
+def loader_function(spec):
+    return _resolve(spec.loader) if spec.loader is not None else None
+
+
+register_chart("Calories Over Time", ["calories"], "fittrack.charts:draw_calories",
+               all_data_level="daily")
+register_chart("Distance Over Time", ["distance"], "fittrack.charts:draw_distance",
+               all_data_level="daily")
+register_chart("Heart Rate Trends", ["heart_rate"], "fittrack.charts:draw_heart_rate",
+               all_data_level="daily")
+register_chart("BMI Tracking", ["bmi"], "fittrack.charts:draw_bmi")
+register_chart("Workout Distribution", ["distance"], "fittrack.charts:draw_distribution")
+register_chart("Health Metrics Correlation",
+               ["distance", "heart_rate", "calories", "body_temp", "bmi"],
+               "fittrack.charts:draw_correlation", options=["hexbin_threshold"])
+register_chart("Weekly Summary", ["calories", "distance"], "fittrack.charts:draw_weekly_summary",
+               level="weekly")
+register_chart("Monthly Summary", ["calories", "distance"], "fittrack.charts:draw_monthly_summary",
+               level="monthly")
+register_chart("Training Load", ["calories", "distance"], "fittrack.charts:draw_training_load",
+               loader="fittrack.training_load:load_chart_data")
+
+# Time range -> how many days back it reaches (None: all data)
+TIME_RANGE_DAYS = {
+    "Last 7 Days": 7,
+    "Last 30 Days": 30,
+    "Last 90 Days": 90,
+    "All Data": None,
+}
+
+TIME_RANGES = list(TIME_RANGE_DAYS)
+
+
+# "yyyy-MM-dd" lower bound for a time range, or None for all data
+def cutoff_date(time_range, today=None):
+    days = TIME_RANGE_DAYS.get(time_range)
+    if days is None:
+        return None
+    today = today or datetime.now()
+    return (today - timedelta(days=days)).strftime("%Y-%m-%d")
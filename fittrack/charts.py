@@ -0,0 +1,356 @@
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
+
+from fittrack.chart_options import (ROLLUP_COLUMNS, cutoff_date, get_chart, loader_function,
+                                    render_function)
+from fittrack.columns import fetch_columns
+from fittrack.correlation import METRIC_COLUMNS, correlation_matrix
+from fittrack.decimate import decimate
+from fittrack.instrument import span
+from fittrack.rollups import fetch_rollup, iso_week_labels, month_labels
+
+# Chart data loading and drawing
+#
+# Everything here works on a plain matplotlib Figure (no pyplot, no Qt), so
+# charts can be prepared and rendered on a worker thread and handed to the
+# GUI as an image. Chart types are looked up in the registry
+# (fittrack.chart_options); the draw_* functions below are the built-in
+# render functions.
+
+# Line charts are decimated to this many points per pixel of axes width
+# (see fittrack.decimate; "minmax" keeps every peak)
+DECIMATION_METHOD = "minmax"
+POINTS_PER_PIXEL = 2
+
+# Training Load draws the daily load as bars up to this many days (one
+# rectangle each); the acute line shows it for longer ranges
+DAILY_BARS_MAX = 366
+
+# Health Metrics Correlation draws a hexbin density plot instead of a
+# scatter plot above this many workouts (default of its hexbin_threshold)
+HEXBIN_THRESHOLD = 20000
+
+
+# Fetch the arrays a chart needs: only its columns, or its rollup level
+def load_chart_data(conn, chart_type, time_range):
+    spec = get_chart(chart_type)
+    since = cutoff_date(time_range)
+    
+    loader = loader_function(spec)
+    if loader is not None:
+        # Derived series (e.g. training load) come from their own module
+        return loader(conn, since)
+    
+    level = spec.level or (spec.all_data_level if since is None else None)
+    if level:
+        # Aggregate charts and whole-history trends read a rollup table
+        fields = [ROLLUP_COLUMNS[c] for c in spec.columns]
+        rollup = fetch_rollup(conn, level, since, fields)
+        data = {"date": rollup["period"]}
+        for column, field in zip(spec.columns, fields):
+            data[column] = rollup[field]
+        return data
+    
+    # Fetch the time range as typed column arrays
+    return fetch_columns(conn, ("date",) + spec.columns, since)
+
+
+# Plot a time series with no more points than the axes can show
+# Markers are only drawn when every point is plotted. The plotted / total
+# point count is shown in the corner when the series was decimated, and
+# the line is decimated again for the visible range whenever the x limits
+# change (zooming or panning with a navigation toolbar).
+# Returns (line, indices of the plotted points).
+def plot_series(ax, dates, values, color, method=DECIMATION_METHOD):
+    from matplotlib.dates import date2num
+    
+    x = date2num(dates)
+    max_points = max(3, int(ax.bbox.width * POINTS_PER_PIXEL))
+    with span("chart.decimate"):
+        keep = decimate(x, values, max_points, method)
+    decimated = len(keep) < len(x)
+    line, = ax.plot(dates[keep], values[keep], '-' if decimated else 'o-', color=color,
+                    linewidth=2, markersize=8)
+    if not decimated:
+        return line, keep
+    
+    label = ax.text(0.99, 0.01, f"{len(keep):,} of {len(x):,} points", transform=ax.transAxes,
+                    ha='right', va='bottom', fontsize=8, alpha=0.7)
+    
+    def redecimate(axes):
+        low, high = axes.get_xlim()
+        start = max(0, int(np.searchsorted(x, low)) - 1)
+        end = min(len(x), int(np.searchsorted(x, high, side='right')) + 1)
+        visible = start + decimate(x[start:end], values[start:end], max_points, method)
+        line.set_data(dates[visible], values[visible])
+        label.set_text(f"{len(visible):,} of {end - start:,} points")
+    
+    ax.callbacks.connect('xlim_changed', redecimate)
+    return line, keep
+
+
+# Draw a chart onto an empty figure
+# Options the chart registered (e.g. hexbin_threshold) are passed to its
+# render function; others, and options left as None, are ignored.
+def draw_chart(figure, chart_type, data, **options):
+    if not len(data["date"]):
+        # No data
+        ax = figure.add_subplot(111)
+        ax.text(0.5, 0.5, "No data available for the selected time range", ha='center', va='center')
+        ax.set_axis_off()
+        return
+    
+    spec = get_chart(chart_type)
+    options = {name: value for name, value in options.items()
+               if name in spec.options and value is not None}
+    render_function(spec)(figure, data, **options)
+    
+    with span("chart.tight_layout"):
+        figure.tight_layout()
+
+
+# Built-in charts
+def draw_calories(figure, data):
+    dates = data["date"]
+    calories_data = data["calories"]
+    ax = figure.add_subplot(111)
+    plot_series(ax, dates, calories_data, '#4CAF50')
+    ax.set_title("Calories Burned Over Time")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Calories Burned")
+    ax.grid(True, linestyle='--', alpha=0.7)
+    
+    # Mark average line
+    avg_calories = calories_data.mean()
+    ax.axhline(y=avg_calories, color='r', linestyle='--', alpha=0.7)
+    ax.text(dates[0], avg_calories, f"  Avg: {avg_calories:.1f}", color='r')
+    ax.tick_params(axis='x', labelrotation=45)
+
+
+def draw_distance(figure, data):
+    dates = data["date"]
+    distances = data["distance"]
+    ax = figure.add_subplot(111)
+    _, keep = plot_series(ax, dates, distances, '#2196F3')
+    ax.set_title("Distance Over Time")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Distance (km)")
+    ax.grid(True, linestyle='--', alpha=0.7)
+    
+    # Trend line (fitted on every point, drawn at the plotted ones)
+    x = np.arange(len(dates))
+    z = np.polyfit(x, distances, 1)
+    p = np.poly1d(z)
+    ax.plot(dates[keep], p(x[keep]), "r--", alpha=0.7)
+    ax.tick_params(axis='x', labelrotation=45)
+
+
+def draw_heart_rate(figure, data):
+    ax = figure.add_subplot(111)
+    plot_series(ax, data["date"], data["heart_rate"], '#F44336')
+    ax.set_title("Heart Rate Trends")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Heart Rate (bpm)")
+    ax.grid(True, linestyle='--', alpha=0.7)
+    
+    # Reference zones
+    ax.axhspan(40, 60, alpha=0.2, color='blue', label='Resting')
+    ax.axhspan(60, 100, alpha=0.2, color='green', label='Normal')
+    ax.axhspan(100, 140, alpha=0.2, color='orange', label='Moderate')
+    ax.axhspan(140, 180, alpha=0.2, color='red', label='Intense')
+    ax.legend()
+    ax.tick_params(axis='x', labelrotation=45)
+
+
+def draw_bmi(figure, data):
+    ax = figure.add_subplot(111)
+    plot_series(ax, data["date"], data["bmi"], '#9C27B0')
+    ax.set_title("BMI Over Time")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("BMI")
+    ax.grid(True, linestyle='--', alpha=0.7)
+    
+    # Reference zones
+    ax.axhspan(0, 18.5, alpha=0.2, color='blue', label='Underweight')
+    ax.axhspan(18.5, 25, alpha=0.2, color='green', label='Normal')
+    ax.axhspan(25, 30, alpha=0.2, color='orange', label='Overweight')
+    ax.axhspan(30, 40, alpha=0.2, color='red', label='Obese')
+    ax.legend()
+    ax.tick_params(axis='x', labelrotation=45)
+
+
+def draw_distribution(figure, data):
+    ax = figure.add_subplot(111)
+    
+    # Group distances into categories
+    labels = ["0-2 km", "2-5 km", "5-10 km", "10+ km"]
+    sizes = np.bincount(np.digitize(data["distance"], [2, 5, 10]), minlength=4).tolist()
+    
+    # Only plot non-zero values
+    non_zero_labels = [labels[i] for i in range(len(sizes)) if sizes[i] > 0]
+    non_zero_sizes = [size for size in sizes if size > 0]
+    
+    if non_zero_sizes:
+        ax.pie(non_zero_sizes, labels=non_zero_labels, autopct='%1.1f%%',
+              shadow=True, startangle=90)
+        ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle
+        ax.set_title("Workout Distance Distribution")
+    else:
+        ax.text(0.5, 0.5, "No distance data available", ha='center', va='center')
+        ax.set_axis_off()
+
+
+def draw_correlation(figure, data, hexbin_threshold=None):
+    hexbin_threshold = HEXBIN_THRESHOLD if hexbin_threshold is None else hexbin_threshold
+    dates = data["date"]
+    distances = data["distance"]
+    heart_rates = data["heart_rate"]
+    grid = figure.add_gridspec(1, 2, width_ratios=[3, 2])
+    ax = figure.add_subplot(grid[0])
+    
+    if len(distances) > hexbin_threshold:
+        # Too many points to scatter: workout density per hexagon
+        density = ax.hexbin(distances, heart_rates, gridsize=60, bins='log', mincnt=1,
+                            cmap='viridis')
+        # Drawn inside the axes; measuring it for tight_layout is slow
+        density.set_in_layout(False)
+        cbar = figure.colorbar(density, ax=ax)
+        cbar.set_label('Workouts')
+    else:
+        # Scatter plot with size based on calories
+        scatter = ax.scatter(distances, heart_rates, 
+                           s=data["calories"] / 10,           # Size based on calories
+                           c=data["body_temp"], cmap='viridis',  # Color based on body temp
+                           alpha=0.7)
+        scatter.set_in_layout(False)
+        cbar = figure.colorbar(scatter, ax=ax)
+        cbar.set_label('Body Temperature (°C)')
+    
+    ax.set_title("Health Metrics Correlation")
+    ax.set_xlabel("Distance (km)")
+    ax.set_ylabel("Heart Rate (bpm)")
+    ax.grid(True, linestyle='--', alpha=0.3)
+    
+    # Annotate the highest heart rate and the longest distance (labels on
+    # the right half point left so they stay inside the axes)
+    for i in np.unique([heart_rates.argmax(), distances.argmax()]):
+        right = distances[i] > distances.max() / 2
+        ax.annotate(f"{dates[i]}", (distances[i], heart_rates[i]), 
+                   xytext=(-5 if right else 5, 5), textcoords='offset points',
+                   ha='right' if right else 'left')
+    
+    _draw_correlation_matrix(figure.add_subplot(grid[1]), data)
+
+
+# Pearson below the diagonal, Spearman above it
+def _draw_correlation_matrix(ax, data):
+    pearson = correlation_matrix(data, METRIC_COLUMNS, "pearson")
+    spearman = correlation_matrix(data, METRIC_COLUMNS, "spearman")
+    lower = np.tril_indices(len(METRIC_COLUMNS), -1)
+    matrix = spearman.copy()
+    matrix[lower] = pearson[lower]
+    
+    ax.imshow(matrix, cmap='coolwarm', vmin=-1, vmax=1)
+    labels = ["Calories", "Distance", "Heart rate", "Body temp", "BMI"]
+    ticks = np.arange(len(labels))
+    ax.set_xticks(ticks)
+    ax.set_xticklabels(labels, rotation=45, ha='right')
+    ax.set_yticks(ticks)
+    ax.set_yticklabels(labels)
+    for (row, column), value in np.ndenumerate(matrix):
+        # round() + 0.0 turns -0.00 into 0.00
+        text = "" if row == column else ("n/a" if np.isnan(value) else f"{round(value, 2) + 0.0:.2f}")
+        ax.text(column, row, text, ha='center', va='center', fontsize=8)
+    ax.set_title("Pearson (lower) / Spearman (upper)", fontsize=10)
+
+
+def draw_weekly_summary(figure, data):
+    # One bar per ISO week (year + week)
+    _draw_period_summary(figure, data, "Weekly", iso_week_labels(data["date"]))
+
+
+def draw_monthly_summary(figure, data):
+    _draw_period_summary(figure, data, "Monthly", month_labels(data["date"]))
+
+
+def _draw_period_summary(figure, data, period_name, labels):
+    positions = np.arange(len(labels))
+    step = max(1, len(labels) // 8)
+    
+    # Create two subplots
+    ax1 = figure.add_subplot(211)
+    ax2 = figure.add_subplot(212)
+    
+    # Plot calories per period
+    ax1.bar(positions, data["calories"], color='#FF9800')
+    ax1.set_title(f"{period_name} Calories Burned")
+    ax1.set_ylabel("Calories")
+    ax1.set_xticks(positions[::step])
+    ax1.set_xticklabels(labels[::step])
+    
+    # Plot distance per period
+    ax2.bar(positions, data["distance"], color='#2196F3')
+    ax2.set_title(f"{period_name} Distance")
+    ax2.set_ylabel("Distance (km)")
+    ax2.set_xticks(positions[::step])
+    ax2.set_xticklabels(labels[::step])
+
+
+def draw_training_load(figure, data):
+    from fittrack.training_load import ACUTE_DAYS, CHRONIC_DAYS
+    
+    dates = data["date"]
+    ax1 = figure.add_subplot(211)
+    ax2 = figure.add_subplot(212, sharex=ax1)
+    
+    # Daily calories with the acute and chronic averages
+    if len(dates) <= DAILY_BARS_MAX:
+        ax1.bar(dates, data["calories"], width=1, color='#FF9800', alpha=0.4, label='Daily')
+    acute, _ = plot_series(ax1, dates, data["acute_calories"], '#F44336')
+    chronic, _ = plot_series(ax1, dates, data["chronic_calories"], '#2196F3')
+    acute.set_label(f"Acute ({ACUTE_DAYS}-day)")
+    chronic.set_label(f"Chronic ({CHRONIC_DAYS}-day)")
+    ax1.set_title("Training Load (calories)")
+    ax1.set_ylabel("Calories")
+    ax1.grid(True, linestyle='--', alpha=0.7)
+    ax1.legend(loc='upper left')
+    
+    # Acute:chronic ratio over the reference zones
+    ratio, _ = plot_series(ax2, dates, data["acwr_calories"], '#4CAF50')
+    ratio.set_label("Calories")
+    distance = data["acwr_distance"]
+    if not np.isnan(distance).all():
+        ratio, _ = plot_series(ax2, dates, distance, '#9C27B0')
+        ratio.set_label("Distance")
+    ax2.axhspan(0, 0.8, alpha=0.15, color='blue')
+    ax2.axhspan(0.8, 1.3, alpha=0.15, color='green')
+    ax2.axhspan(1.3, 1.5, alpha=0.15, color='orange')
+    ax2.axhspan(1.5, 2.5, alpha=0.15, color='red')
+    ax2.set_ylim(0, 2.5)
+    ax2.set_title("Acute:Chronic Workload Ratio")
+    ax2.set_ylabel("ACWR")
+    ax2.grid(True, linestyle='--', alpha=0.7)
+    ax2.legend(loc='upper left')
+    ax2.tick_params(axis='x', labelrotation=45)
+
+
+# Render a chart to an RGBA buffer of the given pixel size
+# Returns (bytes, width, height).
+def render_chart(data, chart_type, width, height, dpi=100, **options):
+    figure = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    canvas = FigureCanvasAgg(figure)
+    with span("chart.draw"):
+        draw_chart(figure, chart_type, data, **options)
+    with span("chart.canvas_draw"):
+        canvas.draw()
+    buffer = canvas.buffer_rgba()
+    return bytes(buffer), buffer.shape[1], buffer.shape[0]
+
+
+# Render a chart straight to an image file (format from the extension)
+def save_chart(data, chart_type, path, width=1000, height=600, dpi=100, **options):
+    figure = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    FigureCanvasAgg(figure)
+    draw_chart(figure, chart_type, data, **options)
+    figure.savefig(path, dpi=dpi)
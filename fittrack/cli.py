@@ -0,0 +1,230 @@
+import json
+import sys
+
+import click
+
+from fittrack.bmi import bmi_category
+from fittrack.chart_options import TIME_RANGES, chart_types
+from fittrack.profiles import DEFAULT_ROOT, ProfileStore
+from fittrack.repository import WorkoutRepository
+from fittrack.stats import PERIOD_LEVELS, period_stats
+
+# Command line interface (no Qt, no display needed)
+#
+#   python -m fittrack --db fitness.db stats [--by weekly] [--json]
+#   python -m fittrack --db fitness.db import workouts.csv
+#   python -m fittrack --db fitness.db export out.parquet --range "Last 30 Days"
+#   python -m fittrack --db fitness.db search "morning run"
+#   python -m fittrack --db fitness.db render-chart --type "Weekly Summary" --out chart.png
+#   python -m fittrack --profile alice stats
+#   python -m fittrack profile create alice
+#   python -m fittrack cohort --by weekly --jobs 8
+#
+# Every command works on one database file, so batch jobs can run one
+# process per database in parallel. --profile NAME picks the shard of a
+# profile (see fittrack/profiles.py) instead of --db; `cohort` reads every
+# profile's shard at once.
+
+
+@click.group()
+@click.option("--db", "db_path", default="fitness.db", show_default=True,
+              type=click.Path(dir_okay=False), help="FitTrack database file")
+@click.option("--profiles-dir", default=DEFAULT_ROOT, show_default=True,
+              type=click.Path(file_okay=False), help="directory of profile databases")
+@click.option("--profile", help="use this profile's database instead of --db")
+@click.option("--trace", type=click.Path(dir_okay=False),
+              help="write timing spans to this file (JSON lines)")
+@click.pass_context
+def cli(ctx, db_path, profiles_dir, profile, trace):
+    if profile:
+        store = ProfileStore(profiles_dir)
+        try:
+            exists = store.exists(profile)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--profile")
+        if not exists:
+            raise click.BadParameter(f"no profile {profile!r} in {profiles_dir} "
+                                     f"(create it with `profile create`)", param_hint="--profile")
+        db_path = store.path(profile)
+    ctx.obj = db_path
+    if trace:
+        from fittrack import instrument
+        instrument.enable(trace)
+
+
+@cli.command()
+@click.option("--by", "level", type=click.Choice(PERIOD_LEVELS),
+              help="also list per-period totals")
+@click.option("--range", "time_range", type=click.Choice(TIME_RANGES), default="All Data",
+              show_default=True, help="time range for --by")
+@click.option("--json", "as_json", is_flag=True, help="print JSON")
+@click.pass_obj
+def stats(db_path, level, time_range, as_json):
+    """Show workout totals."""
+    with WorkoutRepository(db_path) as repo:
+        totals = repo.stats()
+        periods = period_stats(repo.conn, level, time_range) if level else []
+
+    if as_json:
+        result = {"database": db_path, "totals": totals._asdict()}
+        if level:
+            result[level] = [p._asdict() for p in periods]
+        click.echo(json.dumps(result))
+        return
+    _echo_stats(totals, periods)
+
+
+def _echo_stats(totals, periods):
+    click.echo(f"Total Workouts: {totals.workouts}")
+    click.echo(f"Total Distance: {totals.total_distance:.1f} km")
+    click.echo(f"Total Calories: {totals.total_calories:.0f}")
+    click.echo(f"Avg Heart Rate: {totals.avg_heart_rate:.1f} bpm")
+    click.echo(f"Longest Workout: {totals.max_distance:.1f} km")
+    click.echo(f"Average BMI: {totals.avg_bmi:.1f} ({bmi_category(totals.avg_bmi)})")
+    for p in periods:
+        click.echo(f"{p.period:>10}  {p.workouts:5d} workouts  {p.calories:10.0f} kcal  "
+                   f"{p.distance:8.1f} km  HR {p.hr_mean:5.1f} (max {p.hr_max})")
+
+
+@cli.command()
+@click.option("--by", "level", type=click.Choice(PERIOD_LEVELS),
+              help="also list per-period totals")
+@click.option("--range", "time_range", type=click.Choice(TIME_RANGES), default="All Data",
+              show_default=True, help="time range for --by")
+@click.option("--jobs", type=int, default=None, help="worker processes (default: one per CPU)")
+@click.option("--json", "as_json", is_flag=True, help="print JSON")
+@click.pass_context
+def cohort(ctx, level, time_range, jobs, as_json):
+    """Show totals across every profile."""
+    from fittrack.cohort import cohort_stats
+
+    store = ProfileStore(ctx.find_root().params["profiles_dir"])
+    result = cohort_stats(store.paths(), level, time_range, processes=jobs)
+    for error in result.errors:
+        click.echo(f"skipped {error}", err=True)
+
+    if as_json:
+        output = {"profiles": result.profiles, "totals": result.totals._asdict()}
+        if level:
+            output[level] = [p._asdict() for p in result.periods]
+        click.echo(json.dumps(output))
+        return
+    click.echo(f"Profiles: {result.profiles}")
+    _echo_stats(result.totals, result.periods)
+
+
+@cli.group()
+def profile():
+    """List and create profiles."""
+
+
+@profile.command("list")
+@click.pass_context
+def profile_list(ctx):
+    """List the profiles."""
+    for name in ProfileStore(ctx.find_root().params["profiles_dir"]).names():
+        click.echo(name)
+
+
+@profile.command("create")
+@click.argument("name")
+@click.pass_context
+def profile_create(ctx, name):
+    """Create an empty profile."""
+    try:
+        path = ProfileStore(ctx.find_root().params["profiles_dir"]).create(name)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="NAME")
+    click.echo(f"{name}: {path}")
+
+
+@cli.command("import")
+@click.argument("files", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", help="override the format detected from the file extension")
+@click.option("--batch-size", type=int, default=None, help="rows per transaction")
+@click.pass_obj
+def import_(db_path, files, fmt, batch_size):
+    """Bulk-import CSV, JSON Lines or Parquet files."""
+    from fittrack.importer import DEFAULT_BATCH_SIZE, import_file
+
+    skipped = 0
+    for path in files:
+        try:
+            result = import_file(db_path, path, fmt, batch_size or DEFAULT_BATCH_SIZE)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="FILES")
+        click.echo(f"{path}: {result}")
+        for error in result.errors:
+            click.echo(f"  {error}", err=True)
+        skipped += result.skipped
+    if skipped:
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument("output", type=click.Path(dir_okay=False))
+@click.option("--format", "fmt", help="override the format detected from the file extension")
+@click.option("--range", "time_range", type=click.Choice(TIME_RANGES), default="All Data",
+              show_default=True)
+@click.option("--batch-size", type=int, default=None, help="rows per record batch")
+@click.pass_obj
+def export(db_path, output, fmt, time_range, batch_size):
+    """Export workouts to CSV, Parquet or Arrow."""
+    from fittrack.exporter import DEFAULT_BATCH_SIZE, export_file
+
+    result = export_file(db_path, output, fmt, time_range, batch_size or DEFAULT_BATCH_SIZE)
+    click.echo(f"{output}: {result}")
+
+
+@cli.command()
+@click.argument("text")
+@click.option("--limit", type=int, default=20, show_default=True)
+@click.pass_obj
+def search(db_path, text, limit):
+    """Search workout descriptions."""
+    with WorkoutRepository(db_path) as repo:
+        workouts = repo.search(text, limit)
+    for w in workouts:
+        click.echo(f"{w.id:>8}  {w.date}  {w.calories or 0:8.0f} kcal  "
+                   f"{w.distance or 0:6.1f} km  {w.description}")
+    if not workouts:
+        click.echo("No matching workouts", err=True)
+
+
+@cli.command("render-chart")
+@click.option("--type", "chart_type", type=click.Choice(chart_types()), default=chart_types()[0],
+              show_default=True)
+@click.option("--range", "time_range", type=click.Choice(TIME_RANGES), default="Last 30 Days",
+              show_default=True)
+@click.option("--out", "output", required=True, type=click.Path(dir_okay=False),
+              help="image file (.png, .svg, .pdf, ...)")
+@click.option("--width", type=int, default=1000, show_default=True)
+@click.option("--height", type=int, default=600, show_default=True)
+@click.option("--dpi", type=int, default=100, show_default=True)
+@click.option("--dark", is_flag=True, help="dark background style")
+@click.option("--hexbin-threshold", type=click.IntRange(min=0), default=None,
+              help="workouts above which Health Metrics Correlation draws a hexbin plot "
+                   "(default: 20000)")
+@click.pass_obj
+def render_chart(db_path, chart_type, time_range, output, width, height, dpi, dark,
+                 hexbin_threshold):
+    """Render one of the Visualizations tab charts to a file."""
+    import matplotlib
+    import matplotlib.style
+    matplotlib.use("Agg")
+    from fittrack.charts import load_chart_data, save_chart
+
+    if dark:
+        matplotlib.style.use("dark_background")
+    with WorkoutRepository(db_path) as repo:
+        data = load_chart_data(repo.conn, chart_type, time_range)
+    save_chart(data, chart_type, output, width, height, dpi, hexbin_threshold=hexbin_threshold)
+    click.echo(f"{output}: {chart_type} ({time_range})")
+
+
+def main():
+    cli(prog_name="fittrack")
+
+
+if __name__ == "__main__":
+    main()
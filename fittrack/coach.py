@@ -0,0 +1,375 @@
+import argparse
+import copy
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from fittrack.connections import connect
+from fittrack.instrument import span
+from fittrack.migrations import delete_count, migrate
+from fittrack.stats import workout_stats
+
+# Coaching recommendations from a model of the workout history
+#
+#   python -m fittrack.coach fitness.db [--train] [--retrain]
+#
+# A linear model (scikit-learn SGDRegressor, one per target) predicts the
+# next session's distance and calories from the previous session, the rest
+# days since, the weekday, and the acute/chronic training load of the day
+# before (fittrack.training_load). Features and targets are standardized
+# by StandardScalers that, like the regressors, learn with partial_fit.
+#
+# The fitted model is stored with joblib next to the database
+# (fitness.db -> fitness.coach.joblib) together with the highest workout id
+# it has seen and the database's delete counter. train() only fits when at
+# least min_new_rows workouts were added since, and then only on those rows
+# (a few passes of partial_fit); any delete since means a fresh fit on
+# everything. Before fitting, the
+# model's error on the new rows is measured, which is an honest estimate
+# since it has never seen them. Edits to already-seen rows are not
+# retrained until the next fresh fit.
+#
+# Loaded models are cached per file (reloaded when the file changes), so
+# recommend() only runs one feature row through the model: about a
+# millisecond. Importing scikit-learn takes over a second, so the GUI
+# trains and loads on a worker thread (fittrack.gui.workers.CoachJob) and
+# only predicts on its own thread. The suggested session is capped so it
+# would not push the acute:chronic ratio above the optimal band; a
+# prediction that would is flagged as an overtraining risk.
+
+MODEL_FORMAT = 2
+MODEL_SUFFIX = ".coach.joblib"
+
+# Workouts to add before the model is trained again
+MIN_NEW_ROWS = 50
+
+# partial_fit passes over the rows of one training run, and rows per call
+EPOCHS = 5
+CHUNK_SIZE = 10000
+
+# Longer breaks count as this many rest days
+MAX_REST_DAYS = 30
+
+FEATURES = ("prev_distance", "prev_calories", "prev_heart_rate", "rest_days",
+            "acute_calories", "chronic_calories", "acute_distance", "chronic_distance",
+            "weekday_sin", "weekday_cos")
+TARGETS = ("distance", "calories")
+LOAD_STATE = ("acute_calories", "chronic_calories", "acute_distance", "chronic_distance")
+
+LAST_WORKOUT_SQL = """
+    SELECT epoch_day, IFNULL(distance, 0), IFNULL(calories, 0), IFNULL(heart_rate, 0)
+    FROM fitness WHERE epoch_day <= ? ORDER BY epoch_day DESC, id DESC LIMIT 1
+"""
+
+TrainResult = namedtuple("TrainResult", "trained rows new_rows seconds error")
+
+Recommendation = namedtuple(
+    "Recommendation",
+    "day distance calories predicted_distance predicted_calories acwr projected_acwr zone "
+    "overtraining capped trained_rows")
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+# fitness.db -> fitness.coach.joblib
+def model_path(db_path):
+    return os.path.splitext(db_path)[0] + MODEL_SUFFIX
+
+
+# Feature matrix, one row per session (all arguments are arrays)
+def _features(prev_distance, prev_calories, prev_heart_rate, rest_days, day, load):
+    import numpy as np
+    weekday = ((day + 3) % 7) * (2 * np.pi / 7)  # 1970-01-01 was a Thursday
+    return np.column_stack([
+        prev_distance, prev_calories, prev_heart_rate, np.minimum(rest_days, MAX_REST_DAYS),
+        *(load[name] for name in LOAD_STATE), np.sin(weekday), np.cos(weekday),
+    ]).astype(np.float64)
+
+
+# Training rows from the whole history: (workout ids, features, targets)
+# Every workout but the first is a row, described by the one before it.
+def training_data(conn):
+    import numpy as np
+    from fittrack.columns import fetch_columns
+    from fittrack.training_load import fetch_training_load
+
+    columns = fetch_columns(conn, ("id", "date", "distance", "calories", "heart_rate"))
+    valid = ~np.isnat(columns["date"])
+    ids = columns["id"][valid]
+    days = columns["date"][valid].astype(np.int64)
+    if len(ids) < 2:
+        return ids[:0], np.zeros((0, len(FEATURES))), np.zeros((0, len(TARGETS)))
+    distance = columns["distance"][valid]
+    calories = columns["calories"][valid]
+    heart_rate = columns["heart_rate"][valid].astype(np.float64)
+
+    # Load as of the day before each session (0 before the first day)
+    history = fetch_training_load(conn)
+    before = days[1:] - int(history["date"][0].astype(np.int64)) - 1
+    load = {name: np.where(before >= 0, history[name][np.maximum(before, 0)], 0.0)
+            for name in LOAD_STATE}
+    features = _features(distance[:-1], calories[:-1], heart_rate[:-1], np.diff(days),
+                         days[1:], load)
+    return ids[1:], features, np.column_stack([distance[1:], calories[1:]])
+
+
+# An untrained model
+def new_model():
+    import sklearn
+    from sklearn.linear_model import SGDRegressor
+    from sklearn.multioutput import MultiOutputRegressor
+    from sklearn.preprocessing import StandardScaler
+
+    return {
+        "format": MODEL_FORMAT,
+        "sklearn": sklearn.__version__,
+        "features": FEATURES,
+        "targets": TARGETS,
+        "scaler": StandardScaler(),
+        "target_scaler": StandardScaler(),
+        "model": MultiOutputRegressor(SGDRegressor(alpha=1e-4, eta0=0.01, random_state=0)),
+        "deletes": 0,
+        "rows": 0,
+        "last_id": 0,
+        "updates": 0,
+        "trained_at": None,
+    }
+
+
+# Fit `state` further on these rows; returns False when cancelled
+def fit(state, features, targets, progress=None, cancelled=None):
+    import numpy as np
+    state["scaler"].partial_fit(features)
+    state["target_scaler"].partial_fit(targets)
+    x = state["scaler"].transform(features)
+    y = state["target_scaler"].transform(targets)
+    rng = np.random.default_rng(state["updates"])
+    for epoch in range(EPOCHS):
+        order = rng.permutation(len(x))
+        for start in range(0, len(x), CHUNK_SIZE):
+            if cancelled is not None and cancelled():
+                return False
+            chunk = order[start:start + CHUNK_SIZE]
+            state["model"].partial_fit(x[chunk], y[chunk])
+        if progress:
+            progress(epoch + 1, EPOCHS)
+    state["updates"] += 1
+    return True
+
+
+# Predicted (distance, calories) per feature row, never negative
+def predict(state, features):
+    import numpy as np
+    x = state["scaler"].transform(features)
+    y = state["target_scaler"].inverse_transform(state["model"].predict(x))
+    return np.maximum(y, 0.0)
+
+
+# Mean absolute error per target
+def prediction_error(state, features, targets):
+    import numpy as np
+    errors = np.abs(predict(state, features) - targets).mean(axis=0)
+    return dict(zip(TARGETS, errors.tolist()))
+
+
+# The stored model of a database, or None (missing, unreadable or stale)
+def load_model(db_path):
+    path = model_path(db_path)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _models_lock:
+        cached = _models.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    import joblib
+    import sklearn
+    try:
+        with span("coach.load"):
+            state = joblib.load(path)
+    except Exception:
+        # Corrupt or from an incompatible build: the next training starts over
+        return None
+    if (not isinstance(state, dict) or state.get("format") != MODEL_FORMAT
+            or state.get("sklearn") != sklearn.__version__):
+        return None
+    with _models_lock:
+        _models[path] = (mtime, state)
+    return state
+
+
+# Write the model next to the database (atomically) and cache it
+def save_model(db_path, state):
+    import joblib
+    path = model_path(db_path)
+    temporary = path + ".tmp"
+    with span("coach.save"):
+        joblib.dump(state, temporary)
+        os.replace(temporary, path)
+    with _models_lock:
+        _models[path] = (os.stat(path).st_mtime_ns, state)
+
+
+# Workouts the stored model hasn't seen (every workout after deletes)
+def pending_rows(conn, state):
+    total = workout_stats(conn).workouts
+    if state is None:
+        return total
+    new = conn.execute("SELECT COUNT(*) FROM fitness WHERE id > ?",
+                       (state["last_id"],)).fetchone()[0]
+    return total if delete_count(conn) != state["deletes"] else new
+
+
+# Train the model of a database if enough workouts were added (or `force`)
+# progress(epoch, epochs) is called after every pass; cancelled() is
+# checked between partial_fit calls and leaves the stored model as it was.
+def train(db_path, min_new_rows=MIN_NEW_ROWS, force=False, progress=None, cancelled=None):
+    import numpy as np
+    start = time.perf_counter()
+    stored = load_model(db_path)
+    trained_rows = 0 if stored is None else stored["rows"]
+    conn = connect(db_path, autocommit=True)
+    try:
+        migrate(conn)
+        # Counting is cheap; the training rows are only built when needed
+        pending = pending_rows(conn, stored)
+        if pending < min_new_rows and not force:
+            return TrainResult(False, trained_rows, pending, time.perf_counter() - start, None)
+        # Read before the rows, so a delete in between forces the next fit
+        deletes = delete_count(conn)
+        with span("coach.features"):
+            ids, features, targets = training_data(conn)
+    finally:
+        conn.close()
+
+    fresh = force or stored is None or deletes != stored["deletes"]
+    new = np.ones(len(ids), dtype=bool) if fresh else ids > stored["last_id"]
+    count = int(new.sum())
+    if not count:
+        return TrainResult(False, trained_rows, count, time.perf_counter() - start, None)
+
+    if fresh:
+        state = new_model()
+        error = None
+    else:
+        # The cached model may be predicting on another thread
+        state = copy.deepcopy(stored)
+        error = prediction_error(state, features[new], targets[new])
+    with span("coach.fit"):
+        if not fit(state, features[new], targets[new], progress, cancelled):
+            return TrainResult(False, trained_rows, count, time.perf_counter() - start, None)
+    state.update(deletes=deletes, rows=len(ids), last_id=int(ids.max()),
+                 trained_at=time.time())
+    save_model(db_path, state)
+    return TrainResult(True, len(ids), count, time.perf_counter() - start, error)
+
+
+# Suggested next session for `today` ("yyyy-MM-dd", default: today), or
+# None without a model or a workout to go on
+def recommend(conn, state, today=None):
+    import numpy as np
+    from fittrack.training_load import (ACUTE_DAYS, CHRONIC_DAYS, OPTIMAL_ACWR, acwr_zone,
+                                        fetch_training_load)
+    if state is None:
+        return None
+    today = np.datetime64(today or "today", "D")
+    day = int(today.astype(np.int64))
+    last = conn.execute(LAST_WORKOUT_SQL, (day,)).fetchone()
+    if last is None:
+        return None
+
+    with span("coach.recommend"):
+        history = fetch_training_load(conn, str(today - np.timedelta64(1, "D")), until=day)
+        days = history["date"].astype(np.int64)
+        before = {name: history[name][days == day - 1] for name in LOAD_STATE}
+        load = {name: values if len(values) else np.zeros(1) for name, values in before.items()}
+        features = _features(np.array([last[1]]), np.array([last[2]]), np.array([last[3]]),
+                             np.array([day - last[0]]), np.array([day]), load)
+        distance, calories = (float(v) for v in predict(state, features)[0])
+
+        # Today's load (including anything already logged) plus the session
+        acute = float(history["acute_calories"][-1]) if len(days) else 0.0
+        chronic = float(history["chronic_calories"][-1]) if len(days) else 0.0
+        acute_alpha = 2.0 / (ACUTE_DAYS + 1)
+        chronic_alpha = 2.0 / (CHRONIC_DAYS + 1)
+        acwr = acute / chronic if chronic > 0 else None
+
+        def ratio_after(session):
+            after = chronic + chronic_alpha * session
+            return (acute + acute_alpha * session) / after if after > 0 else None
+
+        projected = ratio_after(calories)
+        # Largest session that keeps the ratio in the optimal band
+        suggested = calories
+        if chronic > 0 and projected is not None and projected > OPTIMAL_ACWR:
+            limit = (OPTIMAL_ACWR * chronic - acute) / (acute_alpha - OPTIMAL_ACWR * chronic_alpha)
+            suggested = max(0.0, min(calories, limit))
+        scale = suggested / calories if calories > 0 else 1.0
+        overtraining = any(r is not None and r > OPTIMAL_ACWR for r in (acwr, projected))
+
+    return Recommendation(str(today), distance * scale, suggested, distance, calories, acwr,
+                          projected, acwr_zone(projected), overtraining, suggested < calories,
+                          state["rows"])
+
+
+# One-line summary of a recommendation
+def format_recommendation(rec):
+    if rec.calories <= 0 and rec.predicted_calories > 0:
+        text = "Rest day suggested"
+    else:
+        text = f"Next session: {rec.distance:.1f} km, {rec.calories:.0f} kcal"
+    if rec.capped:
+        text += f" (model: {rec.predicted_distance:.1f} km, {rec.predicted_calories:.0f} kcal)"
+    ratio = "-" if rec.projected_acwr is None else f"{rec.projected_acwr:.2f}"
+    text += f"; ACWR after the predicted session: {ratio} ({rec.zone})"
+    if rec.overtraining:
+        text += ", overtraining risk"
+    return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suggest the next FitTrack session")
+    parser.add_argument("db", help="FitTrack database file")
+    parser.add_argument("--train", action="store_true",
+                        help="train first if enough workouts were added")
+    parser.add_argument("--retrain", action="store_true", help="fit from scratch first")
+    parser.add_argument("--min-new-rows", type=int, default=MIN_NEW_ROWS,
+                        help=f"workouts to add before training again (default: {MIN_NEW_ROWS})")
+    args = parser.parse_args(argv)
+
+    if args.train or args.retrain:
+        result = train(args.db, args.min_new_rows, force=args.retrain)
+        if result.trained:
+            print(f"trained on {result.new_rows} of {result.rows} sessions "
+                  f"in {result.seconds:.2f} s")
+            if result.error:
+                print("error on the new sessions before fitting: "
+                      f"{result.error['distance']:.2f} km, {result.error['calories']:.0f} kcal")
+        else:
+            print(f"not trained: {result.new_rows} new sessions "
+                  f"(needs {args.min_new_rows})")
+
+    conn = connect(args.db, autocommit=True)
+    try:
+        migrate(conn)
+        state = load_model(args.db)
+        rec = recommend(conn, state)
+    finally:
+        conn.close()
+    if state is None:
+        print("no model yet (run with --train)", file=sys.stderr)
+        return 1
+    if rec is None:
+        print("no workouts to go on", file=sys.stderr)
+        return 1
+    print(format_recommendation(rec))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from fittrack.chart_options import cutoff_date
+from fittrack.connections import connect
+from fittrack.rollups import fetch_rollup, iso_week_labels, month_labels
+from fittrack.stats import PERIOD_LEVELS, PeriodStats, WorkoutStats
+from fittrack.summary import SUMMARY_COLUMNS, SUMMARY_TABLE
+
+# Cohort analytics across profile shards
+#
+# Every shard keeps its own totals (fitness_summary) and calendar rollups,
+# so its share of the cohort figures is two small reads. The shards are
+# split into chunks that a process pool reads in parallel; each chunk comes
+# back as a partial result holding only mergeable values (counts, sums and
+# maxima, never averages), and the parent folds the partials together as
+# they finish. The totals and per-period figures are therefore exactly what
+# the Stats tab and `fittrack stats --by` would show for one table holding
+# every profile's workouts.
+
+# Rollup fields read from each shard (hr_mean is derived after the merge)
+PERIOD_FIELDS = ("workouts", "calories", "distance", "hr_sum", "hr_count", "hr_max")
+
+TOTALS_QUERY = f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM {SUMMARY_TABLE} WHERE id = 1"
+
+CohortStats = namedtuple("CohortStats", "profiles totals periods errors")
+
+
+# Mergeable figures for a set of shards
+class Partial:
+    def __init__(self):
+        self.profiles = 0
+        self.totals = dict.fromkeys(SUMMARY_COLUMNS, 0)
+        self.totals["max_distance"] = None
+        self.periods = None
+        self.errors = []
+
+    def add_totals(self, row):
+        for name, value in zip(SUMMARY_COLUMNS, row):
+            if name == "max_distance":
+                current = self.totals[name]
+                if value is not None and (current is None or value > current):
+                    self.totals[name] = value
+            else:
+                self.totals[name] += value or 0
+
+    # rollups: {"period": datetime64[D], field: array} as from fetch_rollup
+    # All of them are merged with the current periods in one pass.
+    def add_periods(self, *rollups):
+        parts = ([self.periods] if self.periods is not None else []) + list(rollups)
+        if len(parts) == 1:
+            self.periods = parts[0]
+            return
+        if not parts:
+            return
+        keys, slots = np.unique(np.concatenate([p["period"] for p in parts]),
+                                return_inverse=True)
+        merged = {"period": keys}
+        for field in PERIOD_FIELDS:
+            values = np.concatenate([p[field] for p in parts])
+            out = np.zeros(len(keys), dtype=values.dtype)
+            if field == "hr_max":
+                np.maximum.at(out, slots, values)
+            else:
+                np.add.at(out, slots, values)
+            merged[field] = out
+        self.periods = merged
+
+    def merge(self, other):
+        self.profiles += other.profiles
+        self.add_totals([other.totals[name] for name in SUMMARY_COLUMNS])
+        if other.periods is not None:
+            self.add_periods(other.periods)
+        self.errors.extend(other.errors)
+
+
+# Partial result for one chunk of shards (runs in a worker process)
+def read_shards(paths, level=None, since=None):
+    partial = Partial()
+    rollups = []
+    for path in paths:
+        try:
+            conn = connect(path, readonly=True)
+        except Exception as e:
+            partial.errors.append(f"{path}: {e}")
+            continue
+        try:
+            row = conn.execute(TOTALS_QUERY).fetchone()
+            rollup = fetch_rollup(conn, level, since, PERIOD_FIELDS) if level else None
+        except Exception as e:
+            partial.errors.append(f"{path}: {e}")
+            continue
+        finally:
+            conn.close()
+        partial.profiles += 1
+        if row:
+            partial.add_totals(row)
+        if rollup is not None and len(rollup["period"]):
+            rollups.append(rollup)
+    partial.add_periods(*rollups)
+    return partial
+
+
+def _chunks(paths, chunk_size):
+    return [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+
+
+# Cohort totals (and per-period figures when `level` is given) over shards
+# processes=1 reads them in this process. progress(shards_done) is called
+# as chunks finish.
+def cohort_stats(paths, level=None, time_range="All Data", processes=None,
+                 chunk_size=None, progress=None):
+    if level is not None and level not in PERIOD_LEVELS:
+        raise ValueError(f"Unknown period level: {level}")
+    paths = list(paths)
+    since = cutoff_date(time_range)
+    processes = processes or os.cpu_count() or 1
+    # A few chunks per process evens out shards of different sizes
+    chunk_size = chunk_size or max(1, -(-len(paths) // (processes * 4)))
+
+    result = Partial()
+    done = 0
+    if processes == 1 or len(paths) <= chunk_size:
+        for chunk in _chunks(paths, chunk_size):
+            result.merge(read_shards(chunk, level, since))
+            done += len(chunk)
+            if progress:
+                progress(done)
+    else:
+        with ProcessPoolExecutor(processes) as pool:
+            futures = {pool.submit(read_shards, chunk, level, since): len(chunk)
+                       for chunk in _chunks(paths, chunk_size)}
+            for future in as_completed(futures):
+                result.merge(future.result())
+                done += futures[future]
+                if progress:
+                    progress(done)
+    return CohortStats(result.profiles, _workout_stats(result.totals),
+                       _period_stats(result.periods, level), result.errors)
+
+
+# Same figures as read_stats/workout_stats, from the merged sums
+def _workout_stats(totals):
+    hr_count = totals["heart_rate_count"]
+    bmi_count = totals["bmi_count"]
+    return WorkoutStats(totals["workout_count"], totals["total_distance"],
+                        totals["total_calories"],
+                        totals["heart_rate_sum"] / hr_count if hr_count else 0,
+                        totals["max_distance"] or 0,
+                        totals["bmi_sum"] / bmi_count if bmi_count else 0)
+
+
+def _period_stats(periods, level):
+    if level is None or periods is None:
+        return []
+    if level == "weekly":
+        labels = iso_week_labels(periods["period"])
+    elif level == "monthly":
+        labels = month_labels(periods["period"])
+    else:
+        labels = [str(day) for day in periods["period"]]
+    counts = periods["hr_count"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hr_mean = np.where(counts > 0, periods["hr_sum"] / counts, 0.0)
+    return [PeriodStats(label, int(workouts), float(calories), float(distance),
+                        float(mean), int(hr_max))
+            for label, workouts, calories, distance, mean, hr_max in zip(
+                labels, periods["workouts"], periods["calories"], periods["distance"],
+                hr_mean, periods["hr_max"])]
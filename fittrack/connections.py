@@ -0,0 +1,94 @@
+import os
+import sqlite3
+import threading
+from urllib.parse import quote
+
+# SQLite connection manager
+#
+# Every connection FitTrack opens goes through connect(), which applies one
+# configuration: WAL journaling (readers never block the writer and the
+# writer never blocks readers), synchronous=NORMAL (safe with WAL, one fsync
+# per checkpoint instead of per commit), a page cache, memory-mapped reads
+# and in-memory temp tables. A busy timeout makes a second writer wait for
+# the first one instead of failing with "database is locked". configure()
+# changes the settings for connections opened afterwards.
+#
+# A sqlite3 connection (like a QSqlDatabase connection) must only be used by
+# the thread that opened it. Background jobs call thread_connection() and get
+# a connection owned by their worker thread, reused for later jobs that run
+# on the same pooled thread. The GUI side has the same pool for QSqlDatabase
+# (fittrack.gui.database).
+#
+# Statements are prepared once per connection: sqlite3 keeps the last
+# STATEMENT_CACHE_SIZE prepared statements by SQL text. The hot ones are
+# module constants (INSERT_SQL, DELETE_SQL, STATS_QUERY) or built the same
+# way every time (the fetch_columns and fetch_rollup range selects), so
+# after the first call they are only rebound and stepped.
+
+SETTINGS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -32768,        # KiB (32 MB)
+    "mmap_size": 268435456,      # bytes (256 MB)
+    "temp_store": "MEMORY",
+    "busy_timeout": 10000,       # ms
+}
+
+STATEMENT_CACHE_SIZE = 256
+
+_local = threading.local()
+
+
+def configure(**settings):
+    unknown = [name for name in settings if name not in SETTINGS]
+    if unknown:
+        raise ValueError(f"Unknown connection setting(s): {', '.join(unknown)}")
+    SETTINGS.update(settings)
+
+
+# PRAGMA statements for the current settings (journal mode first)
+def pragma_statements():
+    return [f"PRAGMA {name} = {value}" for name, value in SETTINGS.items()]
+
+
+# Open a configured connection; autocommit=True runs every statement in
+# its own transaction unless BEGIN is issued (isolation_level=None),
+# readonly=True fails instead of creating a missing file or writing
+def connect(path, autocommit=False, readonly=False):
+    kwargs = {"isolation_level": None} if autocommit else {}
+    if readonly:
+        path = "file:" + quote(os.path.abspath(path)) + "?mode=ro"
+        kwargs["uri"] = True
+    conn = sqlite3.connect(path, timeout=SETTINGS["busy_timeout"] / 1000,
+                           cached_statements=STATEMENT_CACHE_SIZE, **kwargs)
+    apply_settings(conn)
+    return conn
+
+
+def apply_settings(conn):
+    for statement in pragma_statements():
+        try:
+            conn.execute(statement).fetchall()
+        except sqlite3.OperationalError:
+            # The journal mode can't change while another connection is
+            # mid-transaction; WAL is persistent, so a later open sets it
+            if "journal_mode" not in statement:
+                raise
+
+
+def thread_connection(path):
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        conn = connections[path] = connect(path)
+    return conn
+
+
+# Close the calling thread's connections
+def close_thread_connections():
+    connections = getattr(_local, "connections", None) or {}
+    for conn in connections.values():
+        conn.close()
+    connections.clear()
@@ -0,0 +1,58 @@
+import numpy as np
+
+# Correlation matrices over workout columns
+#
+# Pearson on the values, Spearman as Pearson on average ranks (ties share
+# the mean of their positions, as in the textbook definition). Everything
+# is vectorized: one sort per column, then a single np.corrcoef. Spearman
+# on more than RANK_SAMPLE rows ranks a fixed random sample of them; that
+# moves the coefficients by a few thousandths, below the two decimals shown.
+
+# Columns compared on the Health Metrics Correlation chart
+METRIC_COLUMNS = ("calories", "distance", "heart_rate", "body_temp", "bmi")
+
+# Columns where 0 means "not recorded" (NULL reads as 0, see fetch_columns)
+MISSING_AS_ZERO = ("heart_rate", "body_temp", "bmi")
+
+RANK_SAMPLE = 200000
+
+
+# Average ranks (1-based) of a 1-d array
+def rank(values):
+    values = np.asarray(values)
+    n = len(values)
+    order = np.argsort(values)
+    ordered = values[order]
+    starts = np.r_[True, ordered[1:] != ordered[:-1]] if n else np.zeros(0, dtype=bool)
+    group = np.cumsum(starts) - 1
+    first = np.flatnonzero(starts)
+    counts = np.diff(np.r_[first, n])
+    ranks = np.empty(n)
+    ranks[order] = (first + (counts + 1) / 2)[group]
+    return ranks
+
+
+# Rows where every column holds a recorded value
+def complete_rows(data, columns=METRIC_COLUMNS):
+    keep = np.ones(len(data[columns[0]]), dtype=bool)
+    for c in columns:
+        if c in MISSING_AS_ZERO:
+            keep &= data[c] != 0
+    return keep
+
+
+# len(columns) x len(columns) matrix, NaN where a column is constant
+def correlation_matrix(data, columns=METRIC_COLUMNS, method="pearson"):
+    keep = complete_rows(data, columns)
+    if keep.sum() < 2:
+        return np.full((len(columns), len(columns)), np.nan)
+    rows = [np.asarray(data[c], dtype=np.float64)[keep] for c in columns]
+    if method == "spearman":
+        if len(rows[0]) > RANK_SAMPLE:
+            sample = np.random.default_rng(0).choice(len(rows[0]), RANK_SAMPLE, replace=False)
+            rows = [r[sample] for r in rows]
+        rows = [rank(r) for r in rows]
+    elif method != "pearson":
+        raise ValueError(f"Unknown correlation method: {method}")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.corrcoef(np.vstack(rows))
@@ -0,0 +1,72 @@
+import numpy as np
+
+# Point decimation for long time series
+#
+# A line chart a thousand pixels wide can't show more than a point or two
+# per pixel column, so plotting every workout of a multi-year history only
+# makes matplotlib slow. These functions pick the indices of the points
+# worth drawing:
+#
+# - minmax: split the series into equal buckets and keep each bucket's
+#   lowest and highest point. Every peak and trough survives, so the drawn
+#   line covers exactly the same vertical range per pixel column.
+# - lttb: Largest-Triangle-Three-Buckets, one point per bucket, the one
+#   forming the largest triangle with the point kept before it and the
+#   average of the next bucket. Keeps the visual shape with fewer points.
+#
+# x must be sorted; the first and last points are always kept and the
+# returned indices are increasing.
+
+METHODS = ("minmax", "lttb")
+
+
+def minmax_indices(y, buckets):
+    n = len(y)
+    if buckets < 1 or n <= 2 * buckets + 2:
+        return np.arange(n)
+    size = -(-n // buckets)
+    rows = -(-n // size)
+    pad = rows * size - n
+    values = np.asarray(y, dtype=np.float64)
+    lows = np.concatenate([values, np.full(pad, np.inf)]).reshape(rows, size)
+    highs = np.concatenate([values, np.full(pad, -np.inf)]).reshape(rows, size)
+    starts = np.arange(rows) * size
+    keep = np.concatenate(([0, n - 1], starts + lows.argmin(axis=1),
+                           starts + highs.argmax(axis=1)))
+    return np.unique(keep)
+
+
+def lttb_indices(x, y, threshold):
+    n = len(x)
+    if threshold < 3 or n <= threshold:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # threshold - 2 buckets over the points between the first and the last
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[n - 1], y[n - 1]
+        # Twice the triangle areas (a, b, next average) for every b in the bucket
+        areas = np.abs((x[a] - next_x) * (y[start:end] - y[a])
+                       - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(areas.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+# Indices of at most about max_points points of (x, y) to draw
+def decimate(x, y, max_points, method="minmax"):
+    if method == "minmax":
+        return minmax_indices(y, max(1, (max_points - 2) // 2))
+    if method == "lttb":
+        return lttb_indices(x, y, max_points)
+    raise ValueError(f"Unknown decimation method: {method}")
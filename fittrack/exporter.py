@@ -0,0 +1,206 @@
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+
+from fittrack.chart_options import TIME_RANGE_DAYS, cutoff_date
+from fittrack.connections import connect
+from fittrack.migrations import migrate
+
+# Streaming export of the fitness table to CSV, Parquet or Arrow IPC
+#
+# Rows are read with fetchmany() in record batches and written out batch by
+# batch, so memory use depends on the batch size, not on the table size.
+# Rows come out in id (insertion) order: that is the table's storage order,
+# so the scan never has to sort. A time range limits the rows to the ones
+# the Visualizations tab would show for that range.
+#
+# Parquet and Arrow files keep the column types of the table and store the
+# day as a real date (date32, from the epoch_day column); CSV writes it as
+# yyyy-mm-dd.
+
+DEFAULT_BATCH_SIZE = 65536
+
+# Exported columns: (name, SQL expression, pyarrow type name)
+EXPORT_COLUMNS = (
+    ("id", "id", "int64"),
+    ("date", "epoch_day", "date32"),
+    ("calories", "calories", "float64"),
+    ("distance", "distance", "float64"),
+    ("heart_rate", "heart_rate", "int64"),
+    ("body_temp", "body_temp", "float64"),
+    ("age", "age", "int64"),
+    ("weight", "weight", "float64"),
+    ("height", "height", "float64"),
+    ("bmi", "bmi", "float64"),
+    ("description", "description", "string"),
+)
+
+COLUMN_NAMES = [name for name, _, _ in EXPORT_COLUMNS]
+
+
+class ExportResult:
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (f"exported {self.rows} rows in {self.seconds:.2f} s "
+                f"({self.rows_per_second:,.0f} rows/s)")
+
+
+# Cursor over the rows to export, `since` is a "yyyy-MM-dd" lower bound
+def _select(conn, since, date_expr):
+    exprs = [date_expr if name == "date" else sql for name, sql, _ in EXPORT_COLUMNS]
+    sql = "SELECT " + ", ".join(exprs) + " FROM fitness"
+    params = []
+    if since:
+        sql += " WHERE date >= ?"
+        params.append(since)
+    return conn.execute(sql + " ORDER BY id", params)
+
+
+def _batches(cursor, batch_size):
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield rows
+
+
+# Writers (each takes a cursor and returns the number of rows written)
+def write_csv(cursor, path, batch_size, progress=None):
+    rows_written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMN_NAMES)
+        for rows in _batches(cursor, batch_size):
+            writer.writerows(rows)
+            rows_written += len(rows)
+            if progress:
+                progress(rows_written)
+    return rows_written
+
+
+def _arrow():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise RuntimeError("Parquet and Arrow export need the pyarrow package")
+    return pa
+
+
+def arrow_schema():
+    pa = _arrow()
+    return pa.schema([(name, getattr(pa, type_name)()) for name, _, type_name in EXPORT_COLUMNS])
+
+
+# One pyarrow RecordBatch from a list of row tuples
+def _record_batch(rows, schema):
+    pa = _arrow()
+    arrays = []
+    for values, field in zip(zip(*rows), schema):
+        if pa.types.is_date32(field.type):
+            # epoch_day is already days since 1970-01-01, date32's unit
+            arrays.append(pa.array(values, type=pa.int32()).cast(field.type))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _write_arrow_batches(cursor, writer, schema, batch_size, progress):
+    rows_written = 0
+    for rows in _batches(cursor, batch_size):
+        writer.write_batch(_record_batch(rows, schema))
+        rows_written += len(rows)
+        if progress:
+            progress(rows_written)
+    return rows_written
+
+
+def write_parquet(cursor, path, batch_size, progress=None):
+    import pyarrow.parquet as pq
+    schema = arrow_schema()
+    with pq.ParquetWriter(path, schema) as writer:
+        return _write_arrow_batches(cursor, writer, schema, batch_size, progress)
+
+
+def write_arrow(cursor, path, batch_size, progress=None):
+    pa = _arrow()
+    schema = arrow_schema()
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        return _write_arrow_batches(cursor, writer, schema, batch_size, progress)
+
+
+# Extension -> (writer, SQL for the date column)
+WRITERS = {
+    ".csv": (write_csv, "date"),
+    ".parquet": (write_parquet, "epoch_day"),
+    ".arrow": (write_arrow, "epoch_day"),
+    ".feather": (write_arrow, "epoch_day"),
+}
+
+
+def _writer_for(path, fmt):
+    ext = "." + fmt.lower().lstrip(".") if fmt else os.path.splitext(path)[1].lower()
+    writer = WRITERS.get(ext)
+    if writer is None:
+        raise ValueError(f"Unsupported export format: {ext or path}")
+    return writer
+
+
+# Export the fitness table of a database (path or sqlite3 connection)
+# The database is migrated first, like import_file does (a connection passed
+# in must be in autocommit mode). time_range is one of the Visualizations
+# tab ranges ("Last 30 Days", ...); progress(rows_written) is called after
+# each batch.
+def export_file(database, path, fmt=None, time_range="All Data",
+                batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    if time_range not in TIME_RANGE_DAYS:
+        raise ValueError(f"Unknown time range: {time_range}")
+    write, date_expr = _writer_for(path, fmt)
+
+    if isinstance(database, sqlite3.Connection):
+        conn = database
+        owns_connection = False
+    else:
+        conn = connect(database, autocommit=True)
+        owns_connection = True
+
+    result = ExportResult(path)
+    start = time.perf_counter()
+    try:
+        migrate(conn)
+        cursor = _select(conn, cutoff_date(time_range), date_expr)
+        result.rows = write(cursor, path, batch_size, progress)
+    finally:
+        result.seconds = time.perf_counter() - start
+        if owns_connection:
+            conn.close()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export workouts from a FitTrack database")
+    parser.add_argument("output", help="output file (.csv, .parquet, .arrow or .feather)")
+    parser.add_argument("--db", default="fitness.db", help="database file (default: fitness.db)")
+    parser.add_argument("--format", help="override the format detected from the file extension")
+    parser.add_argument("--range", dest="time_range", default="All Data",
+                        choices=list(TIME_RANGE_DAYS), help="time range (default: All Data)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    result = export_file(args.db, args.output, args.format, args.time_range, args.batch_size)
+    print(f"{args.output}: {result}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
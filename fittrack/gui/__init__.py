@@ -0,0 +1 @@
+# Qt widgets and models used by the FitTrack window
@@ -0,0 +1,43 @@
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtWidgets import QSizePolicy, QWidget
+
+
+# Shows a chart that was rendered off the GUI thread
+class ChartView(QWidget):
+    resized = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.image = None
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setMinimumSize(200, 150)
+
+    # Pixel size a chart should be rendered at to fill the widget
+    def render_size(self):
+        ratio = self.devicePixelRatioF()
+        return max(1, int(self.width() * ratio)), max(1, int(self.height() * ratio))
+
+    def set_image(self, rgba, width, height):
+        # QImage does not own the buffer, so keep a deep copy
+        image = QImage(rgba, width, height, QImage.Format_RGBA8888).copy()
+        image.setDevicePixelRatio(self.devicePixelRatioF())
+        self.image = image
+        self.update()
+
+    def clear(self):
+        self.image = None
+        self.update()
+
+    def paintEvent(self, event):
+        if self.image is None:
+            return
+        painter = QPainter(self)
+        size = self.image.size() / self.image.devicePixelRatio()
+        x = (self.width() - size.width()) // 2
+        y = (self.height() - size.height()) // 2
+        painter.drawImage(x, y, self.image)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.resized.emit()
@@ -0,0 +1,46 @@
+import threading
+
+from PyQt5.QtSql import QSqlDatabase, QSqlQuery
+
+from fittrack.connections import SETTINGS, pragma_statements
+
+
+# Named QSqlDatabase connections, one per thread and database file
+#
+# Qt's default connection belongs to the thread that created it, and any
+# QSqlQuery() built without a database silently uses it. Instead every
+# thread asks for its own named connection here; it is opened once with
+# the settings of fittrack.connections (WAL, synchronous, cache and mmap
+# sizes, temp store, busy timeout) and reused afterwards.
+def connection_name(path, thread=None):
+    thread = thread or threading.get_ident()
+    return f"fittrack:{path}:{thread}"
+
+
+# Open (or return) this thread's connection; raises RuntimeError on failure
+def thread_database(path):
+    name = connection_name(path)
+    if QSqlDatabase.contains(name):
+        db = QSqlDatabase.database(name)
+        if db.isOpen():
+            return db
+    else:
+        db = QSqlDatabase.addDatabase("QSQLITE", name)
+        db.setDatabaseName(path)
+        db.setConnectOptions(f"QSQLITE_BUSY_TIMEOUT={SETTINGS['busy_timeout']}")
+    if not db.open():
+        raise RuntimeError(db.lastError().text())
+    for statement in pragma_statements():
+        query = QSqlQuery(db)
+        if not query.exec_(statement) and "journal_mode" not in statement:
+            raise RuntimeError(f"{statement}: {query.lastError().text()}")
+        query.finish()
+    return db
+
+
+# Close and forget this thread's connection
+def close_thread_database(path):
+    name = connection_name(path)
+    if QSqlDatabase.contains(name):
+        QSqlDatabase.database(name, False).close()
+        QSqlDatabase.removeDatabase(name)
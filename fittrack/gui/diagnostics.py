@@ -0,0 +1,134 @@
+import sqlite3
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import (QDialog, QHBoxLayout, QHeaderView, QLabel, QListWidget,
+                             QPlainTextEdit, QPushButton, QSplitter, QTableWidget,
+                             QTableWidgetItem, QVBoxLayout)
+
+from fittrack import instrument
+from fittrack.connections import connect
+
+HISTOGRAM_HEADERS = ["Span", "Count", "p50 ms", "p95 ms", "Max ms", "Total ms"]
+
+
+# Live timing numbers and query plans (Ctrl+Shift+D in the main window)
+#
+# Shows the span histograms, slowest total first, and the queries that just
+# ran; selecting a query shows its EXPLAIN QUERY PLAN. Opening the dialog
+# switches instrumentation on; it stays on until the app exits.
+class DiagnosticsDialog(QDialog):
+    def __init__(self, db_path, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("FitTrack Diagnostics")
+        self.resize(900, 650)
+        self.db_path = db_path
+        self.conn = None
+        self.shown_queries = []
+        instrument.enable()
+
+        self.table = QTableWidget(0, len(HISTOGRAM_HEADERS))
+        self.table.setHorizontalHeaderLabels(HISTOGRAM_HEADERS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+
+        self.queries = QListWidget()
+        self.plan = QPlainTextEdit()
+        self.plan.setReadOnly(True)
+        self.plan.setFont(QFont("Monospace"))
+        self.plan.setPlaceholderText("Select a query to see its plan")
+
+        splitter = QSplitter(Qt.Vertical)
+        splitter.addWidget(self.table)
+        splitter.addWidget(self.queries)
+        splitter.addWidget(self.plan)
+
+        self.status = QLabel("")
+        self.reset_btn = QPushButton("Reset")
+        self.close_btn = QPushButton("Close")
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.status)
+        buttons.addStretch()
+        buttons.addWidget(self.reset_btn)
+        buttons.addWidget(self.close_btn)
+
+        layout = QVBoxLayout()
+        layout.addWidget(splitter)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.update_numbers)
+        self.queries.currentRowChanged.connect(self.show_plan)
+        self.reset_btn.clicked.connect(self.reset)
+        self.close_btn.clicked.connect(self.close)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_numbers()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def reset(self):
+        instrument.reset()
+        self.plan.clear()
+        self.update_numbers()
+
+    def update_numbers(self):
+        spans = sorted(instrument.snapshot().items(), key=lambda item: -item[1]["total"])
+        self.table.setRowCount(len(spans))
+        for row, (name, h) in enumerate(spans):
+            values = [name, str(h["count"])] + [f"{h[k] * 1000:.2f}"
+                                                 for k in ("p50", "p95", "max", "total")]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+
+        # Keep the selected query selected while the list refreshes
+        row = self.queries.currentRow()
+        selected = self.shown_queries[row] if row >= 0 else None
+        self.shown_queries = instrument.recent_queries()
+        self.queries.blockSignals(True)
+        self.queries.clear()
+        for query in self.shown_queries:
+            sql = " ".join(query["sql"].split())
+            self.queries.addItem(f"{query['seconds'] * 1000:8.2f} ms  {query['name']:<20} {sql}")
+            if query is selected:
+                self.queries.setCurrentRow(self.queries.count() - 1)
+        self.queries.blockSignals(False)
+        self.status.setText(f"{len(spans)} spans, {self.queries.count()} recent queries")
+
+    def show_plan(self, row):
+        if row < 0:
+            return
+        query = self.shown_queries[row]
+        # Plans are read on a connection of our own, outside the timed spans
+        if self.conn is None:
+            self.conn = connect(self.db_path)
+        try:
+            lines = instrument.explain(self.conn, query["sql"], query["params"])
+        except sqlite3.Error as e:
+            lines = ["EXPLAIN failed: " + str(e)]
+        self.plan.setPlainText(" ".join(query["sql"].split()) + "\n\n"
+                               + ("\n".join(lines) or "(no plan)"))
+
+    # Explain plans against another database (the window switched profile)
+    def set_database(self, db_path):
+        self.close_connection()
+        self.db_path = db_path
+
+    def close_connection(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def closeEvent(self, event):
+        self.close_connection()
+        super().closeEvent(event)
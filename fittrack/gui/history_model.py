@@ -0,0 +1,390 @@
+from bisect import bisect_right
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
+from PyQt5.QtSql import QSqlQuery
+
+from fittrack.instrument import span
+
+COLUMNS = ["id", "date", "calories", "distance", "heart_rate", "body_temp",
+           "age", "weight", "height", "bmi", "description"]
+
+HEADERS = ["ID", "Date", "Calories", "Distance", "Heart Rate",
+           "Body Temp", "Age", "Weight", "Height", "BMI", "Description"]
+
+# Date used for the default order and keyset paging; matches _key() for NULL
+# dates and the idx_fitness_date_key expression index
+SORT_DATE = "IFNULL(fitness.date, '')"
+
+
+# Lazily fetched, windowed model over the fitness table
+#
+# Rows are exposed to the view chunk by chunk through canFetchMore/fetchMore.
+# Only the most recently used `max_chunks` chunks are kept in memory; an
+# evicted chunk is read back when the view scrolls over it again.
+#
+# In the default order (newest first) a chunk is a key range: chunk c holds
+# the rows whose (date, id) lies in (bounds[c + 1], bounds[c]], bounds[0]
+# being open-ended. That lets insert_row()/remove_row() change one row and
+# emit a single-row insert/remove, without a reload: the chunk just grows or
+# shrinks and the view keeps its scroll position and selection.
+# A filter may bring its own join and ordering (e.g. full-text relevance);
+# those results are paged with LIMIT/OFFSET over the chunk offsets instead.
+#
+# Queries run on `database` (the window's named connection, see
+# fittrack.gui.database) and are prepared once per SQL text: paging through
+# the table only rebinds the keyset values. Each query is finished as soon
+# as its rows are read, so no read transaction stays open on the WAL.
+class WorkoutTableModel(QAbstractTableModel):
+    def __init__(self, database, chunk_size=500, max_chunks=20, max_statements=32, parent=None):
+        super().__init__(parent)
+        self.database = database
+        self.max_statements = max_statements
+        self._statements = OrderedDict()
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self._where = ""
+        self._binds = []
+        self._join = ""
+        self._order = ""
+        self._total = 0
+        self._loaded = 0
+        self._chunks = OrderedDict()
+        self._bounds = [None]
+        self._sizes = []
+        self._offsets = [0]
+        self.error = ""
+
+    # Filter
+    def set_filter(self, where="", binds=(), join="", order=""):
+        self.beginResetModel()
+        self._where = where
+        self._binds = list(binds)
+        self._join = join
+        self._order = order
+        self._reset_cache()
+        self._total = self._count()
+        self.endResetModel()
+        return not self.error
+
+    def refresh(self):
+        return self.set_filter(self._where, self._binds, self._join, self._order)
+
+    def _reset_cache(self):
+        self._loaded = 0
+        self._chunks.clear()
+        self._bounds = [None]
+        self._sizes = []
+        self._offsets = [0]
+        self.error = ""
+
+    # Prepared query for this SQL, reused while it stays among the most
+    # recently used `max_statements`
+    def _prepare(self, sql):
+        query = self._statements.get(sql)
+        if query is not None:
+            self._statements.move_to_end(sql)
+            return query
+        query = QSqlQuery(self.database)
+        query.setForwardOnly(True)
+        if not query.prepare(sql):
+            self.error = query.lastError().text()
+            return None
+        self._statements[sql] = query
+        while len(self._statements) > self.max_statements:
+            self._statements.popitem(last=False)
+        return query
+
+    def _exec(self, sql, binds):
+        query = self._prepare(sql)
+        if query is None:
+            return None
+        for position, value in enumerate(binds):
+            query.bindValue(position, value)
+        with span("history.query", sql, binds):
+            ok = query.exec_()
+        if not ok:
+            self.error = query.lastError().text()
+            query.finish()
+            return None
+        return query
+
+    # Drop the prepared queries (before the connection is closed)
+    def clear_statements(self):
+        for query in self._statements.values():
+            query.finish()
+        self._statements.clear()
+
+    # Page another database (a different profile) with the same filter
+    def set_database(self, database):
+        self.clear_statements()
+        self.database = database
+        return self.refresh()
+
+    def _count(self):
+        sql = "SELECT COUNT(*) FROM fitness"
+        if self._join:
+            sql += " " + self._join
+        if self._where:
+            sql += " WHERE " + self._where
+        return self._scalar(sql, self._binds)
+
+    def _scalar(self, sql, binds):
+        query = self._exec(sql, binds)
+        if query is None:
+            return 0
+        value = query.value(0) if query.next() else 0
+        query.finish()
+        return value
+
+    # SELECT over the filtered rows with extra conditions
+    def _select(self, conditions, binds):
+        conditions = list(conditions)
+        binds = list(self._binds) + list(binds)
+        if self._where:
+            conditions.insert(0, "(" + self._where + ")")
+        sql = "SELECT " + ", ".join("fitness." + c for c in COLUMNS) + " FROM fitness"
+        if self._join:
+            sql += " " + self._join
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return sql, binds
+
+    def _rows(self, sql, binds):
+        rows = []
+        query = self._exec(sql, binds)
+        if query is not None:
+            with span("history.rows"):
+                while query.next():
+                    rows.append(tuple(query.value(i) for i in range(len(COLUMNS))))
+            query.finish()
+        return rows
+
+    # Keyset conditions for rows at or below / strictly above a (date, id) key
+    @staticmethod
+    def _at_or_below(key):
+        return (f"({SORT_DATE} < ? OR ({SORT_DATE} = ? AND fitness.id <= ?))",
+                [key[0], key[0], key[1]])
+
+    @staticmethod
+    def _above(key):
+        return (f"({SORT_DATE} > ? OR ({SORT_DATE} = ? AND fitness.id > ?))",
+                [key[0], key[0], key[1]])
+
+    def _range_conditions(self, chunk):
+        conditions = []
+        binds = []
+        for bound, condition in ((self._bounds[chunk], self._at_or_below),
+                                 (self._upper_bound(chunk), self._above)):
+            if bound is not None:
+                sql, values = condition(bound)
+                conditions.append(sql)
+                binds.extend(values)
+        return conditions, binds
+
+    # bounds[c + 1], or None when chunk c runs to the end of the results
+    def _upper_bound(self, chunk):
+        return self._bounds[chunk + 1] if chunk + 1 < len(self._bounds) else None
+
+    # Read the next, not yet seen chunk (one extra row gives the next bound)
+    def _discover_chunk(self):
+        chunk = len(self._sizes)
+        if self._order:
+            sql, binds = self._select([], [])
+            sql += " ORDER BY " + self._order + ", fitness.id DESC LIMIT ? OFFSET ?"
+            rows = self._rows(sql, binds + [self.chunk_size, self._loaded])
+        else:
+            start = self._bounds[chunk]
+            conditions, values = self._at_or_below(start) if start is not None else ("", [])
+            sql, binds = self._select([conditions] if conditions else [], values)
+            sql += f" ORDER BY {SORT_DATE} DESC, fitness.id DESC LIMIT ?"
+            rows = self._rows(sql, binds + [self.chunk_size + 1])
+            if len(rows) > self.chunk_size:
+                extra = rows.pop()
+                self._bounds.append(_key(extra))
+        self._sizes.append(len(rows))
+        self._offsets.append(self._offsets[-1] + len(rows))
+        self._store(chunk, rows)
+        return rows
+
+    # Read back an evicted chunk
+    def _load_chunk(self, chunk):
+        if self._order:
+            sql, binds = self._select([], [])
+            sql += " ORDER BY " + self._order + ", fitness.id DESC LIMIT ? OFFSET ?"
+            binds += [self._sizes[chunk], self._offsets[chunk]]
+        else:
+            conditions, values = self._range_conditions(chunk)
+            sql, binds = self._select(conditions, values)
+            sql += f" ORDER BY {SORT_DATE} DESC, fitness.id DESC"
+        rows = self._rows(sql, binds)[:self._sizes[chunk]]
+        self._store(chunk, rows)
+        return rows
+
+    def _store(self, chunk, rows):
+        self._chunks[chunk] = rows
+        self._chunks.move_to_end(chunk)
+        while len(self._chunks) > self.max_chunks:
+            self._chunks.popitem(last=False)
+
+    # (chunk, offset in chunk) of a loaded row
+    def _locate(self, row):
+        chunk = bisect_right(self._offsets, row) - 1
+        return chunk, row - self._offsets[chunk]
+
+    def _row(self, row):
+        if not 0 <= row < self._loaded:
+            return None
+        chunk, offset = self._locate(row)
+        rows = self._chunks.get(chunk)
+        if rows is None:
+            rows = self._load_chunk(chunk)
+        else:
+            self._chunks.move_to_end(chunk)
+        if offset < len(rows):
+            return rows[offset]
+        return None
+
+    def _resize_chunk(self, chunk, delta):
+        self._sizes[chunk] += delta
+        for c in range(chunk + 1, len(self._offsets)):
+            self._offsets[c] += delta
+        self._loaded += delta
+        self._total += delta
+
+    # Row-level updates
+    # Add the workout with this id at its sorted position, if it matches the
+    # current filter. Under a relevance order the position is not known
+    # without re-ranking, so the results are re-read instead.
+    def insert_row(self, row_id):
+        if self._order:
+            return self.refresh()
+        sql, binds = self._select(["fitness.id = ?"], [row_id])
+        rows = self._rows(sql, binds)
+        if not rows:
+            return not self.error
+        record = rows[0]
+        key = _key(record)
+
+        chunk = self._chunk_for_key(key)
+        if chunk is None:
+            # Falls after everything loaded so far, fetchMore will reach it
+            self._total += 1
+            return True
+
+        cached = self._chunks.get(chunk)
+        if cached is not None:
+            offset = sum(1 for r in cached if _key(r) > key)
+        else:
+            offset = self._count_above(chunk, key)
+        row = self._offsets[chunk] + offset
+
+        self.beginInsertRows(QModelIndex(), row, row)
+        if cached is not None:
+            cached.insert(offset, record)
+        self._resize_chunk(chunk, 1)
+        self.endInsertRows()
+        return True
+
+    # Drop the workout with this id (call after deleting it)
+    # The row is looked up in the cached chunks; when it is not there (an
+    # evicted chunk or a row the view never loaded) the results are re-read.
+    def remove_row(self, row_id):
+        for chunk, rows in self._chunks.items():
+            for offset, record in enumerate(rows):
+                if record[0] == row_id:
+                    row = self._offsets[chunk] + offset
+                    self.beginRemoveRows(QModelIndex(), row, row)
+                    del rows[offset]
+                    self._resize_chunk(chunk, -1)
+                    self.endRemoveRows()
+                    return True
+        return self.refresh()
+
+    # Loaded chunk whose key range holds `key`, None if it lies past them
+    def _chunk_for_key(self, key):
+        if not self._sizes:
+            if self._total:
+                return None
+            # Empty results: start the first chunk
+            self._sizes.append(0)
+            self._offsets.append(0)
+            self._store(0, [])
+            return 0
+        for chunk in range(len(self._sizes)):
+            lower = self._upper_bound(chunk)
+            if lower is None or key > lower:
+                return chunk
+        return None
+
+    def _count_above(self, chunk, key):
+        conditions, binds = self._range_conditions(chunk)
+        above, values = self._above(key)
+        sql, binds = self._select(conditions + [above], binds + values)
+        return self._scalar("SELECT COUNT(*) FROM (" + sql + ")", binds)
+
+    # Public helpers
+    def row_id(self, row):
+        record = self._row(row)
+        return record[0] if record else None
+
+    def total_rows(self):
+        return self._total
+
+    def cached_rows(self):
+        return sum(len(rows) for rows in self._chunks.values())
+
+    # Qt model interface
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(COLUMNS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._loaded < self._total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        remaining = self._total - self._loaded
+        if remaining <= 0:
+            return
+        rows = self._discover_chunk()
+        if not rows:
+            # Table shrank behind our back
+            self._total = self._loaded
+            return
+        with span("history.insert_rows"):
+            self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + len(rows) - 1)
+            self._loaded += len(rows)
+            self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return QVariant()
+        record = self._row(index.row())
+        if record is None:
+            return QVariant()
+        value = record[index.column()]
+        if index.column() == len(COLUMNS) - 1:
+            return value
+        return str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return QVariant()
+        if orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return str(section + 1)
+
+
+# Sort key of a row in the default order: (date, id), NULL dates sort as ''
+def _key(record):
+    return (record[1] or "", record[0])
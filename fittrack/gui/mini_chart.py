@@ -0,0 +1,106 @@
+import matplotlib
+import numpy as np
+
+from fittrack.instrument import span
+
+
+# Stats tab "last 7 days" calories chart with persistent artists
+#
+# One bar per calendar day from the cutoff to today (the height is the day's
+# largest workout, which is what overlapping per-workout bars looked like).
+# The figure, axes and bars are built once and then updated in place:
+# - only the heights changed and the y range still fits: the bars are
+#   blitted over the saved background, nothing else is drawn
+# - the y range changed: a full draw, plus tight_layout only when the
+#   y tick labels are different
+# - the days, the theme or the empty/non-empty state changed: rebuild.
+# Bars are animated artists, so every full draw (including resizes) saves
+# the background without them and then draws them on top.
+class MiniChart:
+    def __init__(self, figure, canvas):
+        self.figure = figure
+        self.canvas = canvas
+        self.ax = None
+        self.bars = []
+        self.days = None
+        self.theme = None
+        self.background = None
+        self.ytick_labels = None
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    # dates/calories: one entry per workout; days: the calendar days shown
+    def update(self, dates, calories, days, theme):
+        heights = np.zeros(len(days))
+        if len(dates):
+            np.maximum.at(heights, (dates - days[0]).astype(np.int64), calories)
+
+        empty = not len(dates)
+        if (self.ax is None or theme != self.theme or empty != (not self.bars)
+                or self.days is None or not np.array_equal(days, self.days)):
+            self._build(days, heights, empty, theme)
+            return
+
+        with span("mini_chart.set_height"):
+            for bar, height in zip(self.bars, heights):
+                bar.set_height(height)
+        top = _top(heights)
+        if top == self.ax.get_ylim()[1] and self.background is not None:
+            with span("mini_chart.blit"):
+                self._blit()
+            return
+
+        self.ax.set_ylim(0, top)
+        self._layout()
+        with span("mini_chart.canvas_draw"):
+            self.canvas.draw()
+
+    def _build(self, days, heights, empty, theme):
+        self.days = days
+        self.theme = theme
+        self.ytick_labels = None
+        self.background = None
+        self.figure.clear()
+        # The figure outlives style changes, so take the current background
+        self.figure.set_facecolor(matplotlib.rcParams['figure.facecolor'])
+        self.ax = self.figure.add_subplot(111)
+        self.bars = []
+        if empty:
+            self.ax.text(0.5, 0.5, "No data for last 7 days", ha='center', va='center')
+            self.ax.set_axis_off()
+        else:
+            with span("mini_chart.draw"):
+                self.bars = list(self.ax.bar(days, heights, color='#4CAF50', animated=True))
+                self.ax.set_ylim(0, _top(heights))
+                self.ax.set_title("Calories - Last 7 Days")
+                self.ax.tick_params(axis='x', labelrotation=45)
+            self._layout()
+        with span("mini_chart.canvas_draw"):
+            self.canvas.draw()
+
+    # tight_layout, unless the tick labels are the same as last time
+    def _layout(self):
+        labels = self.ax.yaxis.get_major_formatter().format_ticks(self.ax.get_yticks())
+        if labels == self.ytick_labels:
+            return
+        self.ytick_labels = labels
+        with span("mini_chart.tight_layout"):
+            self.figure.tight_layout()
+
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_bars()
+
+    def _draw_bars(self):
+        for bar in self.bars:
+            self.figure.draw_artist(bar)
+
+    def _blit(self):
+        self.canvas.restore_region(self.background)
+        self._draw_bars()
+        self.canvas.blit(self.figure.bbox)
+
+
+# Top of the y axis for these bar heights (matplotlib's 5% margin)
+def _top(heights):
+    highest = float(heights.max()) if len(heights) else 0.0
+    return highest * 1.05 if highest > 0 else 1.0
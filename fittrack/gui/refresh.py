@@ -0,0 +1,64 @@
+from PyQt5.QtCore import QObject, QTimer
+
+
+# Coalescing refresh scheduler
+#
+# Mutations call invalidate() to mark views dirty instead of reloading them
+# on the spot. The refresh itself runs from a zero-timeout timer, i.e. once
+# control is back in the event loop, so however many times a view is
+# invalidated during one event-loop turn it is refreshed at most once.
+# Views that are not visible stay dirty and are refreshed when they are
+# shown (call schedule() when visibility may have changed).
+class RefreshScheduler(QObject):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._views = {}
+        self._dirty = set()
+        self.requested = {}
+        self.performed = {}
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self.flush)
+
+    # refresh() reloads the view, is_visible() says whether anyone can see it
+    def register(self, name, refresh, is_visible=None):
+        self._views[name] = (refresh, is_visible)
+        self.requested[name] = 0
+        self.performed[name] = 0
+
+    def invalidate(self, *names):
+        for name in names:
+            if name not in self._views:
+                raise KeyError(f"Unknown view: {name}")
+            self.requested[name] += 1
+            self._dirty.add(name)
+        self.schedule()
+
+    def schedule(self):
+        if self._dirty and not self._timer.isActive():
+            self._timer.start()
+
+    def is_dirty(self, name):
+        return name in self._dirty
+
+    # Refresh every dirty, visible view once (in registration order)
+    def flush(self):
+        for name, (refresh, is_visible) in self._views.items():
+            if name not in self._dirty:
+                continue
+            if is_visible is not None and not is_visible():
+                continue
+            self._dirty.discard(name)
+            self.performed[name] += 1
+            refresh()
+
+    def stats(self):
+        return {name: {"requested": self.requested[name],
+                       "performed": self.performed[name],
+                       "dirty": name in self._dirty}
+                for name in self._views}
+
+    def summary(self):
+        return ", ".join(f"{name}: {s['requested']} requested / {s['performed']} performed"
+                         for name, s in self.stats().items())
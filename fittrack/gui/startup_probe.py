@@ -0,0 +1,38 @@
+import json
+import sys
+import time
+
+from PyQt5.QtCore import QEvent, QObject, QTimer
+
+# Startup timing for `main.py --startup-probe` (run by fittrack/startup.py)
+#
+# Records when the window gets its first paint event and when the event
+# loop next goes idle after that (the window reacts to input from then on),
+# prints both as one JSON line and quits. Times are time.time() values so
+# the parent process can subtract its own launch time.
+
+
+class StartupProbe(QObject):
+    def __init__(self, window, app):
+        super().__init__(window)
+        self.window = window
+        self.app = app
+        self.first_paint = None
+        window.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and self.first_paint is None:
+            self.first_paint = time.time()
+            # Zero-timeout timers run once pending events are processed
+            QTimer.singleShot(0, self.interactive)
+        return False
+
+    def interactive(self):
+        report = {
+            "first_paint": self.first_paint,
+            "interactive": time.time(),
+            "matplotlib_loaded": "matplotlib" in sys.modules,
+            "numpy_loaded": "numpy" in sys.modules,
+        }
+        print(json.dumps(report), flush=True)
+        self.app.quit()
@@ -0,0 +1,166 @@
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+from fittrack.connections import thread_connection
+from fittrack.exporter import export_file
+from fittrack.importer import import_file
+from fittrack.instrument import span
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# Signals a job uses to report back to the GUI thread
+# Every signal carries the job id so stale results can be told apart.
+class JobSignals(QObject):
+    progress = pyqtSignal(int, str)
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+    done = pyqtSignal(int)
+
+
+# Base class for work run on a QThreadPool
+#
+# Subclasses implement work(); they call check() between stages so a
+# cancelled job stops early. A cancelled job never emits finished, but every
+# job emits done last; the owner must keep the job referenced until then.
+class Job(QRunnable):
+    def __init__(self, job_id):
+        super().__init__()
+        self.job_id = job_id
+        self.signals = JobSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def check(self, stage=None):
+        if self._cancelled.is_set():
+            raise JobCancelled()
+        if stage:
+            self.signals.progress.emit(self.job_id, stage)
+
+    def run(self):
+        try:
+            result = self.work()
+            self.check()
+            self.signals.finished.emit(self.job_id, result)
+        except JobCancelled:
+            pass
+        except Exception as e:
+            if not self.is_cancelled():
+                self.signals.failed.emit(self.job_id, str(e))
+        finally:
+            self.signals.done.emit(self.job_id)
+
+    def work(self):
+        raise NotImplementedError
+
+
+# Load the data for a chart and render it to an RGBA image
+# options are passed to charts.render_chart (e.g. hexbin_threshold).
+class ChartJob(Job):
+    def __init__(self, job_id, db_path, chart_type, time_range, width, height, dpi=100,
+                 options=None):
+        super().__init__(job_id)
+        self.db_path = db_path
+        self.chart_type = chart_type
+        self.time_range = time_range
+        self.width = width
+        self.height = height
+        self.dpi = dpi
+        self.options = options or {}
+
+    def work(self):
+        # matplotlib is loaded on first use, see FitTrack.load_matplotlib
+        from fittrack.charts import load_chart_data, render_chart
+        self.check("Loading data...")
+        conn = thread_connection(self.db_path)
+        with span("chart.load"):
+            data = load_chart_data(conn, self.chart_type, self.time_range)
+        self.check("Rendering chart...")
+        with span("chart.render"):
+            return render_chart(data, self.chart_type, self.width, self.height, self.dpi,
+                                **self.options)
+
+
+# Bulk-import a CSV / JSON Lines / Parquet file
+# Batches are committed as they go, so after a cancel or an error the rows
+# imported so far stay in the database; the owner refreshes on done.
+class ImportJob(Job):
+    def __init__(self, job_id, db_path, path):
+        super().__init__(job_id)
+        self.db_path = db_path
+        self.path = path
+
+    def work(self):
+        self.check("Importing...")
+        return import_file(self.db_path, self.path, progress=self.report,
+                           cancelled=self.is_cancelled)
+
+    def report(self, rows):
+        self.signals.progress.emit(self.job_id, f"Imported {rows:,} rows...")
+
+
+# Export the fitness table (or one time range of it) to a file
+class ExportJob(Job):
+    def __init__(self, job_id, db_path, path, time_range):
+        super().__init__(job_id)
+        self.db_path = db_path
+        self.path = path
+        self.time_range = time_range
+
+    def work(self):
+        self.check("Exporting...")
+        return export_file(self.db_path, self.path, time_range=self.time_range,
+                           progress=self.report)
+
+    def report(self, rows):
+        self.check(f"Exported {rows:,} rows...")
+
+
+# Stream a recorded wearable sample file into the database
+# The pipeline runs its own asyncio loop on this pool thread; batches are
+# committed as they go, like ImportJob.
+class SampleReplayJob(Job):
+    def __init__(self, job_id, db_path, path, rate=None):
+        super().__init__(job_id)
+        self.db_path = db_path
+        self.path = path
+        self.rate = rate
+
+    def work(self):
+        # asyncio is only loaded when samples are streamed
+        from fittrack.ingest import replay_file
+        self.check("Streaming samples...")
+        return replay_file(self.db_path, self.path, self.rate, progress=self.report,
+                           cancelled=self.is_cancelled)
+
+    def report(self, result):
+        self.signals.progress.emit(self.job_id, f"Stored {result.samples:,} samples...")
+
+
+# Train the coaching model if enough workouts were added, then load it
+# scikit-learn is imported here, on the pool thread, so the GUI thread
+# only ever predicts with a model that is already loaded.
+class CoachJob(Job):
+    def __init__(self, job_id, db_path, min_new_rows=None):
+        super().__init__(job_id)
+        self.db_path = db_path
+        self.min_new_rows = min_new_rows
+
+    def work(self):
+        from fittrack.coach import MIN_NEW_ROWS, load_model, train
+        self.check("Training coach...")
+        result = train(self.db_path, self.min_new_rows or MIN_NEW_ROWS, progress=self.report,
+                       cancelled=self.is_cancelled)
+        self.check()
+        return result, load_model(self.db_path)
+
+    def report(self, epoch, epochs):
+        self.signals.progress.emit(self.job_id, f"Training coach ({epoch}/{epochs})...")
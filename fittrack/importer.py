@@ -0,0 +1,230 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from fittrack.connections import connect
+from fittrack.migrations import bump_data_version, migrate
+from fittrack.rollups import ROLLUP_INSERT_TRIGGERS
+from fittrack.rollups import add_new_rows as add_rollup_rows
+from fittrack.search import FTS_INSERT_TRIGGER, index_new_rows
+from fittrack.summary import SUMMARY_INSERT_TRIGGER
+from fittrack.summary import add_new_rows as add_summary_rows
+from fittrack.training_load import TRAINING_LOAD_INSERT_TRIGGER
+from fittrack.training_load import mark_new_rows as mark_training_load
+from fittrack.workouts import INSERT_SQL, RowError, parse_record
+
+# Bulk import of workouts from CSV, JSON Lines or Parquet
+#
+# Records are streamed from the file and written in batches. Each batch is
+# one transaction with a single prepared INSERT run through executemany.
+# Per-row insert triggers are the expensive part of a large import, so for
+# the triggers listed in BULK_INSERT_HANDLERS the batch drops them, inserts,
+# applies the same change once for the whole batch with set-based SQL, and
+# recreates them. All of that happens inside the batch's transaction, so
+# other connections never see the table without its triggers. Unknown
+# insert triggers are left alone and fire per row as usual.
+
+DEFAULT_BATCH_SIZE = 50000
+
+# Connection settings for the import: a 64 MB page cache keeps the index
+# pages being updated in memory, temp b-trees (GROUP BY) stay off disk
+IMPORT_PRAGMAS = ("PRAGMA cache_size = -65536", "PRAGMA temp_store = MEMORY")
+
+# Insert triggers replaced per batch -> what to run instead (None: the
+# INSERT already writes the value, e.g. epoch_day)
+BULK_INSERT_HANDLERS = [
+    (("fitness_epoch_day_insert",), None),
+    ((FTS_INSERT_TRIGGER,), index_new_rows),
+    ((SUMMARY_INSERT_TRIGGER,), add_summary_rows),
+    (ROLLUP_INSERT_TRIGGERS, add_rollup_rows),
+    (("fitness_version_insert",), lambda conn, after_id: bump_data_version(conn)),
+    ((TRAINING_LOAD_INSERT_TRIGGER,), mark_training_load),
+]
+
+MAX_ERRORS = 20
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = 0
+        self.skipped = 0
+        self.errors = []
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        text = (f"imported {self.rows} rows in {self.seconds:.2f} s "
+                f"({self.rows_per_second:,.0f} rows/s)")
+        if self.skipped:
+            text += f", skipped {self.skipped} invalid rows"
+        return text
+
+
+# Readers (each yields one dict per record, or a RowError for a record that
+# cannot be read; import_file counts those as skipped rows)
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        rows = csv.reader(f)
+        header = [name.strip() for name in next(rows, [])]
+        for row in rows:
+            if row:
+                yield dict(zip(header, row))
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield RowError(f"line {number}: invalid JSON ({e.msg})")
+                continue
+            if not isinstance(record, dict):
+                yield RowError(f"line {number}: not a JSON object")
+                continue
+            yield record
+
+
+def read_parquet(path, batch_size=DEFAULT_BATCH_SIZE):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet import needs the pyarrow package")
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        yield from batch.to_pylist()
+
+
+# Extension -> reader. Plain .json is not accepted: a JSON array cannot be
+# streamed record by record (use JSON Lines, or --format jsonl)
+READERS = {
+    ".csv": read_csv,
+    ".jsonl": read_jsonl,
+    ".ndjson": read_jsonl,
+    ".parquet": read_parquet,
+}
+
+
+def open_records(path, fmt=None):
+    ext = "." + fmt.lower().lstrip(".") if fmt else os.path.splitext(path)[1].lower()
+    reader = READERS.get(ext)
+    if reader is None:
+        raise ValueError(f"Unsupported import format: {ext or path}")
+    return reader(path)
+
+
+# Writing
+def _insert_triggers(conn):
+    return dict(conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'fitness'"))
+
+
+def write_batch(conn, rows):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        after_id = conn.execute("SELECT IFNULL(MAX(id), 0) FROM fitness").fetchone()[0]
+        existing = _insert_triggers(conn)
+
+        suspended = []
+        appliers = []
+        for names, apply in BULK_INSERT_HANDLERS:
+            present = [name for name in names if name in existing]
+            if not present:
+                continue
+            for name in present:
+                conn.execute(f"DROP TRIGGER {name}")
+                suspended.append(existing[name])
+            if apply is not None:
+                appliers.append(apply)
+
+        conn.executemany(INSERT_SQL, rows)
+        for apply in appliers:
+            apply(conn, after_id)
+        for sql in suspended:
+            conn.execute(sql)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+# Import one file into a database (path or autocommit sqlite3 connection)
+# progress(rows_imported) is called after each batch; cancelled() is checked
+# between batches, rows already committed stay imported.
+def import_file(database, path, fmt=None, batch_size=DEFAULT_BATCH_SIZE,
+                progress=None, cancelled=None):
+    if isinstance(database, sqlite3.Connection):
+        conn = database
+        owns_connection = False
+    else:
+        conn = connect(database, autocommit=True)
+        owns_connection = True
+
+    result = ImportResult()
+    start = time.perf_counter()
+    try:
+        migrate(conn)
+        for pragma in IMPORT_PRAGMAS:
+            conn.execute(pragma)
+        batch = []
+        for line, record in enumerate(open_records(path, fmt), start=1):
+            try:
+                if isinstance(record, RowError):
+                    raise record
+                batch.append(parse_record(record))
+            except RowError as e:
+                result.skipped += 1
+                if len(result.errors) < MAX_ERRORS:
+                    result.errors.append(f"record {line}: {e}")
+                continue
+            if len(batch) >= batch_size:
+                write_batch(conn, batch)
+                result.rows += len(batch)
+                batch = []
+                if progress:
+                    progress(result.rows)
+                if cancelled and cancelled():
+                    break
+        else:
+            if batch:
+                write_batch(conn, batch)
+                result.rows += len(batch)
+                if progress:
+                    progress(result.rows)
+    finally:
+        result.seconds = time.perf_counter() - start
+        if owns_connection:
+            conn.close()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import workouts into a FitTrack database")
+    parser.add_argument("files", nargs="+", help="CSV, JSON Lines or Parquet files")
+    parser.add_argument("--db", default="fitness.db", help="database file (default: fitness.db)")
+    parser.add_argument("--format", help="override the format detected from the file extension")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    status = 0
+    for path in args.files:
+        result = import_file(args.db, path, args.format, args.batch_size)
+        print(f"{path}: {result}")
+        for error in result.errors:
+            print(f"  {error}")
+        if result.skipped:
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+import argparse
+import asyncio
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fittrack.connections import connect
+from fittrack.migrations import migrate
+from fittrack.samples import write_samples
+
+# Streaming ingestion of wearable samples
+#
+#   python -m fittrack.ingest fitness.db --replay samples.csv [--rate 20000]
+#   python -m fittrack.ingest fitness.db --socket /tmp/fittrack.sock
+#   python -m fittrack.ingest fitness.db --port 7070
+#
+# Sources send one sample per line, "workout_id,t,heart_rate,body_temp,distance"
+# (t in seconds since the workout started, distance cumulative km, empty
+# fields for readings the device doesn't have). A local socket server
+# accepts any number of senders; --replay plays a recorded file back as a
+# stand-in for a device, optionally at a fixed rate.
+#
+# Readers parse what they receive into chunks and put them on a bounded
+# asyncio queue. One writer drains the queue into batches of batch_size
+# samples (or whatever arrived within flush_interval) and writes each batch
+# as one transaction (fittrack.samples.write_samples) on its own thread, so
+# the event loop keeps reading while SQLite works. When the writer falls
+# behind the queue fills up, put() waits, the readers stop reading and the
+# senders are held back by their socket buffers: backpressure instead of
+# unbounded memory.
+
+DEFAULT_BATCH_SIZE = 20000
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_FLUSH_INTERVAL = 0.25
+READ_SIZE = 64 * 1024
+REPLAY_CHUNK = 2000
+MAX_ERRORS = 20
+
+HEADER = "workout_id,t,heart_rate,body_temp,distance"
+
+
+class IngestResult:
+    def __init__(self):
+        self.samples = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.batches = 0
+        self.peak_queue = 0
+        self.errors = []
+        self.seconds = 0.0
+
+    @property
+    def samples_per_second(self):
+        return self.samples / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        text = (f"ingested {self.samples} samples in {self.batches} batches, "
+                f"{self.seconds:.2f} s ({self.samples_per_second:,.0f} samples/s)")
+        if self.dropped:
+            text += f", dropped {self.dropped} for unknown workouts"
+        if self.skipped:
+            text += f", skipped {self.skipped} invalid lines"
+        return text
+
+
+def _optional(cast, text):
+    text = text.strip()
+    return cast(text) if text else None
+
+
+# Parse sample lines; returns (samples, invalid lines)
+def parse_lines(lines):
+    samples = []
+    invalid = []
+    for line in lines:
+        line = line.strip()
+        if not line or line == HEADER:
+            continue
+        fields = line.split(",")
+        try:
+            if len(fields) != 5:
+                raise ValueError("expected 5 fields")
+            samples.append((int(fields[0]), int(fields[1]), _optional(int, fields[2]),
+                            _optional(float, fields[3]), _optional(float, fields[4])))
+        except ValueError as e:
+            invalid.append(f"{line[:60]!r}: {e}")
+    return samples, invalid
+
+
+class SamplePipeline:
+    # progress(result) is called after every batch (on the writer thread);
+    # cancelled() is checked between chunks, and stops the sources.
+    def __init__(self, db_path, batch_size=DEFAULT_BATCH_SIZE, queue_size=DEFAULT_QUEUE_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, progress=None, cancelled=None):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.progress = progress
+        self.cancelled = cancelled or (lambda: False)
+        self.queue = asyncio.Queue(queue_size)
+        self.result = IngestResult()
+        self._conn = None
+        # One thread owns the write connection
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="fittrack-ingest")
+        self._writer = None
+        self._error = None
+        self._start = None
+
+    async def start(self):
+        self._start = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._open)
+        self._writer = asyncio.create_task(self._write_loop())
+
+    # Flush what is queued and stop the writer (raises a write error)
+    async def close(self):
+        if self._writer is not None:
+            await self.queue.put(None)
+            await self._writer
+            self._writer = None
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._close)
+        self._executor.shutdown()
+        self.result.seconds = time.perf_counter() - self._start
+        if self._error is not None:
+            raise self._error
+        return self.result
+
+    # Queue parsed lines (waits while the queue is full)
+    async def feed(self, lines):
+        if self._error is not None:
+            raise self._error
+        samples, invalid = parse_lines(lines)
+        if invalid:
+            self.result.skipped += len(invalid)
+            room = MAX_ERRORS - len(self.result.errors)
+            self.result.errors.extend(invalid[:max(room, 0)])
+        if samples:
+            await self.queue.put(samples)
+            self.result.peak_queue = max(self.result.peak_queue, self.queue.qsize())
+
+    # Read lines from a stream until EOF (or until cancelled)
+    async def read_stream(self, reader):
+        pending = b""
+        while not self.cancelled():
+            data = await reader.read(READ_SIZE)
+            if not data:
+                break
+            data = pending + data
+            end = data.rfind(b"\n") + 1
+            pending = data[end:]
+            if end:
+                await self.feed(data[:end].decode("utf-8", "replace").splitlines())
+        if pending:
+            await self.feed([pending.decode("utf-8", "replace")])
+
+    # Play back a recorded file; rate limits it to that many samples/s
+    async def replay(self, path, rate=None):
+        start = time.perf_counter()
+        sent = 0
+        with open(path, encoding="utf-8") as f:
+            while not self.cancelled():
+                lines = [line for _, line in zip(range(REPLAY_CHUNK), f)]
+                if not lines:
+                    break
+                await self.feed(lines)
+                sent += len(lines)
+                if rate:
+                    ahead = sent / rate - (time.perf_counter() - start)
+                    if ahead > 0:
+                        await asyncio.sleep(ahead)
+
+    # Local socket server: a Unix socket at `path`, or TCP on host:port
+    async def serve(self, path=None, host="127.0.0.1", port=None):
+        async def handle(reader, writer):
+            try:
+                await self.read_stream(reader)
+            finally:
+                writer.close()
+
+        if path is not None:
+            return await asyncio.start_unix_server(handle, path=path)
+        return await asyncio.start_server(handle, host, port)
+
+    # Batch queued chunks and write them, one batch at a time
+    # After a failed write the queue is still drained (and discarded), so
+    # readers never wait on a writer that has stopped.
+    async def _write_loop(self):
+        loop = asyncio.get_running_loop()
+        batch = []
+        finished = False
+        while not finished:
+            try:
+                timeout = self.flush_interval if batch else None
+                chunk = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                chunk = []
+            if chunk is None:
+                finished = True
+            else:
+                batch.extend(chunk)
+            # Full batch, end of input, or nothing new within flush_interval
+            if batch and (len(batch) >= self.batch_size or finished or not chunk):
+                if self._error is None:
+                    try:
+                        await loop.run_in_executor(self._executor, self._write, batch)
+                    except Exception as e:
+                        self._error = e
+                batch = []
+
+    def _open(self):
+        self._conn = connect(self.db_path, autocommit=True)
+        migrate(self._conn)
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _write(self, batch):
+        written, dropped = write_samples(self._conn, batch)
+        self.result.samples += written
+        self.result.dropped += dropped
+        self.result.batches += 1
+        if self.progress:
+            self.progress(self.result)
+
+
+# Replay a file into a database (runs its own event loop)
+def replay_file(db_path, path, rate=None, batch_size=DEFAULT_BATCH_SIZE, progress=None,
+                cancelled=None):
+    async def run():
+        pipeline = SamplePipeline(db_path, batch_size, progress=progress, cancelled=cancelled)
+        await pipeline.start()
+        try:
+            await pipeline.replay(path, rate)
+        finally:
+            result = await pipeline.close()
+        return result
+    return asyncio.run(run())
+
+
+# Serve a local socket until `stop` (an asyncio.Event) is set, then flush
+async def serve_until(stop, db_path, path=None, port=None, batch_size=DEFAULT_BATCH_SIZE,
+                      progress=None):
+    pipeline = SamplePipeline(db_path, batch_size, progress=progress)
+    await pipeline.start()
+    try:
+        server = await pipeline.serve(path=path, port=port)
+        async with server:
+            await stop.wait()
+    finally:
+        result = await pipeline.close()
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest wearable samples into a FitTrack database")
+    parser.add_argument("db", help="FitTrack database file")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--replay", metavar="FILE", help="play back a recorded sample file")
+    source.add_argument("--socket", metavar="PATH", help="listen on a Unix socket")
+    source.add_argument("--port", type=int, help="listen on TCP 127.0.0.1:PORT")
+    parser.add_argument("--rate", type=float, help="replay at this many samples/s")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"samples per transaction (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--quiet", action="store_true", help="no per-batch progress")
+    args = parser.parse_args(argv)
+
+    def progress(result):
+        if not args.quiet:
+            print(f"\r{result.samples:,} samples", end="", file=sys.stderr, flush=True)
+
+    async def serve():
+        # Ctrl+C / SIGTERM stop listening and flush the last batch
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        return await serve_until(stop, args.db, args.socket, args.port, args.batch_size,
+                                 progress)
+
+    if args.replay:
+        result = replay_file(args.db, args.replay, args.rate, args.batch_size, progress)
+    else:
+        result = asyncio.run(serve())
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(result)
+    for error in result.errors:
+        print("  " + error, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Timing spans for the hot paths
+#
+#   with span("stats.read", sql, params):
+#       row = conn.execute(sql, params).fetchone()
+#
+# While instrumentation is off (the default) span() hands back one shared
+# do-nothing context manager, so a span costs a function call and a flag
+# check. Once enable() is called every span's duration goes into a latency
+# histogram for its name (count, total, max and a window of the most recent
+# samples for p50/p95), spans that carry SQL are kept in a short list of
+# recent queries (for EXPLAIN QUERY PLAN), and with a trace file each span
+# is also written out as one JSON line. Spans may be used from any thread.
+#
+# Span names are "<area>.<step>": query for SQL, rows for Python row loops,
+# sort/aggregate for NumPy work, draw/tight_layout/canvas_draw for
+# matplotlib and insert_rows/show for Qt.
+
+SAMPLE_WINDOW = 1024
+RECENT_QUERIES = 50
+
+_enabled = False
+_lock = threading.Lock()
+_histograms = {}
+_queries = deque(maxlen=RECENT_QUERIES)
+_trace = None
+
+
+class Histogram:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=SAMPLE_WINDOW)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    # Percentile (0-100) of the recent samples, nearest rank
+    def percentile(self, p):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def summary(self):
+        return {"count": self.count, "total": self.total, "p50": self.percentile(50),
+                "p95": self.percentile(95), "max": self.max}
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "sql", "params", "start")
+
+    def __init__(self, name, sql, params):
+        self.name = name
+        self.sql = sql
+        self.params = params
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, time.perf_counter() - self.start, self.sql, self.params)
+        return False
+
+
+def span(name, sql=None, params=()):
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, sql, params)
+
+
+def _record(name, seconds, sql, params):
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.add(seconds)
+        if sql is not None:
+            _queries.append({"name": name, "sql": sql, "params": list(params),
+                             "seconds": seconds, "time": time.time()})
+        if _trace is not None:
+            event = {"name": name, "ms": round(seconds * 1000, 3), "time": time.time(),
+                     "thread": threading.current_thread().name}
+            if sql is not None:
+                event["sql"] = " ".join(sql.split())
+            _trace.write(json.dumps(event) + "\n")
+
+
+# Switching on and off
+def enable(trace_path=None):
+    global _enabled, _trace
+    with _lock:
+        if trace_path and _trace is None:
+            _trace = open(trace_path, "a", encoding="utf-8", buffering=1)
+        _enabled = True
+
+
+def disable():
+    global _enabled, _trace
+    with _lock:
+        _enabled = False
+        if _trace is not None:
+            _trace.close()
+            _trace = None
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _queries.clear()
+
+
+# Reading the numbers
+# {span name: {"count", "total", "p50", "p95", "max"}}, times in seconds
+def snapshot():
+    with _lock:
+        return {name: h.summary() for name, h in _histograms.items()}
+
+
+# Most recent queries first
+def recent_queries():
+    with _lock:
+        return list(reversed(_queries))
+
+
+# EXPLAIN QUERY PLAN of a query as indented lines
+def explain(conn, sql, params=()):
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, list(params)).fetchall()
+    depth = {0: -1}
+    lines = []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node] + detail)
+    return lines
+
+
+# FITTRACK_TRACE=trace.jsonl switches tracing on for any entry point
+if os.environ.get("FITTRACK_TRACE"):
+    enable(os.environ["FITTRACK_TRACE"])
@@ -0,0 +1,250 @@
+import sqlite3
+import sys
+
+from fittrack.connections import connect
+from fittrack.rollups import create_rollups
+from fittrack.samples import create_samples
+from fittrack.search import create_fts_index, fts5_available
+from fittrack.summary import create_summary
+from fittrack.training_load import create_training_load
+
+# Schema migrations for fitness.db
+#
+# The applied version is stored in PRAGMA user_version. Each migration runs
+# in its own transaction together with the version bump, so a database is
+# never left half-upgraded and already applied steps are never re-run.
+
+# Days between 4713-11-24 BC (julian day 0) and 1970-01-01
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+
+# Workout columns a user can change (everything but id and derived epoch_day)
+DATA_COLUMNS = ("date", "calories", "distance", "heart_rate", "body_temp",
+                "age", "weight", "height", "bmi", "description")
+
+
+# 1: base table (what create_database used to do)
+def _create_fitness_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS fitness (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT,
+            calories REAL,
+            distance REAL,
+            heart_rate INTEGER,
+            body_temp REAL,
+            age INTEGER,
+            weight REAL,
+            height REAL,
+            bmi REAL,
+            description TEXT
+        )
+    """)
+
+
+# 2: index for range queries and ORDER BY date (rowid breaks ties)
+def _add_date_index(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_fitness_date ON fitness(date)")
+
+
+# 3: integer day number (days since 1970-01-01) kept in sync with the TEXT date
+def _add_epoch_day(conn):
+    epoch_day = f"CAST(julianday(NEW.date) - {UNIX_EPOCH_JULIAN_DAY} AS INTEGER)"
+
+    conn.execute("ALTER TABLE fitness ADD COLUMN epoch_day INTEGER")
+    conn.execute(f"""
+        UPDATE fitness
+        SET epoch_day = CAST(julianday(date) - {UNIX_EPOCH_JULIAN_DAY} AS INTEGER)
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_fitness_epoch_day ON fitness(epoch_day)")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS fitness_epoch_day_insert
+        AFTER INSERT ON fitness
+        BEGIN
+            UPDATE fitness SET epoch_day = {epoch_day} WHERE id = NEW.id;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS fitness_epoch_day_update
+        AFTER UPDATE OF date ON fitness
+        BEGIN
+            UPDATE fitness SET epoch_day = {epoch_day} WHERE id = NEW.id;
+        END
+    """)
+
+
+# 4: FTS5 index over description (skipped when FTS5 is not compiled in,
+# search then keeps using LIKE)
+def _add_description_fts(conn):
+    if fts5_available(conn):
+        create_fts_index(conn)
+
+
+# 5: trigger-maintained totals for the Stats tab
+def _add_summary(conn):
+    create_summary(conn)
+
+
+# 6: daily / ISO-week / monthly rollups for aggregate charts
+def _add_rollups(conn):
+    create_rollups(conn)
+
+
+# 7: counter bumped by every change to fitness (cache invalidation key)
+def _add_data_version(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS fitness_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO fitness_version(id) VALUES (1)")
+    for event in ("INSERT", "DELETE", "UPDATE"):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS fitness_version_{event.lower()}
+            AFTER {event} ON fitness
+            BEGIN
+                UPDATE fitness_version SET version = version + 1 WHERE id = 1;
+            END
+        """)
+
+
+# 8: per-second wearable samples of a workout
+def _add_samples(conn):
+    create_samples(conn)
+
+
+# 9: EWMA acute/chronic training load per day
+def _add_training_load(conn):
+    create_training_load(conn)
+
+
+# 10: deletes counted on their own, so whatever remembers the rows it has
+# seen (the coach model) can tell some are gone without comparing counts
+def _add_delete_count(conn):
+    conn.execute("ALTER TABLE fitness_version ADD COLUMN deletes INTEGER NOT NULL DEFAULT 0")
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS fitness_version_deletes
+        AFTER DELETE ON fitness
+        BEGIN
+            UPDATE fitness_version SET deletes = deletes + 1 WHERE id = 1;
+        END
+    """)
+
+
+# 11: index the history view's sort key, so NULL dates page without a sort
+def _add_date_key_index(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_fitness_date_key ON fitness(IFNULL(date, ''))")
+
+
+# 12: only write epoch_day when it changes, and only count data changes
+# Before this the insert trigger always rewrote epoch_day, and that UPDATE
+# fired fitness_version_update, so every insert bumped the version twice.
+def _limit_update_triggers(conn):
+    epoch_day = f"CAST(julianday(NEW.date) - {UNIX_EPOCH_JULIAN_DAY} AS INTEGER)"
+
+    for name, event in (("fitness_epoch_day_insert", "INSERT"),
+                        ("fitness_epoch_day_update", "UPDATE OF date")):
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        conn.execute(f"""
+            CREATE TRIGGER {name}
+            AFTER {event} ON fitness
+            WHEN NEW.epoch_day IS NOT {epoch_day}
+            BEGIN
+                UPDATE fitness SET epoch_day = {epoch_day} WHERE id = NEW.id;
+            END
+        """)
+
+    conn.execute("DROP TRIGGER IF EXISTS fitness_version_update")
+    conn.execute(f"""
+        CREATE TRIGGER fitness_version_update
+        AFTER UPDATE OF {", ".join(DATA_COLUMNS)} ON fitness
+        BEGIN
+            UPDATE fitness_version SET version = version + 1 WHERE id = 1;
+        END
+    """)
+
+
+# Ordered list of (version, description, function)
+MIGRATIONS = [
+    (1, "create fitness table", _create_fitness_table),
+    (2, "index fitness.date", _add_date_index),
+    (3, "add fitness.epoch_day", _add_epoch_day),
+    (4, "full-text index on fitness.description", _add_description_fts),
+    (5, "fitness_summary aggregates", _add_summary),
+    (6, "calendar rollup tables", _add_rollups),
+    (7, "fitness_version change counter", _add_data_version),
+    (8, "wearable samples table", _add_samples),
+    (9, "training load table", _add_training_load),
+    (10, "fitness_version delete counter", _add_delete_count),
+    (11, "index fitness sort date", _add_date_key_index),
+    (12, "skip no-op epoch_day and version updates", _limit_update_triggers),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+# Changes whenever a workout is inserted, updated or deleted
+def data_version(conn):
+    row = conn.execute("SELECT version FROM fitness_version WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+# Changes whenever a workout is deleted
+def delete_count(conn):
+    row = conn.execute("SELECT deletes FROM fitness_version WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+def bump_data_version(conn):
+    conn.execute("UPDATE fitness_version SET version = version + 1 WHERE id = 1")
+
+
+# Apply every migration newer than the stored version
+# Returns the list of versions that were applied (empty when up to date).
+# A connection passed in must be in autocommit mode (isolation_level=None).
+def migrate(database):
+    if isinstance(database, sqlite3.Connection):
+        conn = database
+        owns_connection = False
+    else:
+        conn = connect(database, autocommit=True)
+        owns_connection = True
+
+    applied = []
+    try:
+        current = schema_version(conn)
+        if current > LATEST_VERSION:
+            raise RuntimeError(
+                f"Database schema version {current} is newer than this FitTrack "
+                f"build supports ({LATEST_VERSION})")
+
+        for version, description, upgrade in MIGRATIONS:
+            if version <= current:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                upgrade(conn)
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            applied.append(version)
+    finally:
+        if owns_connection:
+            conn.close()
+
+    return applied
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "fitness.db"
+    done = migrate(path)
+    if done:
+        print(f"{path}: applied migrations {', '.join(map(str, done))}")
+    else:
+        print(f"{path}: schema is up to date (version {LATEST_VERSION})")
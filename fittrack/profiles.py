@@ -0,0 +1,77 @@
+import os
+import re
+
+from fittrack.migrations import migrate
+from fittrack.repository import WorkoutRepository
+
+# Workout profiles, one SQLite shard each
+#
+# A profile directory holds one database per person, <root>/<name>.db, each
+# with the full schema (summary, rollups, search index). Nothing is shared
+# between shards, so a profile's queries only ever touch its own rows and a
+# shard opens through the same WorkoutRepository as a single fitness.db.
+# The GUI and the CLI resolve a profile name to its path and carry on as
+# before; cohort analytics (fittrack.cohort) read many shards at once.
+
+DEFAULT_ROOT = "profiles"
+DEFAULT_PROFILE = "default"
+SHARD_SUFFIX = ".db"
+
+# Letters, digits, "_", "-" and "." (not first), so a name is a safe file name
+_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,63}")
+
+
+class ProfileStore:
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+
+    # Shard file of a profile (which may not exist yet)
+    def path(self, name):
+        if not _NAME.fullmatch(name or "") or name.endswith(SHARD_SUFFIX):
+            raise ValueError(f"Invalid profile name: {name!r}")
+        return os.path.join(self.root, name + SHARD_SUFFIX)
+
+    def exists(self, name):
+        return os.path.exists(self.path(name))
+
+    # Profile names, sorted
+    def names(self):
+        if not os.path.isdir(self.root):
+            return []
+        names = []
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                name = entry.name[:-len(SHARD_SUFFIX)]
+                if (entry.name.endswith(SHARD_SUFFIX) and entry.is_file()
+                        and _NAME.fullmatch(name)):
+                    names.append(name)
+        return sorted(names)
+
+    # Shard paths of every profile, in name order
+    def paths(self):
+        return [self.path(name) for name in self.names()]
+
+    # Create an empty shard with the current schema and return its path
+    def create(self, name):
+        path = self.path(name)
+        if os.path.exists(path):
+            raise ValueError(f"Profile already exists: {name}")
+        os.makedirs(self.root, exist_ok=True)
+        migrate(path)
+        return path
+
+    def open(self, name, create=False):
+        if not self.exists(name):
+            if not create:
+                raise ValueError(f"Unknown profile: {name}")
+            self.create(name)
+        return WorkoutRepository(self.path(name))
+
+    # Delete a profile's shard (with its WAL files)
+    def delete(self, name):
+        path = self.path(name)
+        if not os.path.exists(path):
+            raise ValueError(f"Unknown profile: {name}")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
@@ -0,0 +1,109 @@
+import sqlite3
+from collections import namedtuple
+
+from fittrack.connections import connect
+from fittrack.instrument import span
+from fittrack.migrations import migrate
+from fittrack.search import FTS_TABLE, build_match_query
+from fittrack.stats import workout_stats
+from fittrack.workouts import INSERT_SQL, parse_record
+
+# Workout repository
+#
+# Qt-free access to one fitness.db: adding and deleting workouts, looking
+# them up, searching descriptions and reading the stats. The GUI, the CLI
+# and batch jobs all go through it. Opening a repository brings the schema
+# up to date, so triggers keep the summary, rollups and search index in
+# step with every change made here.
+
+WORKOUT_COLUMNS = ("id", "date", "calories", "distance", "heart_rate", "body_temp",
+                   "age", "weight", "height", "bmi", "description")
+
+Workout = namedtuple("Workout", WORKOUT_COLUMNS)
+
+DELETE_SQL = "DELETE FROM fitness WHERE id = ?"
+GET_SQL = f"SELECT {', '.join(WORKOUT_COLUMNS)} FROM fitness WHERE id = ?"
+
+# WHERE / JOIN / ORDER BY pieces for a description search
+SearchFilter = namedtuple("SearchFilter", "where binds join order")
+
+
+class WorkoutRepository:
+    def __init__(self, path):
+        self.path = path
+        # Autocommit: every statement is its own transaction
+        self.conn = connect(path, autocommit=True)
+        migrate(self.conn)
+        self.fts_enabled = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (FTS_TABLE,)).fetchone() is not None
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Add one workout and return its id
+    # Values are checked like imported records (raises workouts.RowError);
+    # the BMI is computed from weight and height.
+    def add_workout(self, date, calories, distance, heart_rate=None, body_temp=None,
+                    age=None, weight=None, height=None, description=""):
+        record = {"date": date, "calories": calories, "distance": distance,
+                  "heart_rate": heart_rate, "body_temp": body_temp, "age": age,
+                  "weight": weight, "height": height, "description": description}
+        values = parse_record(record)
+        with span("repo.add.query", INSERT_SQL, values):
+            return self.conn.execute(INSERT_SQL, values).lastrowid
+
+    # Returns False when no workout had that id
+    def delete_workout(self, workout_id):
+        with span("repo.delete.query", DELETE_SQL, (workout_id,)):
+            return self.conn.execute(DELETE_SQL, (workout_id,)).rowcount > 0
+
+    def get_workout(self, workout_id):
+        row = self.conn.execute(GET_SQL, (workout_id,)).fetchone()
+        return Workout(*row) if row else None
+
+    def stats(self):
+        return workout_stats(self.conn)
+
+    # Filter for a free-text search, None when the text is empty
+    # Prefix/multi-word full-text search ranked by relevance when the FTS5
+    # index exists, otherwise a LIKE scan.
+    def search_filter(self, text, full_text=True):
+        text = text.strip().lower()
+        if not text:
+            return None
+        match = build_match_query(text)
+        if full_text and self.fts_enabled and match:
+            return SearchFilter(f"{FTS_TABLE} MATCH ?", [match],
+                                f"JOIN {FTS_TABLE} ON {FTS_TABLE}.rowid = fitness.id",
+                                f"{FTS_TABLE}.rank")
+        return SearchFilter("lower(description) LIKE ?", [f"%{text}%"], "", "")
+
+    # Workouts whose description matches, best match (or newest) first
+    def search(self, text, limit=50):
+        search = self.search_filter(text)
+        if search is None:
+            return []
+        try:
+            return self._search(search, limit)
+        except sqlite3.OperationalError:
+            if not search.join:
+                raise
+            return self._search(self.search_filter(text, full_text=False), limit)
+
+    def _search(self, search, limit):
+        sql = f"SELECT {', '.join('fitness.' + c for c in WORKOUT_COLUMNS)} FROM fitness"
+        if search.join:
+            sql += " " + search.join
+        sql += " WHERE " + search.where
+        sql += " ORDER BY " + (search.order + ", " if search.order else "")
+        sql += "fitness.date DESC, fitness.id DESC LIMIT ?"
+        binds = search.binds + [limit]
+        with span("repo.search.query", sql, binds):
+            return [Workout(*row) for row in self.conn.execute(sql, binds)]
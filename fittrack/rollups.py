@@ -0,0 +1,233 @@
+from fittrack.instrument import span
+
+# Calendar rollups (daily, ISO week, month)
+#
+# Each rollup table holds one row per period with the workout count,
+# calories and distance totals and heart-rate sum/count/max. Triggers on
+# fitness keep them current, so weekly/monthly charts and "All Data" trends
+# read a few thousand period rows instead of every workout.
+#
+# A period is keyed by the epoch day (days since 1970-01-01) of its first
+# day: the date itself, the Monday of its ISO week, or the 1st of the month.
+# Keying weeks by their Monday keeps week 5 of 2024 and week 5 of 2025 apart.
+#
+# NumPy is only imported by the chart readers at the bottom, so migrations
+# and imports (and with them GUI startup) don't pay for it.
+
+# Level -> (table, SQLite date modifiers giving the first and last day)
+LEVELS = {
+    "daily": ("rollup_daily", (), ()),
+    "weekly": ("rollup_weekly", ("'weekday 0'", "'-6 days'"), ("'weekday 0'",)),
+    "monthly": ("rollup_monthly", ("'start of month'",), ("'start of month'", "'+1 month'", "'-1 day'")),
+}
+
+_EPOCH = 2440587.5
+
+ROLLUP_INSERT_TRIGGERS = tuple(f"{table}_insert" for table, _, _ in LEVELS.values())
+
+
+def _first_day(row_date, level):
+    modifiers = LEVELS[level][1]
+    return "date(" + ", ".join((row_date,) + modifiers) + ")"
+
+
+def _last_day(row_date, level):
+    modifiers = LEVELS[level][2]
+    return "date(" + ", ".join((row_date,) + modifiers) + ")"
+
+
+def _period_key(row_date, level):
+    return f"CAST(julianday({_first_day(row_date, level)}) - {_EPOCH} AS INTEGER)"
+
+
+def _add_row(level, row):
+    table = LEVELS[level][0]
+    return f"""
+            INSERT INTO {table}(period_start, workouts, calories, distance, hr_sum, hr_count, hr_max)
+            SELECT {_period_key(row + '.date', level)}, 1,
+                   IFNULL({row}.calories, 0), IFNULL({row}.distance, 0),
+                   IFNULL({row}.heart_rate, 0), {row}.heart_rate IS NOT NULL, {row}.heart_rate
+            WHERE date({row}.date) IS NOT NULL
+            ON CONFLICT(period_start) DO UPDATE SET
+                workouts = workouts + 1,
+                calories = calories + excluded.calories,
+                distance = distance + excluded.distance,
+                hr_sum = hr_sum + excluded.hr_sum,
+                hr_count = hr_count + excluded.hr_count,
+                hr_max = CASE
+                    WHEN excluded.hr_max IS NOT NULL AND (hr_max IS NULL OR excluded.hr_max > hr_max)
+                    THEN excluded.hr_max ELSE hr_max END;"""
+
+
+def _remove_row(level, row):
+    table = LEVELS[level][0]
+    key = _period_key(row + ".date", level)
+    return f"""
+            UPDATE {table} SET
+                workouts = workouts - 1,
+                calories = calories - IFNULL({row}.calories, 0),
+                distance = distance - IFNULL({row}.distance, 0),
+                hr_sum = hr_sum - IFNULL({row}.heart_rate, 0),
+                hr_count = hr_count - ({row}.heart_rate IS NOT NULL)
+            WHERE period_start = {key};
+            UPDATE {table}
+            SET hr_max = (SELECT MAX(heart_rate) FROM fitness
+                          WHERE date BETWEEN {_first_day(row + '.date', level)}
+                                         AND {_last_day(row + '.date', level)})
+            WHERE period_start = {key}
+              AND {row}.heart_rate IS NOT NULL AND {row}.heart_rate >= hr_max;
+            DELETE FROM {table} WHERE period_start = {key} AND workouts <= 0;"""
+
+
+def create_rollups(conn):
+    for level, (table, _, _) in LEVELS.items():
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                period_start INTEGER PRIMARY KEY,
+                workouts INTEGER NOT NULL,
+                calories REAL NOT NULL,
+                distance REAL NOT NULL,
+                hr_sum INTEGER NOT NULL,
+                hr_count INTEGER NOT NULL,
+                hr_max INTEGER
+            )
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_insert
+            AFTER INSERT ON fitness
+            BEGIN{_add_row(level, "NEW")}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_delete
+            AFTER DELETE ON fitness
+            BEGIN{_remove_row(level, "OLD")}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_update
+            AFTER UPDATE OF date, calories, distance, heart_rate ON fitness
+            BEGIN{_remove_row(level, "OLD")}{_add_row(level, "NEW")}
+            END
+        """)
+    rebuild_rollups(conn)
+
+
+def _recompute_query(level):
+    key = _period_key("date", level)
+    return f"""
+        SELECT {key} AS period_start, COUNT(*), IFNULL(SUM(calories), 0),
+               IFNULL(SUM(distance), 0), IFNULL(SUM(heart_rate), 0),
+               COUNT(heart_rate), MAX(heart_rate)
+        FROM fitness
+        WHERE date(date) IS NOT NULL
+        GROUP BY period_start
+    """
+
+
+# Recompute every rollup table from the raw rows
+def rebuild_rollups(conn):
+    for level, (table, _, _) in LEVELS.items():
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(f"""
+            INSERT INTO {table}(period_start, workouts, calories, distance, hr_sum, hr_count, hr_max)
+            {_recompute_query(level)}
+        """)
+
+
+# Fold rows with id > after_id into every level (bulk import path)
+def add_new_rows(conn, after_id):
+    for level, (table, _, _) in LEVELS.items():
+        key = _period_key("date", level)
+        conn.execute(f"""
+            INSERT INTO {table}(period_start, workouts, calories, distance, hr_sum, hr_count, hr_max)
+            SELECT {key} AS period_start, COUNT(*), IFNULL(SUM(calories), 0),
+                   IFNULL(SUM(distance), 0), IFNULL(SUM(heart_rate), 0),
+                   COUNT(heart_rate), MAX(heart_rate)
+            FROM fitness
+            WHERE id > ? AND date(date) IS NOT NULL
+            GROUP BY period_start
+            ON CONFLICT(period_start) DO UPDATE SET
+                workouts = workouts + excluded.workouts,
+                calories = calories + excluded.calories,
+                distance = distance + excluded.distance,
+                hr_sum = hr_sum + excluded.hr_sum,
+                hr_count = hr_count + excluded.hr_count,
+                hr_max = CASE
+                    WHEN excluded.hr_max IS NOT NULL AND (hr_max IS NULL OR excluded.hr_max > hr_max)
+                    THEN excluded.hr_max ELSE hr_max END
+        """, (after_id,))
+
+
+# Compare the stored rollups with a from-scratch recompute
+# Returns {level: number of periods that differ}, only for levels that drifted.
+def check_rollups(conn, tol=1e-6):
+    drift = {}
+    for level, (table, _, _) in LEVELS.items():
+        stored = {row[0]: row[1:] for row in conn.execute(
+            f"SELECT period_start, workouts, calories, distance, hr_sum, hr_count, hr_max FROM {table}")}
+        actual = {row[0]: row[1:] for row in conn.execute(_recompute_query(level))}
+        bad = 0
+        for key in stored.keys() | actual.keys():
+            have, want = stored.get(key), actual.get(key)
+            if have is None or want is None:
+                bad += 1
+            elif any((a is None) != (b is None) or (a is not None and abs(a - b) > tol * max(1, abs(b)))
+                     for a, b in zip(have, want)):
+                bad += 1
+        if bad:
+            drift[level] = bad
+    return drift
+
+
+# Rollup field -> (SQL expression, NumPy type name)
+ROLLUP_FIELDS = {
+    "workouts": ("workouts", "int64"),
+    "calories": ("calories", "float64"),
+    "distance": ("distance", "float64"),
+    "hr_mean": ("CASE WHEN hr_count > 0 THEN hr_sum * 1.0 / hr_count ELSE 0 END", "float64"),
+    "hr_max": ("IFNULL(hr_max, 0)", "int64"),
+    "hr_sum": ("hr_sum", "int64"),
+    "hr_count": ("hr_count", "int64"),
+}
+
+
+# Read one rollup level as NumPy arrays, oldest period first
+# `since` is a "yyyy-MM-dd" date; the period containing it is included.
+# `fields` limits the columns read (default: all of ROLLUP_FIELDS); the
+# "period" array is always returned.
+def fetch_rollup(conn, level, since=None, fields=None):
+    table = LEVELS[level][0]
+    fields = tuple(fields) if fields is not None else tuple(ROLLUP_FIELDS)
+    unknown = [f for f in fields if f not in ROLLUP_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown rollup field(s): {', '.join(unknown)}")
+    exprs = ["period_start"] + [ROLLUP_FIELDS[f][0] for f in fields]
+    sql = f"SELECT {', '.join(exprs)} FROM {table}"
+    params = []
+    if since:
+        sql += f" WHERE period_start >= {_period_key('?', level)}"
+        params.append(since)
+    sql += " ORDER BY period_start"
+
+    import numpy as np
+    dtype = np.dtype([("period", np.int64)] + [(f, ROLLUP_FIELDS[f][1]) for f in fields])
+    with span(f"rollup.{level}.query", sql, params):
+        table = np.fromiter(conn.execute(sql, params), dtype=dtype)
+    result = {name: np.ascontiguousarray(table[name]) for name in dtype.names}
+    result["period"] = result["period"].view("datetime64[D]")
+    return result
+
+
+# "2025-W05" style labels for weekly periods (ISO year of the Thursday)
+def iso_week_labels(periods):
+    import numpy as np
+    thursdays = periods + np.timedelta64(3, "D")
+    years = thursdays.astype("datetime64[Y]")
+    weeks = (thursdays - years.astype("datetime64[D]")).astype(np.int64) // 7 + 1
+    return [f"{y}-W{w:02d}" for y, w in zip(years.astype(np.int64) + 1970, weeks)]
+
+
+# "2025-03" style labels for monthly periods
+def month_labels(periods):
+    return [str(m) for m in periods.astype("datetime64[M]")]
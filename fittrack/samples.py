@@ -0,0 +1,95 @@
+# Wearable sensor samples
+#
+# The samples table holds raw per-second readings for a workout: heart
+# rate, body temperature and the cumulative distance, keyed by the workout
+# id and the second since its start (a resent reading replaces the old
+# one). Samples are written in batches; every batch also derives the
+# workout-level figures from all samples of the workouts it touched, in the
+# same transaction: heart_rate is the mean reading, distance the furthest
+# cumulative distance. The update goes through the fitness triggers, so the
+# summary, rollups and data version follow. Deleting a workout deletes its
+# samples.
+
+SAMPLES_TABLE = "samples"
+
+SAMPLE_COLUMNS = ("workout_id", "t", "heart_rate", "body_temp", "distance")
+
+INSERT_SAMPLE_SQL = f"""
+    INSERT OR REPLACE INTO {SAMPLES_TABLE}(workout_id, t, heart_rate, body_temp, distance)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+# Workout figures that follow its samples (kept when it has none of a kind)
+DERIVE_SQL = f"""
+    UPDATE fitness SET
+        heart_rate = IFNULL((SELECT CAST(ROUND(AVG(heart_rate)) AS INTEGER)
+                             FROM {SAMPLES_TABLE} WHERE workout_id = fitness.id), heart_rate),
+        distance = IFNULL((SELECT MAX(distance)
+                           FROM {SAMPLES_TABLE} WHERE workout_id = fitness.id), distance)
+    WHERE id = ?
+"""
+
+# SQLite's default limit on host parameters is 999 in older builds
+_ID_CHUNK = 500
+
+
+def create_samples(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SAMPLES_TABLE} (
+            workout_id INTEGER NOT NULL,
+            t INTEGER NOT NULL,
+            heart_rate INTEGER,
+            body_temp REAL,
+            distance REAL,
+            PRIMARY KEY (workout_id, t)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {SAMPLES_TABLE}_workout_delete
+        AFTER DELETE ON fitness
+        BEGIN
+            DELETE FROM {SAMPLES_TABLE} WHERE workout_id = OLD.id;
+        END
+    """)
+
+
+# Ids among `ids` that are workouts
+def existing_workouts(conn, ids):
+    ids = list(ids)
+    found = set()
+    for i in range(0, len(ids), _ID_CHUNK):
+        chunk = ids[i:i + _ID_CHUNK]
+        found.update(row[0] for row in conn.execute(
+            f"SELECT id FROM fitness WHERE id IN ({', '.join('?' * len(chunk))})", chunk))
+    return found
+
+
+# Recompute heart_rate and distance of these workouts from their samples
+def derive_workouts(conn, ids):
+    conn.executemany(DERIVE_SQL, [(i,) for i in ids])
+
+
+# Write one batch of (workout_id, t, heart_rate, body_temp, distance) tuples
+# in a single transaction on an autocommit connection. Samples of unknown
+# workouts are dropped; returns (written, dropped).
+def write_samples(conn, samples):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        known = existing_workouts(conn, {s[0] for s in samples})
+        kept = [s for s in samples if s[0] in known]
+        conn.executemany(INSERT_SAMPLE_SQL, kept)
+        derive_workouts(conn, sorted(known))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return len(kept), len(samples) - len(kept)
+
+
+# Samples of one workout as {column: list}, in time order
+def fetch_samples(conn, workout_id):
+    rows = conn.execute(
+        f"SELECT t, heart_rate, body_temp, distance FROM {SAMPLES_TABLE} "
+        f"WHERE workout_id = ? ORDER BY t", (workout_id,)).fetchall()
+    return {name: [row[i] for row in rows]
+            for i, name in enumerate(("t", "heart_rate", "body_temp", "distance"))}
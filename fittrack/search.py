@@ -0,0 +1,79 @@
+import re
+import sqlite3
+
+# Full-text search over fitness.description
+#
+# fitness_fts is an external-content FTS5 table (it stores only the index,
+# the text stays in fitness) maintained by triggers, see migrations.py.
+
+FTS_TABLE = "fitness_fts"
+
+FTS_INSERT_TRIGGER = "fitness_fts_insert"
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+# Whether this SQLite build has the FTS5 module compiled in
+def fts5_available(conn):
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp.fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+# Turn free text typed by the user into an FTS5 MATCH expression
+# Every word becomes a quoted prefix term and all terms must match, so
+# "morn run" finds "Morning run in the park". Returns None when the text
+# has no searchable words.
+def build_match_query(text):
+    terms = [f'"{token}"*' for token in _TOKEN.findall(text.lower())]
+    if not terms:
+        return None
+    return " ".join(terms)
+
+
+def create_fts_index(conn):
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            description,
+            content='fitness',
+            content_rowid='id',
+            prefix='2 3'
+        )
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_INSERT_TRIGGER}
+        AFTER INSERT ON fitness
+        BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, description) VALUES (NEW.id, NEW.description);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS fitness_fts_delete
+        AFTER DELETE ON fitness
+        BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description)
+            VALUES ('delete', OLD.id, OLD.description);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS fitness_fts_update
+        AFTER UPDATE OF description ON fitness
+        BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description)
+            VALUES ('delete', OLD.id, OLD.description);
+            INSERT INTO {FTS_TABLE}(rowid, description) VALUES (NEW.id, NEW.description);
+        END
+    """)
+    # Index the rows that already exist
+    conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+# Index rows with id > after_id in one statement (bulk import path)
+def index_new_rows(conn, after_id):
+    conn.execute(f"""
+        INSERT INTO {FTS_TABLE}(rowid, description)
+        SELECT id, description FROM fitness WHERE id > ?
+    """, (after_id,))
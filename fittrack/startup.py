@@ -0,0 +1,85 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Startup-time measurement
+#
+# Launches `main.py --startup-probe` several times in fresh processes on the
+# offscreen Qt platform, each against a copy of the database, and reports
+# the time from launch to the first paint of the window and to the first
+# idle event-loop turn after it (time to interactive).
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+# One launch: returns the probe's report with times relative to the launch
+def measure_once(workdir, eager_tabs=False, timeout=120):
+    args = [sys.executable, MAIN_SCRIPT, "--startup-probe"]
+    if eager_tabs:
+        args.append("--eager-tabs")
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+
+    launched = time.time()
+    output = subprocess.run(args, cwd=workdir, env=env, capture_output=True, text=True,
+                            timeout=timeout, check=True).stdout
+    for line in output.splitlines():
+        if line.startswith("{"):
+            report = json.loads(line)
+            break
+    else:
+        raise RuntimeError("main.py did not print a startup report")
+    report["first_paint"] -= launched
+    report["interactive"] -= launched
+    return report
+
+
+# Run `runs` launches against a copy of `database`
+def measure(database="fitness.db", runs=5, eager_tabs=False):
+    workdir = tempfile.mkdtemp(prefix="fittrack-startup-")
+    try:
+        if os.path.exists(database):
+            shutil.copy(database, os.path.join(workdir, "fitness.db"))
+        # The first launch migrates the copy and warms the OS file cache
+        measure_once(workdir, eager_tabs)
+        return [measure_once(workdir, eager_tabs) for _ in range(runs)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def summarize(reports):
+    summary = {}
+    for name in ("first_paint", "interactive"):
+        values = [r[name] for r in reports]
+        summary[name] = (statistics.median(values), min(values), max(values))
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure FitTrack startup time (offscreen)")
+    parser.add_argument("--db", default="fitness.db", help="database to copy (default: fitness.db)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--eager-tabs", action="store_true",
+                        help="also measure building every tab at startup")
+    args = parser.parse_args(argv)
+
+    modes = [("lazy tabs", False)] + ([("eager tabs", True)] if args.eager_tabs else [])
+    for label, eager in modes:
+        reports = measure(args.db, args.runs, eager)
+        print(f"{label} ({args.runs} runs):")
+        for name, (median, low, high) in summarize(reports).items():
+            print(f"  {name:>12}: median {median * 1000:.0f} ms "
+                  f"(min {low * 1000:.0f}, max {high * 1000:.0f})")
+        last = reports[-1]
+        print(f"  matplotlib loaded: {last['matplotlib_loaded']}, "
+              f"numpy loaded: {last['numpy_loaded']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
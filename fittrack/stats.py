@@ -0,0 +1,42 @@
+from collections import namedtuple
+
+from fittrack.chart_options import cutoff_date
+from fittrack.summary import read_stats
+
+# Stats engine
+#
+# Totals come from the trigger-maintained summary row and per-period figures
+# from the rollup tables, so both are cheap on any database size.
+
+WorkoutStats = namedtuple(
+    "WorkoutStats", "workouts total_distance total_calories avg_heart_rate max_distance avg_bmi")
+
+PeriodStats = namedtuple("PeriodStats", "period workouts calories distance hr_mean hr_max")
+
+PERIOD_LEVELS = ("daily", "weekly", "monthly")
+
+
+# Totals shown on the Stats tab (zeros for an empty database)
+def workout_stats(conn):
+    row = read_stats(conn) or (0,) * len(WorkoutStats._fields)
+    return WorkoutStats(*(value or 0 for value in row))
+
+
+# Per-day / ISO-week / month figures for a time range, oldest first
+def period_stats(conn, level="weekly", time_range="All Data"):
+    if level not in PERIOD_LEVELS:
+        raise ValueError(f"Unknown period level: {level}")
+    from fittrack.rollups import fetch_rollup, iso_week_labels, month_labels
+
+    rollup = fetch_rollup(conn, level, cutoff_date(time_range))
+    if level == "weekly":
+        labels = iso_week_labels(rollup["period"])
+    elif level == "monthly":
+        labels = month_labels(rollup["period"])
+    else:
+        labels = [str(day) for day in rollup["period"]]
+    return [PeriodStats(label, int(workouts), float(calories), float(distance),
+                        float(hr_mean), int(hr_max))
+            for label, workouts, calories, distance, hr_mean, hr_max in zip(
+                labels, rollup["workouts"], rollup["calories"], rollup["distance"],
+                rollup["hr_mean"], rollup["hr_max"])]
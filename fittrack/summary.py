@@ -0,0 +1,208 @@
+import math
+import sys
+
+from fittrack.connections import connect
+from fittrack.instrument import span
+
+# Incrementally maintained totals for the Stats tab
+#
+# fitness_summary holds a single row that triggers keep in step with every
+# insert, update and delete on fitness, so reading the stats is O(1) no
+# matter how many workouts exist. Averages are stored as sum + count of
+# non-NULL values to match SQL AVG(). MAX(distance) only has to be
+# recomputed (through idx_fitness_distance) when the current longest
+# workout is deleted or shortened.
+
+SUMMARY_TABLE = "fitness_summary"
+
+SUMMARY_INSERT_TRIGGER = "fitness_summary_insert"
+
+# Stored columns and the from-scratch aggregate each one must equal
+SUMMARY_COLUMNS = {
+    "workout_count": "COUNT(*)",
+    "total_distance": "IFNULL(SUM(distance), 0)",
+    "total_calories": "IFNULL(SUM(calories), 0)",
+    "heart_rate_sum": "IFNULL(SUM(heart_rate), 0)",
+    "heart_rate_count": "COUNT(heart_rate)",
+    "bmi_sum": "IFNULL(SUM(bmi), 0)",
+    "bmi_count": "COUNT(bmi)",
+    "max_distance": "MAX(distance)",
+}
+
+# Values shown on the Stats tab, in update_stats order
+STATS_QUERY = f"""
+    SELECT workout_count,
+           total_distance,
+           total_calories,
+           CASE WHEN heart_rate_count > 0 THEN heart_rate_sum * 1.0 / heart_rate_count END,
+           max_distance,
+           CASE WHEN bmi_count > 0 THEN bmi_sum / bmi_count END
+    FROM {SUMMARY_TABLE}
+    WHERE id = 1
+"""
+
+RECOMPUTE_QUERY = ("SELECT " + ", ".join(SUMMARY_COLUMNS.values()) + " FROM fitness")
+
+
+def _add(row):
+    return f"""
+            workout_count = workout_count + 1,
+            total_distance = total_distance + IFNULL({row}.distance, 0),
+            total_calories = total_calories + IFNULL({row}.calories, 0),
+            heart_rate_sum = heart_rate_sum + IFNULL({row}.heart_rate, 0),
+            heart_rate_count = heart_rate_count + ({row}.heart_rate IS NOT NULL),
+            bmi_sum = bmi_sum + IFNULL({row}.bmi, 0),
+            bmi_count = bmi_count + ({row}.bmi IS NOT NULL)"""
+
+
+def _remove(row):
+    return f"""
+            workout_count = workout_count - 1,
+            total_distance = total_distance - IFNULL({row}.distance, 0),
+            total_calories = total_calories - IFNULL({row}.calories, 0),
+            heart_rate_sum = heart_rate_sum - IFNULL({row}.heart_rate, 0),
+            heart_rate_count = heart_rate_count - ({row}.heart_rate IS NOT NULL),
+            bmi_sum = bmi_sum - IFNULL({row}.bmi, 0),
+            bmi_count = bmi_count - ({row}.bmi IS NOT NULL)"""
+
+
+def _raise_max(row):
+    return f"""
+            max_distance = CASE
+                WHEN {row}.distance IS NOT NULL
+                     AND (max_distance IS NULL OR {row}.distance > max_distance)
+                THEN {row}.distance ELSE max_distance END"""
+
+
+# Recompute MAX only if the row that held it went away or got shorter
+_RESCAN_MAX = f"""
+            UPDATE {SUMMARY_TABLE}
+            SET max_distance = (SELECT MAX(distance) FROM fitness)
+            WHERE id = 1 AND OLD.distance IS NOT NULL AND OLD.distance >= max_distance;"""
+
+
+def create_summary(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE} (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            workout_count INTEGER NOT NULL DEFAULT 0,
+            total_distance REAL NOT NULL DEFAULT 0,
+            total_calories REAL NOT NULL DEFAULT 0,
+            heart_rate_sum INTEGER NOT NULL DEFAULT 0,
+            heart_rate_count INTEGER NOT NULL DEFAULT 0,
+            bmi_sum REAL NOT NULL DEFAULT 0,
+            bmi_count INTEGER NOT NULL DEFAULT 0,
+            max_distance REAL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_fitness_distance ON fitness(distance)")
+    conn.execute(f"INSERT OR IGNORE INTO {SUMMARY_TABLE}(id) VALUES (1)")
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {SUMMARY_INSERT_TRIGGER}
+        AFTER INSERT ON fitness
+        BEGIN
+            UPDATE {SUMMARY_TABLE} SET {_add("NEW")}, {_raise_max("NEW")}
+            WHERE id = 1;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS fitness_summary_delete
+        AFTER DELETE ON fitness
+        BEGIN
+            UPDATE {SUMMARY_TABLE} SET {_remove("OLD")}
+            WHERE id = 1;{_RESCAN_MAX}
+            -- Drop accumulated rounding error once the table is empty
+            UPDATE {SUMMARY_TABLE}
+            SET total_distance = 0, total_calories = 0, bmi_sum = 0
+            WHERE id = 1 AND workout_count = 0;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS fitness_summary_update
+        AFTER UPDATE OF distance, calories, heart_rate, bmi ON fitness
+        BEGIN
+            UPDATE {SUMMARY_TABLE} SET {_remove("OLD")}
+            WHERE id = 1;
+            UPDATE {SUMMARY_TABLE} SET {_add("NEW")}, {_raise_max("NEW")}
+            WHERE id = 1;{_RESCAN_MAX}
+        END
+    """)
+    rebuild_summary(conn)
+
+
+# Overwrite the stored totals with a full recompute
+def rebuild_summary(conn):
+    actual = conn.execute(RECOMPUTE_QUERY).fetchone()
+    assignments = ", ".join(f"{name} = ?" for name in SUMMARY_COLUMNS)
+    conn.execute(f"UPDATE {SUMMARY_TABLE} SET {assignments} WHERE id = 1", actual)
+
+
+# Fold rows with id > after_id into the totals (bulk import path)
+def add_new_rows(conn, after_id):
+    added = conn.execute(RECOMPUTE_QUERY + " WHERE id > ?", (after_id,)).fetchone()
+    values = dict(zip(SUMMARY_COLUMNS, added))
+    if not values["workout_count"]:
+        return
+    new_max = values.pop("max_distance")
+    assignments = ", ".join(f"{name} = {name} + ?" for name in values)
+    conn.execute(f"""
+        UPDATE {SUMMARY_TABLE}
+        SET {assignments},
+            max_distance = CASE
+                WHEN ? IS NOT NULL AND (max_distance IS NULL OR ? > max_distance)
+                THEN ? ELSE max_distance END
+        WHERE id = 1
+    """, list(values.values()) + [new_max] * 3)
+
+
+def read_stats(conn):
+    with span("stats.query", STATS_QUERY):
+        return conn.execute(STATS_QUERY).fetchone()
+
+
+# Consistency check
+# Recomputes every total from scratch and returns {column: (stored, actual)}
+# for each one that drifted. Sums are compared with a relative tolerance
+# because adding and subtracting floats one row at a time is not exact.
+def check_summary(conn, rel_tol=1e-9, abs_tol=1e-6):
+    names = list(SUMMARY_COLUMNS)
+    stored = conn.execute(
+        f"SELECT {', '.join(names)} FROM {SUMMARY_TABLE} WHERE id = 1").fetchone()
+    if stored is None:
+        stored = (None,) * len(names)
+    actual = conn.execute(RECOMPUTE_QUERY).fetchone()
+
+    drift = {}
+    for name, have, want in zip(names, stored, actual):
+        if have is None or want is None:
+            if have != want:
+                drift[name] = (have, want)
+        elif not math.isclose(have, want, rel_tol=rel_tol, abs_tol=abs_tol):
+            drift[name] = (have, want)
+    return drift
+
+
+# Check (and optionally repair) the summary of a database file
+def verify_database(path, repair=False):
+    conn = connect(path)
+    try:
+        drift = check_summary(conn)
+        if drift and repair:
+            rebuild_summary(conn)
+            conn.commit()
+        return drift
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if a != "--repair"]
+    path = args[0] if args else "fitness.db"
+    drift = verify_database(path, repair="--repair" in sys.argv)
+    if not drift:
+        print(f"{path}: summary is consistent")
+        sys.exit(0)
+    for name, (stored, actual) in drift.items():
+        print(f"{path}: {name} stored={stored} actual={actual}")
+    sys.exit(1)
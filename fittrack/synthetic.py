@@ -0,0 +1,161 @@
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from fittrack.connections import connect
+from fittrack.importer import write_batch
+from fittrack.migrations import migrate
+
+# Seeded synthetic workout databases
+#
+# generate() writes a fitness.db of any size (1k to 10M rows) for
+# benchmarks. The same seed and size always give the same workouts (dated
+# relative to `today`, so the recent time ranges have data). One
+# simulated person with a fixed age and height logs workouts spread over
+# `days` days that end today. Distance, calories and heart rate follow the
+# activity, and weight drifts slowly. Rows go through the bulk import path,
+# so the summary, rollups and search index are built as they would be in a
+# real database.
+#
+# generate_samples() writes a replay file of per-second wearable readings
+# for some of those workouts, for fittrack.ingest.
+
+DEFAULT_SEED = 42
+BATCH_SIZE = 100000
+
+# Activity -> (distance range in km, kcal per km, heart-rate range)
+ACTIVITIES = {
+    "run": ((3.0, 21.0), 65.0, (130, 185)),
+    "ride": ((10.0, 80.0), 30.0, (110, 170)),
+    "swim": ((0.5, 4.0), 250.0, (115, 165)),
+    "walk": ((2.0, 10.0), 50.0, (85, 120)),
+    "hike": ((5.0, 25.0), 70.0, (100, 150)),
+    "row": ((2.0, 15.0), 60.0, (120, 175)),
+    "interval": ((3.0, 10.0), 80.0, (150, 195)),
+}
+TIMES_OF_DAY = ["morning", "lunch", "afternoon", "evening", "night"]
+PLACES = ["in the park", "on the track", "in the hills", "along the river",
+          "at the gym", "on the trail", "around town", "with friends"]
+
+
+# Days covered by a database of `rows` workouts (about 3 per day, 1-10 years)
+def default_days(rows):
+    return int(min(max(rows // 3, 365), 3650))
+
+
+def _batch(rng, rows, days, first_day, person, weight):
+    names = list(ACTIVITIES)
+    activity = rng.integers(0, len(names), rows)
+    distance_range = np.array([ACTIVITIES[n][0] for n in names])
+    kcal_per_km = np.array([ACTIVITIES[n][1] for n in names])
+    hr_range = np.array([ACTIVITIES[n][2] for n in names])
+
+    day = np.sort(rng.integers(0, days, rows))
+    low, high = distance_range[activity, 0], distance_range[activity, 1]
+    distance = np.round(low + (high - low) * rng.beta(2.0, 3.0, rows), 2)
+    calories = np.round(distance * kcal_per_km[activity] * rng.normal(1.0, 0.1, rows), 1)
+    heart_rate = rng.integers(hr_range[activity, 0], hr_range[activity, 1] + 1)
+    body_temp = np.round(np.clip(rng.normal(36.8, 0.3, rows), 35.5, 38.5), 1)
+    # Slow random walk around the starting weight
+    weights = np.round(np.clip(weight + np.cumsum(rng.normal(0, 0.02, rows)), 40.0, 200.0), 1)
+    height_m = person["height"] / 100
+    bmi = weights / (height_m * height_m)
+
+    times = rng.integers(0, len(TIMES_OF_DAY), rows)
+    places = rng.integers(0, len(PLACES), rows)
+    descriptions = [f"{TIMES_OF_DAY[t].capitalize()} {names[a]} {PLACES[p]}"
+                    for t, a, p in zip(times.tolist(), activity.tolist(), places.tolist())]
+
+    epoch_days = (first_day + day).tolist()
+    dates = [(date(1970, 1, 1) + timedelta(days=d)).isoformat() for d in epoch_days]
+    batch = list(zip(dates, epoch_days, calories.tolist(), distance.tolist(),
+                     heart_rate.tolist(), body_temp.tolist(), [person["age"]] * rows,
+                     weights.tolist(), [person["height"]] * rows, bmi.tolist(), descriptions))
+    return batch, float(weights[-1])
+
+
+# Write `rows` synthetic workouts to a new database at `path`
+def generate(path, rows, seed=DEFAULT_SEED, days=None, today=None, progress=None):
+    if os.path.exists(path):
+        os.remove(path)
+    rng = np.random.default_rng(seed)
+    days = days or default_days(rows)
+    today = today or date.today()
+    last_day = (today - date(1970, 1, 1)).days
+    person = {"age": int(rng.integers(20, 65)), "height": float(rng.integers(155, 196))}
+    weight = float(rng.normal(72, 8))
+
+    conn = connect(path, autocommit=True)
+    try:
+        migrate(conn)
+        conn.execute("PRAGMA cache_size = -65536")
+        written = 0
+        while written < rows:
+            size = min(BATCH_SIZE, rows - written)
+            # Each batch covers its share of the date span, so dates keep rising
+            span = max(1, days * size // rows)
+            first_day = last_day - days + days * written // rows
+            batch, weight = _batch(rng, size, span, first_day, person, weight)
+            write_batch(conn, batch)
+            written += size
+            if progress:
+                progress(written)
+    finally:
+        conn.close()
+
+
+# Write `seconds` one-second samples for each workout id to a replay file
+# Heart rate wanders around a per-workout level, temperature drifts up
+# slowly and distance grows at a per-workout pace.
+def generate_samples(path, workout_ids, seconds=3600, seed=DEFAULT_SEED):
+    from fittrack.ingest import HEADER
+
+    rng = np.random.default_rng(seed)
+    t = np.arange(seconds)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(HEADER + "\n")
+        for workout_id in workout_ids:
+            level = rng.integers(110, 170)
+            # 30 s moving average of white noise: a few bpm of slow wander
+            wander = np.convolve(rng.normal(0, 25, seconds), np.ones(30) / 30, "same")
+            hr = np.clip(level + wander, 60, 200).astype(np.int64)
+            temp = np.round(36.6 + t * 0.6 / max(seconds, 1) + rng.normal(0, 0.05, seconds), 2)
+            pace = rng.uniform(1.5, 4.5) / 1000  # km per second
+            distance = np.round(np.cumsum(np.abs(rng.normal(pace, pace / 5, seconds))), 3)
+            f.writelines(f"{workout_id},{s},{h},{c},{d}\n" for s, h, c, d in zip(
+                t.tolist(), hr.tolist(), temp.tolist(), distance.tolist()))
+    return len(workout_ids) * seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic FitTrack database")
+    parser.add_argument("path")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--days", type=int, help="days of history (default: from the row count)")
+    parser.add_argument("--samples", metavar="FILE",
+                        help="also write a wearable sample replay file for the newest workouts")
+    parser.add_argument("--sample-workouts", type=int, default=10,
+                        help="workouts with samples (default: 10)")
+    parser.add_argument("--sample-seconds", type=int, default=3600,
+                        help="samples per workout (default: 3600)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    generate(args.path, args.rows, args.seed, args.days)
+    elapsed = time.perf_counter() - start
+    print(f"{args.path}: {args.rows} rows in {elapsed:.1f} s ({args.rows / elapsed:,.0f} rows/s)")
+    if args.samples:
+        first = max(args.rows - args.sample_workouts, 0) + 1
+        count = generate_samples(args.samples, range(first, args.rows + 1),
+                                 args.sample_seconds, args.seed)
+        print(f"{args.samples}: {count} samples")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+from collections import namedtuple
+
+from fittrack.instrument import span
+
+# Training load: EWMA acute/chronic load and the acute:chronic workload ratio
+#
+# Every calendar day from the first workout on has a load (that day's
+# calories and distance, 0 on rest days). Acute and chronic load are
+# exponentially weighted moving averages of it over ACUTE_DAYS and
+# CHRONIC_DAYS, with the usual decay alpha = 2 / (days + 1), and the
+# ACWR is acute / chronic. Days are stored in training_load, one row per
+# day up to the last workout; later days only decay, which the readers
+# apply on the fly up to today.
+#
+# The table is brought up to date lazily and incrementally. Triggers on
+# fitness record the earliest day whose load changed (dirty_from; the bulk
+# importer does the same once per batch). refresh() recomputes only the
+# days from there on, seeded with the latest stored state before them: a
+# workout added today recomputes the days since the last one, a back-dated
+# edit or delete the suffix after it. The oldest day changing means a full
+# recompute. Either way the EWMA runs vectorized in NumPy (see ewma()).
+#
+# NumPy is only imported by the readers, so migrations and imports don't
+# load it.
+
+TRAINING_LOAD_TABLE = "training_load"
+STATE_TABLE = "training_load_state"
+TRAINING_LOAD_INSERT_TRIGGER = "training_load_insert"
+
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+
+# Daily load columns, read from rollup_daily
+LOAD_METRICS = ("calories", "distance")
+
+# Rolling mean windows shown next to the loads
+ROLLING_DAYS = (7, 28)
+
+# ACWR bands (Gabbett): below UNDERTRAINING_ACWR the athlete is losing
+# fitness, above OPTIMAL_ACWR injury risk climbs, above CAUTION_ACWR steeply
+UNDERTRAINING_ACWR = 0.8
+OPTIMAL_ACWR = 1.3
+CAUTION_ACWR = 1.5
+
+# EWMA days per block: decay ** -BLOCK must stay far from overflowing
+BLOCK = 256
+
+_EPOCH = 2440587.5
+
+TrainingStatus = namedtuple(
+    "TrainingStatus", "day metric load acute chronic acwr zone means")
+
+
+def _epoch_day(row_date):
+    return f"CAST(julianday({row_date}) - {_EPOCH} AS INTEGER)"
+
+
+def _mark(day):
+    return f"""
+            UPDATE {STATE_TABLE}
+            SET dirty_from = MIN(IFNULL(dirty_from, {day}), {day})
+            WHERE id = 1 AND {day} IS NOT NULL;"""
+
+
+def create_training_load(conn):
+    columns = ", ".join(f"{m} REAL NOT NULL, acute_{m} REAL NOT NULL, chronic_{m} REAL NOT NULL"
+                        for m in LOAD_METRICS)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TRAINING_LOAD_TABLE} (
+            day INTEGER PRIMARY KEY,
+            {columns}
+        )
+    """)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            dirty_from INTEGER
+        )
+    """)
+    # Everything already in the table needs computing
+    conn.execute(f"""
+        INSERT OR IGNORE INTO {STATE_TABLE}(id, dirty_from)
+        SELECT 1, MIN({_epoch_day("date")}) FROM fitness
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {TRAINING_LOAD_INSERT_TRIGGER}
+        AFTER INSERT ON fitness
+        BEGIN{_mark(_epoch_day("NEW.date"))}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS training_load_delete
+        AFTER DELETE ON fitness
+        BEGIN{_mark(_epoch_day("OLD.date"))}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS training_load_update
+        AFTER UPDATE OF date, calories, distance ON fitness
+        BEGIN{_mark(_epoch_day("OLD.date"))}{_mark(_epoch_day("NEW.date"))}
+        END
+    """)
+
+
+# Bulk import: mark the earliest day of the rows after `after_id` at once
+def mark_new_rows(conn, after_id):
+    day = f"(SELECT MIN({_epoch_day('date')}) FROM fitness WHERE id > {int(after_id)})"
+    conn.execute(_mark(day).strip().rstrip(";"))
+
+
+def _alpha(days):
+    return 2.0 / (days + 1)
+
+
+# Exponentially weighted moving average of a daily series
+#   e[i] = alpha * x[i] + (1 - alpha) * e[i - 1],  e[-1] = initial
+# In closed form e[i] = d^(i+1) e[-1] + alpha * d^i * sum(x[k] / d^k), d = 1 - alpha,
+# which is a cumulative sum; it runs per BLOCK days, carrying the state,
+# so d^-k stays in range for any history length.
+def ewma(values, alpha, initial=0.0):
+    import numpy as np
+    values = np.asarray(values, dtype=np.float64)
+    decay = 1.0 - alpha
+    steps = np.arange(BLOCK)
+    grow = decay ** -steps
+    shrink = decay ** steps
+    out = np.empty(len(values))
+    state = initial
+    for start in range(0, len(values), BLOCK):
+        x = values[start:start + BLOCK]
+        n = len(x)
+        out[start:start + n] = (decay * shrink[:n] * state
+                                + alpha * shrink[:n] * np.cumsum(x * grow[:n]))
+        state = out[start + n - 1]
+    return out
+
+
+# Mean over the trailing `window` days (shorter at the start of the series)
+def rolling_mean(values, window):
+    import numpy as np
+    totals = np.cumsum(np.r_[0.0, values])
+    n = np.arange(1, len(values) + 1)
+    start = np.maximum(n - window, 0)
+    return (totals[n] - totals[start]) / (n - start)
+
+
+# Bring training_load up to date; returns the number of days recomputed
+def refresh(conn):
+    import numpy as np
+    row = conn.execute(f"SELECT dirty_from FROM {STATE_TABLE} WHERE id = 1").fetchone()
+    if row is None or row[0] is None:
+        return 0
+
+    with span("training_load.refresh"):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            days = _recompute(conn, np)
+            conn.execute(f"UPDATE {STATE_TABLE} SET dirty_from = NULL WHERE id = 1")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    return days
+
+
+def _recompute(conn, np):
+    dirty = conn.execute(f"SELECT dirty_from FROM {STATE_TABLE} WHERE id = 1").fetchone()[0]
+    if dirty is None:
+        # Another connection refreshed while we waited for the lock
+        return 0
+    first, last = conn.execute("SELECT MIN(period_start), MAX(period_start) FROM rollup_daily").fetchone()
+    if first is None:
+        conn.execute(f"DELETE FROM {TRAINING_LOAD_TABLE}")
+        return 0
+
+    # Seed from the latest stored day before the change (rest days after it
+    # are recomputed too, their load is 0), or start over from the first day
+    state_columns = [f"{kind}_{m}" for m in LOAD_METRICS for kind in ("acute", "chronic")]
+    seed = None
+    if dirty > first:
+        seed = conn.execute(f"SELECT day, {', '.join(state_columns)} FROM {TRAINING_LOAD_TABLE} "
+                            f"WHERE day < ? ORDER BY day DESC LIMIT 1", (dirty,)).fetchone()
+    if seed is None:
+        start = first
+        seed = (0.0,) * len(state_columns)
+        conn.execute(f"DELETE FROM {TRAINING_LOAD_TABLE}")
+    else:
+        start = seed[0] + 1
+        seed = seed[1:]
+        # Days after the last workout day are dropped too (it was deleted)
+        conn.execute(f"DELETE FROM {TRAINING_LOAD_TABLE} WHERE day >= ?", (min(start, last + 1),))
+    if start > last:
+        return 0
+
+    loads = _daily_loads(conn, np, start, last)
+    columns = {"day": np.arange(start, last + 1)}
+    initial = dict(zip(state_columns, seed))
+    for m in LOAD_METRICS:
+        columns[m] = loads[m]
+        columns[f"acute_{m}"] = ewma(loads[m], _alpha(ACUTE_DAYS), initial[f"acute_{m}"])
+        columns[f"chronic_{m}"] = ewma(loads[m], _alpha(CHRONIC_DAYS), initial[f"chronic_{m}"])
+    names = list(columns)
+    conn.executemany(
+        f"INSERT INTO {TRAINING_LOAD_TABLE}({', '.join(names)}) "
+        f"VALUES ({', '.join('?' * len(names))})",
+        zip(*(columns[n].tolist() for n in names)))
+    return last - start + 1
+
+
+# Per-day loads (and heart-rate sums) for days first..last, 0 on rest days
+def _daily_loads(conn, np, first, last):
+    fields = LOAD_METRICS + ("hr_sum", "hr_count")
+    rows = np.array(conn.execute(
+        f"SELECT period_start, {', '.join(fields)} FROM rollup_daily "
+        f"WHERE period_start BETWEEN ? AND ?", (first, last)).fetchall(), dtype=np.float64)
+    result = {}
+    for i, field in enumerate(fields, start=1):
+        values = np.zeros(last - first + 1)
+        if len(rows):
+            values[rows[:, 0].astype(np.int64) - first] = rows[:, i]
+        result[field] = values
+    return result
+
+
+# Daily training load series from `since` ("yyyy-MM-dd", None: the start)
+# through `until` (epoch day, default: the last workout day), as NumPy
+# arrays: "date" (datetime64[D]), per metric its daily load, acute,
+# chronic and acwr (NaN while chronic is 0), and "<metric>_<n>d" rolling
+# means for calories, distance and heart_rate (over workout days' readings).
+def fetch_training_load(conn, since=None, until=None):
+    import numpy as np
+    refresh(conn)
+    first, last = conn.execute(
+        f"SELECT MIN(day), MAX(day) FROM {TRAINING_LOAD_TABLE}").fetchone()
+    if first is None:
+        return {"date": np.zeros(0, dtype="datetime64[D]")}
+    start = first
+    if since:
+        start = max(first, int(np.datetime64(since, "D").astype(np.int64)))
+    end = last if until is None else int(until)
+    if end < start:
+        return {"date": np.zeros(0, dtype="datetime64[D]")}
+
+    columns = ["day"] + [f"{kind}{m}" for m in LOAD_METRICS for kind in ("", "acute_", "chronic_")]
+    select = f"SELECT {', '.join(columns)} FROM {TRAINING_LOAD_TABLE} "
+    with span("training_load.query"):
+        rows = np.array(conn.execute(select + "WHERE day BETWEEN ? AND ? ORDER BY day",
+                                     (start, min(end, last))).fetchall(),
+                        dtype=np.float64).reshape(-1, len(columns))
+        final = np.array(conn.execute(select + "WHERE day = ?", (last,)).fetchone(),
+                         dtype=np.float64)
+    days = np.arange(start, end + 1)
+    stored = len(rows)
+    data = {"date": days.astype("datetime64[D]")}
+    for i, name in enumerate(columns[1:], start=1):
+        values = np.zeros(len(days))
+        values[:stored] = rows[:, i]
+        if name.startswith(("acute_", "chronic_")) and stored < len(days):
+            # No workouts after the last stored day: the averages only decay
+            decay = 1 - _alpha(ACUTE_DAYS if name.startswith("acute_") else CHRONIC_DAYS)
+            values[stored:] = final[i] * decay ** (days[stored:] - last)
+        data[name] = values
+    for m in LOAD_METRICS:
+        chronic = data[f"chronic_{m}"]
+        data[f"acwr_{m}"] = np.divide(data[f"acute_{m}"], chronic, out=np.full(len(days), np.nan),
+                                      where=chronic > 0)
+
+    # Rolling means need the window before the first day shown
+    window = max(ROLLING_DAYS)
+    lead = min(window - 1, start - first)
+    loads = _daily_loads(conn, np, start - lead, end)
+    for n in ROLLING_DAYS:
+        for m in LOAD_METRICS:
+            data[f"{m}_{n}d"] = rolling_mean(loads[m], n)[lead:]
+        hr_sum = rolling_mean(loads["hr_sum"], n)[lead:]
+        hr_count = rolling_mean(loads["hr_count"], n)[lead:]
+        data[f"heart_rate_{n}d"] = np.divide(hr_sum, hr_count, out=np.full(len(days), np.nan),
+                                             where=hr_count > 0)
+    return data
+
+
+# Chart loader for the "Training Load" chart type (see fittrack.chart_options)
+def load_chart_data(conn, since):
+    with span("training_load.fetch"):
+        return fetch_training_load(conn, since)
+
+
+def acwr_zone(acwr):
+    if acwr is None or acwr != acwr:
+        return "Not enough data"
+    if acwr < UNDERTRAINING_ACWR:
+        return "Undertraining"
+    elif acwr <= OPTIMAL_ACWR:
+        return "Optimal"
+    elif acwr <= CAUTION_ACWR:
+        return "Caution"
+    return "High risk"
+
+
+# Load figures for one day (today by default) for the Stats tab / CLI
+def training_status(conn, metric="calories", today=None):
+    import numpy as np
+    if metric not in LOAD_METRICS:
+        raise ValueError(f"Unknown load metric: {metric}")
+    today = np.datetime64(today or "today", "D")
+    day = int(today.astype(np.int64))
+    since = str(today - np.timedelta64(max(ROLLING_DAYS) - 1, "D"))
+    data = fetch_training_load(conn, since, until=day)
+    if not len(data["date"]) or data["date"][-1] != today:
+        return TrainingStatus(str(today), metric, 0.0, 0.0, 0.0, None, acwr_zone(None), {})
+    acwr = float(data[f"acwr_{metric}"][-1])
+    acwr = None if np.isnan(acwr) else acwr
+    means = {f"{m}_{n}d": float(data[f"{m}_{n}d"][-1])
+             for n in ROLLING_DAYS for m in LOAD_METRICS + ("heart_rate",)}
+    return TrainingStatus(str(today), metric, float(data[metric][-1]),
+                          float(data[f"acute_{metric}"][-1]), float(data[f"chronic_{metric}"][-1]),
+                          acwr, acwr_zone(acwr), means)
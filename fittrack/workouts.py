@@ -0,0 +1,89 @@
+from datetime import date, datetime
+
+from fittrack.bmi import compute_bmi
+
+# Workout records
+#
+# Validation and the INSERT row format shared by the repository (single
+# workouts from the GUI or the CLI) and the bulk importer, so every way in
+# applies the same defaults, limits, epoch_day and BMI.
+
+# Same defaults and limits as the Data Entry form
+DEFAULTS = {"heart_rate": 70, "body_temp": 36.6, "age": 30, "weight": 70.0, "height": 170.0}
+LIMITS = {
+    "heart_rate": (40, 220),
+    "body_temp": (35.0, 42.0),
+    "age": (1, 120),
+    "weight": (20.0, 300.0),
+    "height": (50.0, 250.0),
+}
+
+INSERT_SQL = """
+    INSERT INTO fitness(date, epoch_day, calories, distance, heart_rate, body_temp,
+                        age, weight, height, bmi, description)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+# A record that can't be stored (the message says why)
+class RowError(ValueError):
+    pass
+
+
+# Validation
+def _missing(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+# Numeric columns in INSERT order: (name, cast, required)
+NUMBER_FIELDS = (
+    ("calories", float, True),
+    ("distance", float, True),
+    ("heart_rate", int, False),
+    ("body_temp", float, False),
+    ("age", int, False),
+    ("weight", float, False),
+    ("height", float, False),
+)
+
+
+def _number(value, name, cast, required=False):
+    # Parse first, the common case is a well-formed number
+    try:
+        number = cast(float(value))
+    except (TypeError, ValueError):
+        if not _missing(value):
+            raise RowError(f"{name} must be a number, got {value!r}")
+        if required:
+            raise RowError(f"{name} is required")
+        return DEFAULTS[name]
+    limits = LIMITS.get(name)
+    if limits and not limits[0] <= number <= limits[1]:
+        raise RowError(f"{name} {number} outside {limits[0]}-{limits[1]}")
+    return number
+
+
+def _date(value):
+    if isinstance(value, datetime):
+        value = value.date()
+    elif not isinstance(value, date):
+        if _missing(value):
+            raise RowError("date is required")
+        try:
+            value = date.fromisoformat(str(value).strip()[:10])
+        except ValueError:
+            raise RowError(f"date must be yyyy-mm-dd, got {value!r}")
+    return value.isoformat(), value.toordinal() - _EPOCH_ORDINAL
+
+
+# Turn one input record into an INSERT parameter tuple
+def parse_record(record):
+    get = record.get
+    values = [_number(get(name), name, cast, required) for name, cast, required in NUMBER_FIELDS]
+    day, epoch_day = _date(get("date"))
+    description = get("description")
+    description = "" if description is None else str(description)
+    bmi = compute_bmi(values[5], values[6])
+    return (day, epoch_day, *values, bmi, description)
@@ -1,22 +1,44 @@
-from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtCore import Qt, QDate, QThreadPool, QTimer
 from PyQt5.QtWidgets import (QApplication, QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout,
-                             QMessageBox, QTableWidget, QTableWidgetItem, QHeaderView, QCheckBox,
+                             QMessageBox, QTableView, QHeaderView, QCheckBox,
                              QDateEdit, QLineEdit, QComboBox, QTabWidget, QGridLayout, QFrame, QSpinBox, 
-                             QDoubleSpinBox, QGroupBox, QScrollArea)
-from PyQt5.QtSql import QSqlDatabase, QSqlQuery, QSqlError
-from PyQt5.QtGui import QFont, QIcon, QPalette, QColor
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-import matplotlib
-matplotlib.use('Qt5Agg')
-import numpy as np
+                             QDoubleSpinBox, QGroupBox, QScrollArea, QProgressBar,
+                             QFileDialog, QInputDialog, QShortcut)
+from PyQt5.QtGui import QIcon, QKeySequence, QPalette, QColor
+import sqlite3
 import sys
-from datetime import datetime, timedelta
+
+from fittrack.bmi import bmi_category, compute_bmi
+from fittrack.chart_cache import ChartCache, ChartKey
+from fittrack.chart_options import TIME_RANGES, chart_types, cutoff_date
+from fittrack.gui.chart_view import ChartView
+from fittrack.gui.database import thread_database
+from fittrack.gui.history_model import WorkoutTableModel
+from fittrack.gui.refresh import RefreshScheduler
+from fittrack.gui.workers import ChartJob, CoachJob, ExportJob, ImportJob, SampleReplayJob
+from fittrack.instrument import span
+from fittrack.migrations import data_version
+from fittrack.repository import WorkoutRepository
+from fittrack.summary import verify_database
+from fittrack.workouts import RowError
 
 # Main class
+# Tabs are built the first time they are shown and matplotlib is imported
+# for the first chart, so the window appears without loading either;
+# eager_tabs=True builds every tab up front like before.
+# With a ProfileStore the window works on one profile's database at a time
+# and offers the others in a Profile box.
 class FitTrack(QWidget):
-    def __init__(self):
+    def __init__(self, eager_tabs=False, db_path="fitness.db", profiles=None, profile=None):
         super().__init__()
+        self.eager_tabs = eager_tabs
+        self.profiles = profiles
+        self.profile_name = None
+        if profiles is not None:
+            self.profile_name = profile or profiles.names()[0]
+            db_path = profiles.path(self.profile_name)
+        self.db_path = db_path
+        self.matplotlib_loaded = False
         self.setting()
         self.create_database()
         self.initUI()
@@ -29,23 +51,64 @@ class FitTrack(QWidget):
         
     # Create Database and Tables
     def create_database(self):
-        # Create table if it doesn't exist
-        query = QSqlQuery()
-        query.exec_("""
-            CREATE TABLE IF NOT EXISTS fitness (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT,
-                calories REAL,
-                distance REAL,
-                heart_rate INTEGER,
-                body_temp REAL,
-                age INTEGER,
-                weight REAL,
-                height REAL,
-                bmi REAL,
-                description TEXT
-            )
-        """)
+        # Workouts are added, deleted and summarised through the repository
+        # (which brings the schema up to date); the Qt connection only pages
+        # the History table. Both are this thread's own WAL connections, so
+        # imports and chart jobs on other threads don't lock them out.
+        self.repos = {}
+        try:
+            self.open_database(self.db_path)
+        except Exception as e:
+            QMessageBox.critical(self, "Database Error", "Could not open database: " + str(e))
+            sys.exit(1)
+    
+    # Make `path` the current database
+    # Repositories and Qt connections stay open per file, so going back to
+    # a profile doesn't reopen (or re-migrate) its database.
+    def open_database(self, path):
+        repo = self.repos.get(path)
+        if repo is None:
+            repo = self.repos[path] = WorkoutRepository(path)
+        self.sql_db = thread_database(path)
+        self.repo = repo
+        self.db_path = path
+        self.data_conn = repo.conn
+    
+    # Switch to another profile's database and reload the visible views
+    def switch_profile(self, name):
+        if not name or name == self.profile_name:
+            return
+        if self.is_built(self.visualization_tab):
+            self.cancel_chart_job()
+        try:
+            self.open_database(self.profiles.path(name))
+        except Exception as e:
+            QMessageBox.warning(self, "Profile Error", f"Could not open profile {name}: {e}")
+            self.profile_box.blockSignals(True)
+            self.profile_box.setCurrentText(self.profile_name)
+            self.profile_box.blockSignals(False)
+            return
+        self.profile_name = name
+        if self.is_built(self.history_tab):
+            self.table_model.set_database(self.sql_db)
+        if self.diagnostics is not None:
+            self.diagnostics.set_database(self.db_path)
+        # The History model already re-read its rows
+        self.data_changed(table=False)
+    
+    # Ask for a name and switch to a new, empty profile
+    def new_profile(self):
+        name, ok = QInputDialog.getText(self, "New Profile", "Profile name:")
+        name = name.strip()
+        if not ok or not name:
+            return
+        try:
+            self.profiles.create(name)
+        except ValueError as e:
+            QMessageBox.warning(self, "Profile Error", str(e))
+            return
+        self.profile_box.addItem(name)
+        self.profile_box.setCurrentText(name)
         
     # Init UI
     def initUI(self):
@@ -64,19 +127,57 @@ class FitTrack(QWidget):
         self.tabs.addTab(self.visualization_tab, "Visualizations")
         self.tabs.addTab(self.history_tab, "History")
         
-        # Setup each tab
-        self.setup_data_entry_tab()
-        self.setup_stats_tab()
-        self.setup_visualization_tab()
-        self.setup_history_tab()
-        
-        # Master layout
-        self.master_layout = QVBoxLayout()
+        # Background jobs (charts, import, export, coach training)
+        self.thread_pool = QThreadPool.globalInstance()
+        self.last_job_id = 0
+        self.running_jobs = {}
+        self.coach_job = None
+        # Database path -> loaded coach model (None: checked, none trained yet)
+        self.coach_models = {}
+        self.coach_errors = {}
         
         # Settings and theme controls
         settings_layout = QHBoxLayout()
+        if self.profiles is not None:
+            settings_layout.addWidget(QLabel("Profile:"))
+            self.profile_box = QComboBox()
+            self.profile_box.addItems(self.profiles.names())
+            self.profile_box.setCurrentText(self.profile_name)
+            self.profile_box.currentTextChanged.connect(self.switch_profile)
+            settings_layout.addWidget(self.profile_box)
+            self.new_profile_btn = QPushButton("New Profile")
+            self.new_profile_btn.clicked.connect(self.new_profile)
+            settings_layout.addWidget(self.new_profile_btn)
         self.dark_mode = QCheckBox("Dark Mode")
         settings_layout.addWidget(self.dark_mode)
+        
+        # Views reload through the scheduler: once per event-loop turn, when visible
+        self.refresh = RefreshScheduler(self)
+        self.refresh.register("table", self.refresh_table, lambda: self.tab_visible(self.history_tab))
+        self.refresh.register("stats", self.update_stats, lambda: self.tab_visible(self.stats_tab))
+        self.refresh.register("mini_chart", self.update_mini_chart,
+                              lambda: self.tab_visible(self.stats_tab))
+        self.refresh.register("chart", self.redraw_chart,
+                              lambda: self.tab_visible(self.visualization_tab))
+        
+        # Setup each tab the first time it is shown
+        self.tab_setup = {
+            self.data_entry_tab: self.setup_data_entry_tab,
+            self.stats_tab: self.setup_stats_tab,
+            self.visualization_tab: self.setup_visualization_tab,
+            self.history_tab: self.setup_history_tab,
+        }
+        self.built_tabs = set()
+        self.tabs.currentChanged.connect(self.build_tab)
+        self.tabs.currentChanged.connect(self.refresh.schedule)
+        if self.eager_tabs:
+            for index in range(self.tabs.count()):
+                self.build_tab(index)
+        else:
+            self.build_tab(self.tabs.currentIndex())
+        
+        # Master layout
+        self.master_layout = QVBoxLayout()
         settings_layout.addStretch()
         
         self.master_layout.addLayout(settings_layout)
@@ -84,6 +185,45 @@ class FitTrack(QWidget):
         
         self.setLayout(self.master_layout)
         self.apply_styles()
+    
+    # Build a tab's widgets and load its data (once)
+    def build_tab(self, index):
+        tab = self.tabs.widget(index)
+        if tab is None or tab in self.built_tabs:
+            return
+        self.built_tabs.add(tab)
+        self.tab_setup[tab]()
+    
+    def is_built(self, tab):
+        return tab in self.built_tabs
+    
+    def tab_visible(self, tab):
+        return self.is_built(tab) and self.tabs.currentWidget() is tab
+    
+    # The workouts changed: every view that shows them is out of date
+    # table=False when the History model was already updated row by row.
+    def data_changed(self, table=True):
+        views = ["stats", "mini_chart", "chart"]
+        if table:
+            views.insert(0, "table")
+        self.refresh.invalidate(*views)
+    
+    # Import matplotlib the first time a chart is needed
+    def load_matplotlib(self):
+        if self.matplotlib_loaded:
+            return
+        import matplotlib
+        matplotlib.use('Qt5Agg')
+        import fittrack.charts
+        self.matplotlib_loaded = True
+        self.apply_chart_style()
+    
+    # matplotlib style for the current theme (once matplotlib is loaded)
+    def apply_chart_style(self):
+        if not self.matplotlib_loaded:
+            return
+        import matplotlib.style
+        matplotlib.style.use('dark_background' if self.dark_mode.isChecked() else 'default')
         
     # Setup data entry tab
     def setup_data_entry_tab(self):
@@ -179,10 +319,31 @@ class FitTrack(QWidget):
         self.add_btn = QPushButton("Add Workout")
         self.delete_btn = QPushButton("Delete Selected")
         self.clear_btn = QPushButton("Clear Form")
+        self.import_btn = QPushButton("Import File...")
+        self.export_btn = QPushButton("Export File...")
+        self.export_range = QComboBox()
+        self.export_range.addItems(TIME_RANGES)
+        self.export_range.setCurrentText("All Data")
+        self.samples_btn = QPushButton("Replay Samples...")
+        
+        # Progress of a running import, export or sample replay
+        self.file_status = QLabel("")
+        self.file_progress = QProgressBar()
+        self.file_progress.setRange(0, 0)
+        self.file_progress.setMaximumHeight(12)
+        self.file_progress.setTextVisible(False)
+        self.file_progress.hide()
+        self.file_job = None
         
         button_layout.addWidget(self.add_btn, 0, 0)
         button_layout.addWidget(self.delete_btn, 0, 1)
-        button_layout.addWidget(self.clear_btn, 1, 0, 1, 2)
+        button_layout.addWidget(self.clear_btn, 1, 0)
+        button_layout.addWidget(self.import_btn, 1, 1)
+        button_layout.addWidget(self.export_range, 2, 0)
+        button_layout.addWidget(self.export_btn, 2, 1)
+        button_layout.addWidget(self.samples_btn, 3, 1)
+        button_layout.addWidget(self.file_status, 4, 0)
+        button_layout.addWidget(self.file_progress, 4, 1)
         
         button_group.setLayout(button_layout)
         
@@ -217,6 +378,37 @@ class FitTrack(QWidget):
         
         stats_group.setLayout(stats_layout)
         
+        # Training load (EWMA acute/chronic calories and their ratio)
+        load_group = QGroupBox("Training Load")
+        load_layout = QGridLayout()
+        
+        self.acute_load = QLabel("Acute Load (7-day): 0 kcal")
+        self.chronic_load = QLabel("Chronic Load (28-day): 0 kcal")
+        self.acwr_label = QLabel("Acute:Chronic Ratio: -")
+        self.week_means = QLabel("7-day Avg: -")
+        self.month_means = QLabel("28-day Avg: -")
+        
+        load_layout.addWidget(self.acute_load, 0, 0)
+        load_layout.addWidget(self.chronic_load, 0, 1)
+        load_layout.addWidget(self.acwr_label, 1, 0, 1, 2)
+        load_layout.addWidget(self.week_means, 2, 0, 1, 2)
+        load_layout.addWidget(self.month_means, 3, 0, 1, 2)
+        
+        load_group.setLayout(load_layout)
+        
+        # Coach (suggested next session from the trained model)
+        coach_group = QGroupBox("Coach")
+        coach_layout = QVBoxLayout()
+        
+        self.coach_session = QLabel("Next Session: -")
+        self.coach_risk = QLabel("Overtraining Risk: -")
+        self.coach_status = QLabel("Model: not loaded")
+        
+        coach_layout.addWidget(self.coach_session)
+        coach_layout.addWidget(self.coach_risk)
+        coach_layout.addWidget(self.coach_status)
+        coach_group.setLayout(coach_layout)
+        
         # Refresh button
         self.refresh_stats_btn = QPushButton("Refresh Stats")
         
@@ -224,18 +416,28 @@ class FitTrack(QWidget):
         mini_chart_group = QGroupBox("Quick View: Last 7 Days")
         mini_chart_layout = QVBoxLayout()
         
-        self.mini_figure = plt.figure(figsize=(5, 3))
+        self.load_matplotlib()
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+        from fittrack.gui.mini_chart import MiniChart
+        self.mini_figure = Figure(figsize=(5, 3))
         self.mini_canvas = FigureCanvas(self.mini_figure)
+        self.mini_chart = MiniChart(self.mini_figure, self.mini_canvas)
         
         mini_chart_layout.addWidget(self.mini_canvas)
         mini_chart_group.setLayout(mini_chart_layout)
         
         layout.addWidget(stats_group)
+        layout.addWidget(load_group)
+        layout.addWidget(coach_group)
         layout.addWidget(self.refresh_stats_btn)
         layout.addWidget(mini_chart_group)
         layout.addStretch()
         
         self.stats_tab.setLayout(layout)
+        
+        self.refresh_stats_btn.clicked.connect(self.refresh_stats)
+        self.refresh.invalidate("stats", "mini_chart")
     
     # Setup visualization tab
     def setup_visualization_tab(self):
@@ -246,38 +448,51 @@ class FitTrack(QWidget):
         
         controls_layout.addWidget(QLabel("Chart Type:"))
         self.chart_type = QComboBox()
-        self.chart_type.addItems([
-            "Calories Over Time", 
-            "Distance Over Time", 
-            "Heart Rate Trends", 
-            "BMI Tracking",
-            "Workout Distribution",
-            "Health Metrics Correlation",
-            "Weekly Summary"
-        ])
+        self.chart_type.addItems(chart_types())
         controls_layout.addWidget(self.chart_type)
         
         controls_layout.addWidget(QLabel("Time Range:"))
         self.time_range = QComboBox()
-        self.time_range.addItems([
-            "Last 7 Days",
-            "Last 30 Days",
-            "Last 90 Days",
-            "All Data"
-        ])
+        self.time_range.addItems(TIME_RANGES)
         controls_layout.addWidget(self.time_range)
         
         self.generate_chart_btn = QPushButton("Generate Chart")
         controls_layout.addWidget(self.generate_chart_btn)
         
-        # Figure for charts
-        self.figure = plt.figure(figsize=(8, 6))
-        self.canvas = FigureCanvas(self.figure)
+        # Progress of the background chart job
+        progress_layout = QHBoxLayout()
+        self.chart_status = QLabel("")
+        self.chart_progress = QProgressBar()
+        self.chart_progress.setRange(0, 0)
+        self.chart_progress.setMaximumHeight(12)
+        self.chart_progress.setTextVisible(False)
+        self.chart_progress.hide()
+        self.cache_label = QLabel("")
+        progress_layout.addWidget(self.chart_status)
+        progress_layout.addWidget(self.chart_progress)
+        progress_layout.addStretch()
+        progress_layout.addWidget(self.cache_label)
+        
+        # Charts are rendered on a worker thread and shown as images
+        self.chart_view = ChartView()
+        self.chart_job = None
+        self.chart_cache = ChartCache()
+        self.chart_shown = False
+        self.resize_timer = QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.setInterval(200)
         
         layout.addLayout(controls_layout)
-        layout.addWidget(self.canvas)
+        layout.addLayout(progress_layout)
+        layout.addWidget(self.chart_view)
         
         self.visualization_tab.setLayout(layout)
+        
+        self.generate_chart_btn.clicked.connect(self.generate_chart)
+        self.chart_type.currentIndexChanged.connect(self.cancel_chart_job)
+        self.time_range.currentIndexChanged.connect(self.cancel_chart_job)
+        self.chart_view.resized.connect(self.resize_timer.start)
+        self.resize_timer.timeout.connect(self.redraw_chart)
     
     # Setup history tab
     def setup_history_tab(self):
@@ -296,19 +511,20 @@ class FitTrack(QWidget):
         self.show_all_btn = QPushButton("Show All")
         search_layout.addWidget(self.show_all_btn)
         
-        # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(11)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Date", "Calories", "Distance", "Heart Rate", 
-            "Body Temp", "Age", "Weight", "Height", "BMI", "Description"
-        ])
+        # Table (rows are fetched in chunks as the user scrolls)
+        self.table_model = WorkoutTableModel(self.sql_db, parent=self)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         
         layout.addLayout(search_layout)
         layout.addWidget(self.table)
         
         self.history_tab.setLayout(layout)
+        
+        self.search_btn.clicked.connect(self.search_entries)
+        self.show_all_btn.clicked.connect(self.load_table)
         self.load_table()
 
     # Events
@@ -316,42 +532,32 @@ class FitTrack(QWidget):
         self.add_btn.clicked.connect(self.add_workout)
         self.delete_btn.clicked.connect(self.delete_workout)
         self.clear_btn.clicked.connect(self.reset)
+        self.import_btn.clicked.connect(self.import_file)
+        self.export_btn.clicked.connect(self.export_file)
+        self.samples_btn.clicked.connect(self.replay_samples)
+        
+        # Hidden diagnostics dialog (span timings and query plans)
+        self.diagnostics = None
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self, self.show_diagnostics)
         self.dark_mode.stateChanged.connect(self.toggle_dark)
         self.calc_bmi_btn.clicked.connect(self.calculate_bmi)
-        self.refresh_stats_btn.clicked.connect(self.update_stats)
-        self.generate_chart_btn.clicked.connect(self.generate_chart)
-        self.search_btn.clicked.connect(self.search_entries)
-        self.show_all_btn.clicked.connect(self.load_table)
         
         # Calculate BMI on weight/height change
         self.weight_box.valueChanged.connect(self.calculate_bmi)
         self.height_box.valueChanged.connect(self.calculate_bmi)
-        
-        # Initial stats update
-        self.update_stats()
     
     # Calculate BMI
     def calculate_bmi(self):
         try:
             weight = self.weight_box.value()
-            height = self.height_box.value() / 100  # convert to meters
+            height = self.height_box.value()
             
             if height <= 0:
                 self.bmi_result.setText("BMI: Invalid height")
                 return 0
             
-            bmi = weight / (height * height)
-            
-            # Set BMI category
-            category = ""
-            if bmi < 18.5:
-                category = "Underweight"
-            elif bmi < 25:
-                category = "Normal"
-            elif bmi < 30:
-                category = "Overweight"
-            else:
-                category = "Obese"
+            bmi = compute_bmi(weight, height)
+            category = bmi_category(bmi)
                 
             self.bmi_result.setText(f"BMI: {bmi:.1f} ({category})")
             return bmi
@@ -359,40 +565,15 @@ class FitTrack(QWidget):
             self.bmi_result.setText(f"BMI: Error - {str(e)}")
             return 0
 
-    # Load Table
+    # Load Table (all workouts, no search filter)
     def load_table(self):
-        self.table.setRowCount(0)
-        query = QSqlQuery("SELECT * FROM fitness ORDER BY date DESC")
-        row = 0
-        while query.next():
-            fit_id = query.value(0)
-            date = query.value(1)
-            calories = query.value(2)
-            distance = query.value(3)
-            heart_rate = query.value(4)
-            body_temp = query.value(5)
-            age = query.value(6)
-            weight = query.value(7)
-            height = query.value(8)
-            bmi = query.value(9)
-            description = query.value(10)
-            
-            self.table.insertRow(row)
-            self.table.setItem(row, 0, QTableWidgetItem(str(fit_id)))
-            self.table.setItem(row, 1, QTableWidgetItem(str(date)))
-            self.table.setItem(row, 2, QTableWidgetItem(str(calories)))
-            self.table.setItem(row, 3, QTableWidgetItem(str(distance)))
-            self.table.setItem(row, 4, QTableWidgetItem(str(heart_rate)))
-            self.table.setItem(row, 5, QTableWidgetItem(str(body_temp)))
-            self.table.setItem(row, 6, QTableWidgetItem(str(age)))
-            self.table.setItem(row, 7, QTableWidgetItem(str(weight)))
-            self.table.setItem(row, 8, QTableWidgetItem(str(height)))
-            self.table.setItem(row, 9, QTableWidgetItem(str(bmi)))
-            self.table.setItem(row, 10, QTableWidgetItem(description))
-            row += 1
-        
-        self.update_stats()
-        self.update_mini_chart()
+        if self.is_built(self.history_tab):
+            with span("history.load_table"):
+                self.table_model.set_filter()
+    
+    # Re-read the table, keeping the current search
+    def refresh_table(self):
+        self.table_model.refresh()
     
     # Search entries
     def search_entries(self):
@@ -402,40 +583,16 @@ class FitTrack(QWidget):
             self.load_table()
             return
             
-        self.table.setRowCount(0)
-        query = QSqlQuery("SELECT * FROM fitness WHERE lower(description) LIKE ?")
-        query.addBindValue(f"%{search_text}%")
-        
-        if query.exec_():
-            row = 0
-            while query.next():
-                fit_id = query.value(0)
-                date = query.value(1)
-                calories = query.value(2)
-                distance = query.value(3)
-                heart_rate = query.value(4)
-                body_temp = query.value(5)
-                age = query.value(6)
-                weight = query.value(7)
-                height = query.value(8)
-                bmi = query.value(9)
-                description = query.value(10)
-                
-                self.table.insertRow(row)
-                self.table.setItem(row, 0, QTableWidgetItem(str(fit_id)))
-                self.table.setItem(row, 1, QTableWidgetItem(str(date)))
-                self.table.setItem(row, 2, QTableWidgetItem(str(calories)))
-                self.table.setItem(row, 3, QTableWidgetItem(str(distance)))
-                self.table.setItem(row, 4, QTableWidgetItem(str(heart_rate)))
-                self.table.setItem(row, 5, QTableWidgetItem(str(body_temp)))
-                self.table.setItem(row, 6, QTableWidgetItem(str(age)))
-                self.table.setItem(row, 7, QTableWidgetItem(str(weight)))
-                self.table.setItem(row, 8, QTableWidgetItem(str(height)))
-                self.table.setItem(row, 9, QTableWidgetItem(str(bmi)))
-                self.table.setItem(row, 10, QTableWidgetItem(description))
-                row += 1
-        else:
-            QMessageBox.warning(self, "Search Error", "Error searching: " + query.lastError().text())
+        # Prefix/multi-word search ranked by relevance, LIKE scan as fallback
+        with span("history.search"):
+            search = self.repo.search_filter(search_text)
+            if search.join and self.table_model.set_filter(*search):
+                return
+            
+            search = self.repo.search_filter(search_text, full_text=False)
+            found = self.table_model.set_filter(*search)
+        if not found:
+            QMessageBox.warning(self, "Search Error", "Error searching: " + self.table_model.error)
 
     # Add Workout
     def add_workout(self):
@@ -448,7 +605,7 @@ class FitTrack(QWidget):
         age = self.age_box.value()
         weight = self.weight_box.value()
         height = self.height_box.value()
-        bmi = self.calculate_bmi()
+        self.calculate_bmi()
         
         # Validate input
         if not calories or not distance:
@@ -462,44 +619,32 @@ class FitTrack(QWidget):
             QMessageBox.warning(self, "Error", "Calories and distance must be numbers")
             return
             
-        query = QSqlQuery()
-        query.prepare("""
-            INSERT INTO fitness(date, calories, distance, heart_rate, body_temp, age, weight, height, bmi, description)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """)
-        query.addBindValue(date)
-        query.addBindValue(calories)
-        query.addBindValue(distance)
-        query.addBindValue(heart_rate)
-        query.addBindValue(body_temp)
-        query.addBindValue(age)
-        query.addBindValue(weight)
-        query.addBindValue(height)
-        query.addBindValue(bmi)
-        query.addBindValue(description)
-            
-        if not query.exec_():
-            QMessageBox.warning(self, "Error", "Failed to add workout: " + query.lastError().text())
+        try:
+            workout_id = self.repo.add_workout(date, calories, distance, heart_rate, body_temp,
+                                               age, weight, height, description)
+        except (RowError, sqlite3.Error) as e:
+            QMessageBox.warning(self, "Error", "Failed to add workout: " + str(e))
             return
             
         self.kal_box.clear()
         self.distance_box.clear()
         self.description.clear()
-            
-        self.load_table()
-        self.update_stats()
-        self.update_mini_chart()
+        
+        # Only the new row goes into the History view
+        if self.is_built(self.history_tab):
+            self.table_model.insert_row(workout_id)
+        self.data_changed(table=False)
         QMessageBox.information(self, "Success", "Workout added successfully!")
 
     # Delete Workout
     def delete_workout(self):
-        selected_row = self.table.currentRow()
+        selected_row = self.table.currentIndex().row() if self.is_built(self.history_tab) else -1
             
         if selected_row == -1:
             QMessageBox.warning(self, "Error", "Please choose a row to delete")
             return
             
-        fit_id = int(self.table.item(selected_row, 0).text())
+        fit_id = self.table_model.row_id(selected_row)
         confirm = QMessageBox.question(self, "Confirm Delete",
                                     "Are you sure you want to delete this workout?",
                                     QMessageBox.Yes | QMessageBox.No)
@@ -507,298 +652,362 @@ class FitTrack(QWidget):
         if confirm == QMessageBox.No:
             return
             
-        query = QSqlQuery()
-        query.prepare("DELETE FROM fitness WHERE id = ?")
-        query.addBindValue(fit_id)
-            
-        if not query.exec_():
-            QMessageBox.warning(self, "Error", "Failed to delete workout: " + query.lastError().text())
+        try:
+            self.repo.delete_workout(fit_id)
+        except sqlite3.Error as e:
+            QMessageBox.warning(self, "Error", "Failed to delete workout: " + str(e))
             return
-            
-        self.load_table()
-        self.update_stats()
-        self.update_mini_chart()
+        
+        self.table_model.remove_row(fit_id)
+        self.data_changed(table=False)
         QMessageBox.information(self, "Success", "Workout deleted successfully!")
 
     # Update Stats
     def update_stats(self):
-        # Run queries to get stats
-        query = QSqlQuery("SELECT COUNT(*) FROM fitness")
-        total_workouts = 0
-        if query.next():
-            total_workouts = query.value(0)
-        
-        query = QSqlQuery("SELECT SUM(distance), SUM(calories), AVG(heart_rate), MAX(distance), AVG(bmi) FROM fitness")
-        total_distance = 0
-        total_calories = 0
-        avg_heart_rate = 0
-        max_distance = 0
-        avg_bmi = 0
-        
-        if query.next():
-            total_distance = query.value(0) or 0
-            total_calories = query.value(1) or 0
-            avg_heart_rate = query.value(2) or 0
-            max_distance = query.value(3) or 0
-            avg_bmi = query.value(4) or 0
+        if not self.is_built(self.stats_tab):
+            return
+        
+        # Totals are kept up to date by triggers, so this is a single-row read
+        stats = self.repo.stats()
         
         # Update labels
-        self.total_workouts.setText(f"Total Workouts: {total_workouts}")
-        self.total_distance.setText(f"Total Distance: {total_distance:.1f} km")
-        self.total_calories.setText(f"Total Calories: {total_calories:.0f}")
-        self.avg_heart_rate.setText(f"Avg Heart Rate: {avg_heart_rate:.1f} bpm")
-        self.max_distance.setText(f"Longest Workout: {max_distance:.1f} km")
-        self.avg_bmi.setText(f"Average BMI: {avg_bmi:.1f}")
+        self.total_workouts.setText(f"Total Workouts: {stats.workouts}")
+        self.total_distance.setText(f"Total Distance: {stats.total_distance:.1f} km")
+        self.total_calories.setText(f"Total Calories: {stats.total_calories:.0f}")
+        self.avg_heart_rate.setText(f"Avg Heart Rate: {stats.avg_heart_rate:.1f} bpm")
+        self.max_distance.setText(f"Longest Workout: {stats.max_distance:.1f} km")
+        self.avg_bmi.setText(f"Average BMI: {stats.avg_bmi:.1f}")
+        self.update_training_load()
+        self.update_coach()
+    
+    # Training load as of today (brings the stored loads up to date first)
+    def update_training_load(self):
+        from fittrack.training_load import training_status
+        load = training_status(self.repo.conn)
+        self.acute_load.setText(f"Acute Load (7-day): {load.acute:.0f} kcal")
+        self.chronic_load.setText(f"Chronic Load (28-day): {load.chronic:.0f} kcal")
+        ratio = "-" if load.acwr is None else f"{load.acwr:.2f}"
+        self.acwr_label.setText(f"Acute:Chronic Ratio: {ratio} ({load.zone})")
+        for label, title, days in ((self.week_means, "7-day Avg", 7),
+                                   (self.month_means, "28-day Avg", 28)):
+            if not load.means:
+                label.setText(f"{title}: -")
+                continue
+            heart_rate = load.means[f"heart_rate_{days}d"]
+            heart_rate = "-" if heart_rate != heart_rate else f"{heart_rate:.0f}"
+            label.setText(f"{title}: {load.means[f'calories_{days}d']:.0f} kcal/day, "
+                          f"{load.means[f'distance_{days}d']:.1f} km/day, HR {heart_rate} bpm")
+    
+    # Coach recommendation from the loaded model
+    # The model is trained and loaded in the background: on first use of a
+    # database, and again once enough workouts were added since its last fit.
+    def update_coach(self):
+        from fittrack.coach import MIN_NEW_ROWS, pending_rows
+        state = self.coach_models.get(self.db_path)
+        if self.db_path not in self.coach_errors and (
+                self.db_path not in self.coach_models
+                or pending_rows(self.repo.conn, state) >= MIN_NEW_ROWS):
+            self.start_coach_job()
+        self.show_coach()
+    
+    def show_coach(self):
+        from fittrack.coach import MIN_NEW_ROWS, recommend
+        state = self.coach_models.get(self.db_path)
+        rec = recommend(self.repo.conn, state)
+        if rec is None:
+            self.coach_session.setText("Next Session: -")
+            self.coach_risk.setText("Overtraining Risk: -")
+        else:
+            if rec.calories <= 0 and rec.predicted_calories > 0:
+                session = "rest day"
+            else:
+                session = f"{rec.distance:.1f} km, {rec.calories:.0f} kcal"
+            if rec.capped:
+                session += f" (capped from {rec.predicted_calories:.0f} kcal)"
+            self.coach_session.setText(f"Next Session: {session}")
+            ratio = "-" if rec.projected_acwr is None else f"{rec.projected_acwr:.2f}"
+            self.coach_risk.setText(f"Overtraining Risk: {'Yes' if rec.overtraining else 'No'} "
+                                    f"(ACWR after session {ratio}, {rec.zone})")
+        
+        if self.db_path in self.coach_errors:
+            status = "training failed: " + self.coach_errors[self.db_path]
+        elif self.coach_job is not None and self.coach_job.db_path == self.db_path:
+            status = "training..."
+        elif state is not None:
+            status = f"trained on {state['rows']:,} sessions"
+        elif self.db_path in self.coach_models:
+            status = f"not trained yet (needs {MIN_NEW_ROWS} workouts)"
+        else:
+            status = "not loaded"
+        self.coach_status.setText("Model: " + status)
+    
+    # Train (if needed) and load the model of the current database
+    def start_coach_job(self):
+        if self.coach_job is not None:
+            return
+        self.last_job_id += 1
+        job = CoachJob(self.last_job_id, self.db_path)
+        job.signals.finished.connect(self.coach_job_finished)
+        job.signals.failed.connect(self.coach_job_failed)
+        job.signals.done.connect(self.coach_job_done)
+        job.signals.done.connect(self.running_jobs.pop)
+        self.coach_job = job
+        self.running_jobs[job.job_id] = job
+        self.thread_pool.start(job)
+    
+    def coach_job_finished(self, job_id, result):
+        _, state = result
+        self.coach_models[self.coach_job.db_path] = state
+    
+    def coach_job_failed(self, job_id, message):
+        self.coach_errors[self.coach_job.db_path] = message
+    
+    def coach_job_done(self, job_id):
+        db_path = self.coach_job.db_path
+        self.coach_job = None
+        if db_path != self.db_path:
+            # The profile changed while training: start on the current one
+            self.refresh.invalidate("stats")
+        elif self.is_built(self.stats_tab):
+            self.show_coach()
+    
+    # Refresh Stats (verifies the stored totals against a full recompute)
+    def refresh_stats(self):
+        try:
+            drift = verify_database(self.db_path, repair=True)
+        except Exception as e:
+            QMessageBox.warning(self, "Stats Error", "Could not verify stats: " + str(e))
+            return
+        
+        if drift:
+            details = "\n".join(f"{name}: stored {stored}, actual {actual}"
+                                for name, (stored, actual) in drift.items())
+            QMessageBox.warning(self, "Stats Repaired",
+                                "Summary totals had drifted and were rebuilt:\n" + details)
+        self.refresh.invalidate("stats")
     
     # Update Mini Chart
     def update_mini_chart(self):
-        self.mini_figure.clear()
+        if not self.is_built(self.stats_tab):
+            return
+        import numpy as np
+        from fittrack.columns import fetch_columns
         
         # Get last 7 days of data
-        seven_days_ago = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-        
-        query = QSqlQuery()
-        query.prepare("SELECT date, calories FROM fitness WHERE date >= ? ORDER BY date")
-        query.addBindValue(seven_days_ago)
-        
-        dates = []
-        calories = []
-        
-        if query.exec_():
-            while query.next():
-                dates.append(query.value(0))
-                calories.append(float(query.value(1)))
-        
-        if not dates:
-            # No data
-            ax = self.mini_figure.add_subplot(111)
-            ax.text(0.5, 0.5, "No data for last 7 days", ha='center', va='center')
-            ax.set_axis_off()
-        else:
-            # Create mini bar chart
-            ax = self.mini_figure.add_subplot(111)
-            ax.bar(dates, calories, color='#4CAF50')
-            ax.set_title("Calories - Last 7 Days")
-            ax.set_xticklabels(dates, rotation=45)
-            self.mini_figure.tight_layout()
-        
-        self.mini_canvas.draw()
+        cutoff = cutoff_date("Last 7 Days")
+        data = fetch_columns(self.data_conn, ("date", "calories"), cutoff)
+        dates = data["date"]
+        
+        # One bar per day up to today (or the last future-dated workout)
+        first = np.datetime64(cutoff, "D")
+        last = max(np.datetime64(QDate.currentDate().toString("yyyy-MM-dd"), "D"),
+                   dates[-1] if len(dates) else first)
+        days = np.arange(first, last + 1)
+        
+        # Bars are updated in place, see MiniChart
+        self.mini_chart.update(dates, data["calories"], days, self.dark_mode.isChecked())
 
     # Generate Chart
     def generate_chart(self):
-        # Clear previous plot
-        self.figure.clear()
-        
         # Get selected chart type and time range
         chart_type = self.chart_type.currentText()
         time_range = self.time_range.currentText()
         
-        # Determine the date cutoff based on time range
-        cutoff_date = None
+        # Only the newest job may update the view
+        self.cancel_chart_job()
+        self.load_matplotlib()
+        width, height = self.chart_view.render_size()
+        
+        # Same chart, theme, size and data as before: just show the cached image
+        version = data_version(self.data_conn)
+        self.chart_cache.discard_stale(version, self.db_path)
+        key = ChartKey(self.db_path, chart_type, time_range, cutoff_date(time_range),
+                       self.dark_mode.isChecked(), width, height, version)
+        image = self.chart_cache.get(key)
+        self.update_cache_label()
+        if image is not None:
+            self.chart_view.set_image(*image)
+            self.chart_shown = True
+            return
         
-        if time_range == "Last 7 Days":
-            cutoff_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-        elif time_range == "Last 30 Days":
-            cutoff_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
-        elif time_range == "Last 90 Days":
-            cutoff_date = (datetime.now() - timedelta(days=90)).strftime("%Y-%m-%d")
+        self.last_job_id += 1
+        job = ChartJob(self.last_job_id, self.db_path, chart_type, time_range, width, height,
+                       dpi=100 * self.chart_view.devicePixelRatioF())
+        job.cache_key = key
+        job.signals.progress.connect(self.chart_job_progress)
+        job.signals.finished.connect(self.chart_job_finished)
+        job.signals.failed.connect(self.chart_job_failed)
+        job.signals.done.connect(self.running_jobs.pop)
+        self.chart_job = job
+        self.running_jobs[job.job_id] = job
+        
+        self.chart_status.setText("Loading data...")
+        self.chart_progress.show()
+        self.thread_pool.start(job)
+    
+    # Re-render the chart on screen (resize, theme change)
+    def redraw_chart(self):
+        if self.is_built(self.visualization_tab) and self.chart_shown:
+            self.generate_chart()
+    
+    # Cancel the running chart job, its result will be discarded
+    def cancel_chart_job(self):
+        if self.chart_job is not None:
+            self.chart_job.cancel()
+            self.chart_job = None
+        self.chart_status.setText("")
+        self.chart_progress.hide()
+    
+    def chart_job_progress(self, job_id, stage):
+        if self.chart_job is not None and job_id == self.chart_job.job_id:
+            self.chart_status.setText(stage)
+    
+    def chart_job_finished(self, job_id, image):
+        if self.chart_job is None or job_id != self.chart_job.job_id:
+            return
+        self.chart_cache.put(self.chart_job.cache_key, image)
+        self.update_cache_label()
+        self.chart_job = None
+        self.chart_status.setText("")
+        self.chart_progress.hide()
+        with span("chart.show"):
+            self.chart_view.set_image(*image)
+        self.chart_shown = True
+    
+    def chart_job_failed(self, job_id, message):
+        if self.chart_job is None or job_id != self.chart_job.job_id:
+            return
+        self.chart_job = None
+        self.chart_status.setText("")
+        self.chart_progress.hide()
+        QMessageBox.warning(self, "Chart Error", f"Error generating chart: {message}")
+            
+    # Show the diagnostics dialog (switches instrumentation on)
+    def show_diagnostics(self):
+        if self.diagnostics is None:
+            from fittrack.gui.diagnostics import DiagnosticsDialog
+            self.diagnostics = DiagnosticsDialog(self.db_path, self)
+        self.diagnostics.show()
+        self.diagnostics.raise_()
+    
+    def update_cache_label(self):
+        stats = self.chart_cache.stats()
+        self.cache_label.setText(
+            f"Chart cache: {stats['hits']} hits / {stats['misses']} misses, "
+            f"{stats['entries']} charts, {stats['bytes'] / (1024 * 1024):.1f} MB")
+    
+    # Import workouts from a file on a worker thread
+    def import_file(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Workouts", "",
+            "Workout files (*.csv *.jsonl *.ndjson *.parquet);;All files (*)")
+        if not path:
+            return
         
-        # Execute query based on time range
-        query = QSqlQuery()
+        self.last_job_id += 1
+        job = ImportJob(self.last_job_id, self.db_path, path)
+        job.signals.finished.connect(self.import_job_finished)
+        job.signals.failed.connect(self.import_job_failed)
+        # Refresh once at the end, whatever the outcome (batches are committed as they go)
+        job.signals.done.connect(lambda job_id: self.data_changed())
+        self.start_file_job(job, "Importing...")
+    
+    def import_job_finished(self, job_id, result):
+        text = f"Imported {result.rows:,} workouts ({result.rows_per_second:,.0f} rows/s)."
+        if result.skipped:
+            text += f"\n\nSkipped {result.skipped:,} invalid rows:\n" + "\n".join(result.errors)
+        QMessageBox.information(self, "Import Finished", text)
+    
+    def import_job_failed(self, job_id, message):
+        QMessageBox.warning(self, "Import Error", f"Error importing file: {message}")
+    
+    # Export the selected time range to CSV / Parquet / Arrow on a worker thread
+    def export_file(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Workouts", "workouts.csv",
+            "CSV (*.csv);;Parquet (*.parquet);;Arrow (*.arrow *.feather)")
+        if not path:
+            return
         
-        if cutoff_date:
-            query.prepare("SELECT * FROM fitness WHERE date >= ? ORDER BY date")
-            query.addBindValue(cutoff_date)
-        else:
-            query.prepare("SELECT * FROM fitness ORDER BY date")
-        
-        # Extract data
-        dates = []
-        calories_data = []
-        distances = []
-        heart_rates = []
-        body_temps = []
-        bmis = []
-        
-        if query.exec_():
-            while query.next():
-                dates.append(query.value(1))
-                calories_data.append(float(query.value(2) or 0))
-                distances.append(float(query.value(3) or 0))
-                heart_rates.append(int(query.value(4) or 0))
-                body_temps.append(float(query.value(5) or 0))
-                bmis.append(float(query.value(9) or 0))
-        
-        if not dates:
-            # No data
-            ax = self.figure.add_subplot(111)
-            ax.text(0.5, 0.5, "No data available for the selected time range", ha='center', va='center')
-            ax.set_axis_off()
-            self.canvas.draw()
+        self.last_job_id += 1
+        job = ExportJob(self.last_job_id, self.db_path, path, self.export_range.currentText())
+        job.signals.finished.connect(self.export_job_finished)
+        job.signals.failed.connect(self.export_job_failed)
+        self.start_file_job(job, "Exporting...")
+    
+    def export_job_finished(self, job_id, result):
+        QMessageBox.information(
+            self, "Export Finished",
+            f"Exported {result.rows:,} workouts to {result.path} ({result.rows_per_second:,.0f} rows/s).")
+    
+    def export_job_failed(self, job_id, message):
+        QMessageBox.warning(self, "Export Error", f"Error exporting file: {message}")
+    
+    # Stream a recorded wearable sample file (see fittrack/ingest.py) on a worker thread
+    def replay_samples(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Replay Samples", "", "Sample files (*.csv *.txt);;All files (*)")
+        if not path:
             return
         
-        try:
-            if chart_type == "Calories Over Time":
-                ax = self.figure.add_subplot(111)
-                ax.plot(dates, calories_data, 'o-', color='#4CAF50', linewidth=2, markersize=8)
-                ax.set_title("Calories Burned Over Time")
-                ax.set_xlabel("Date")
-                ax.set_ylabel("Calories Burned")
-                ax.grid(True, linestyle='--', alpha=0.7)
-                
-                # Mark average line
-                avg_calories = sum(calories_data) / len(calories_data)
-                ax.axhline(y=avg_calories, color='r', linestyle='--', alpha=0.7)
-                ax.text(dates[0], avg_calories, f"  Avg: {avg_calories:.1f}", color='r')
-                
-            elif chart_type == "Distance Over Time":
-                ax = self.figure.add_subplot(111)
-                ax.plot(dates, distances, 'o-', color='#2196F3', linewidth=2, markersize=8)
-                ax.set_title("Distance Over Time")
-                ax.set_xlabel("Date")
-                ax.set_ylabel("Distance (km)")
-                ax.grid(True, linestyle='--', alpha=0.7)
-                
-                # Trend line
-                z = np.polyfit(range(len(dates)), distances, 1)
-                p = np.poly1d(z)
-                ax.plot(dates, p(range(len(dates))), "r--", alpha=0.7)
-                
-            elif chart_type == "Heart Rate Trends":
-                ax = self.figure.add_subplot(111)
-                ax.plot(dates, heart_rates, 'o-', color='#F44336', linewidth=2, markersize=8)
-                ax.set_title("Heart Rate Trends")
-                ax.set_xlabel("Date")
-                ax.set_ylabel("Heart Rate (bpm)")
-                ax.grid(True, linestyle='--', alpha=0.7)
-                
-                # Reference zones
-                ax.axhspan(40, 60, alpha=0.2, color='blue', label='Resting')
-                ax.axhspan(60, 100, alpha=0.2, color='green', label='Normal')
-                ax.axhspan(100, 140, alpha=0.2, color='orange', label='Moderate')
-                ax.axhspan(140, 180, alpha=0.2, color='red', label='Intense')
-                ax.legend()
-                
-            elif chart_type == "BMI Tracking":
-                ax = self.figure.add_subplot(111)
-                ax.plot(dates, bmis, 'o-', color='#9C27B0', linewidth=2, markersize=8)
-                ax.set_title("BMI Over Time")
-                ax.set_xlabel("Date")
-                ax.set_ylabel("BMI")
-                ax.grid(True, linestyle='--', alpha=0.7)
-                
-                # Reference zones
-                ax.axhspan(0, 18.5, alpha=0.2, color='blue', label='Underweight')
-                ax.axhspan(18.5, 25, alpha=0.2, color='green', label='Normal')
-                ax.axhspan(25, 30, alpha=0.2, color='orange', label='Overweight')
-                ax.axhspan(30, 40, alpha=0.2, color='red', label='Obese')
-                ax.legend()
-                
-            elif chart_type == "Workout Distribution":
-                ax = self.figure.add_subplot(111)
-                
-                # Group distances into categories
-                distance_bins = {"0-2 km": 0, "2-5 km": 0, "5-10 km": 0, "10+ km": 0}
-                
-                for d in distances:
-                    if d < 2:
-                        distance_bins["0-2 km"] += 1
-                    elif d < 5:
-                        distance_bins["2-5 km"] += 1
-                    elif d < 10:
-                        distance_bins["5-10 km"] += 1
-                    else:
-                        distance_bins["10+ km"] += 1
-                
-                # Plot pie chart
-                labels = list(distance_bins.keys())
-                sizes = list(distance_bins.values())
-                
-                # Only plot non-zero values
-                non_zero_labels = [labels[i] for i in range(len(sizes)) if sizes[i] > 0]
-                non_zero_sizes = [size for size in sizes if size > 0]
-                
-                if non_zero_sizes:
-                    ax.pie(non_zero_sizes, labels=non_zero_labels, autopct='%1.1f%%',
-                          shadow=True, startangle=90)
-                    ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle
-                    ax.set_title("Workout Distance Distribution")
-                else:
-                    ax.text(0.5, 0.5, "No distance data available", ha='center', va='center')
-                    ax.set_axis_off()
-                    
-            elif chart_type == "Health Metrics Correlation":
-                ax = self.figure.add_subplot(111)
-                
-                # Scatter plot with size based on calories
-                scatter = ax.scatter(distances, heart_rates, 
-                                   s=[c/10 for c in calories_data],  # Size based on calories
-                                   c=body_temps, cmap='viridis',     # Color based on body temp
-                                   alpha=0.7)
-                
-                ax.set_title("Health Metrics Correlation")
-                ax.set_xlabel("Distance (km)")
-                ax.set_ylabel("Heart Rate (bpm)")
-                ax.grid(True, linestyle='--', alpha=0.3)
-                
-                # Add colorbar
-                cbar = self.figure.colorbar(scatter)
-                cbar.set_label('Body Temperature (°C)')
-                
-                # Add annotations for notable points
-                for i, (x, y) in enumerate(zip(distances, heart_rates)):
-                    if y == max(heart_rates) or x == max(distances):
-                        ax.annotate(f"{dates[i]}", (x, y), 
-                                   xytext=(5, 5), textcoords='offset points')
-                
-            elif chart_type == "Weekly Summary":
-                # Convert string dates to datetime objects
-                date_objects = [datetime.strptime(d, "%Y-%m-%d") for d in dates]
-                
-                # Get the week number for each date
-                week_numbers = [d.isocalendar()[1] for d in date_objects]
-                
-                # Group data by week
-                weeks = sorted(set(week_numbers))
-                weekly_calories = [0] * len(weeks)
-                weekly_distances = [0] * len(weeks)
-                
-                for i, week in enumerate(weeks):
-                    for j, w in enumerate(week_numbers):
-                        if w == week:
-                            weekly_calories[i] += calories_data[j]
-                            weekly_distances[i] += distances[j]
-                
-                # Create two subplots
-                ax1 = self.figure.add_subplot(211)
-                ax2 = self.figure.add_subplot(212)
-                
-                # Plot weekly calories
-                ax1.bar(range(len(weeks)), weekly_calories, color='#FF9800')
-                ax1.set_title("Weekly Calories Burned")
-                ax1.set_ylabel("Calories")
-                ax1.set_xticks(range(len(weeks)))
-                ax1.set_xticklabels([f"Week {w}" for w in weeks])
-                
-                # Plot weekly distances
-                ax2.bar(range(len(weeks)), weekly_distances, color='#2196F3')
-                ax2.set_title("Weekly Distance")
-                ax2.set_ylabel("Distance (km)")
-                ax2.set_xticks(range(len(weeks)))
-                ax2.set_xticklabels([f"Week {w}" for w in weeks])
-                
-                self.figure.tight_layout()
-            
-            # For all chart types, adjust the x-axis labels
-            if chart_type != "Workout Distribution" and chart_type != "Health Metrics Correlation" and chart_type != "Weekly Summary":
-                plt.xticks(rotation=45)
-            
-            self.figure.tight_layout()
-            self.canvas.draw()
-            
-        except Exception as e:
-            QMessageBox.warning(self, "Chart Error", f"Error generating chart: {str(e)}")
-            
+        self.last_job_id += 1
+        job = SampleReplayJob(self.last_job_id, self.db_path, path)
+        job.signals.finished.connect(self.replay_job_finished)
+        job.signals.failed.connect(self.replay_job_failed)
+        # Derived heart rate and distance change with every batch
+        job.signals.done.connect(lambda job_id: self.data_changed())
+        self.start_file_job(job, "Streaming samples...")
+    
+    def replay_job_finished(self, job_id, result):
+        text = f"Stored {result.samples:,} samples ({result.samples_per_second:,.0f} samples/s)."
+        if result.dropped:
+            text += f"\n\nDropped {result.dropped:,} samples of unknown workouts."
+        if result.skipped:
+            text += f"\n\nSkipped {result.skipped:,} invalid lines:\n" + "\n".join(result.errors)
+        QMessageBox.information(self, "Replay Finished", text)
+    
+    def replay_job_failed(self, job_id, message):
+        QMessageBox.warning(self, "Replay Error", f"Error replaying samples: {message}")
+    
+    # Run an import/export job, one at a time, with progress in the Actions group
+    def start_file_job(self, job, status):
+        job.signals.progress.connect(self.file_job_progress)
+        job.signals.done.connect(self.file_job_done)
+        job.signals.done.connect(self.running_jobs.pop)
+        self.file_job = job
+        self.running_jobs[job.job_id] = job
+        
+        self.import_btn.setEnabled(False)
+        self.export_btn.setEnabled(False)
+        self.samples_btn.setEnabled(False)
+        self.file_status.setText(status)
+        self.file_progress.show()
+        self.thread_pool.start(job)
+    
+    def file_job_progress(self, job_id, stage):
+        self.file_status.setText(stage)
+    
+    def file_job_done(self, job_id):
+        self.file_job = None
+        self.import_btn.setEnabled(True)
+        self.export_btn.setEnabled(True)
+        self.samples_btn.setEnabled(True)
+        self.file_status.setText("")
+        self.file_progress.hide()
+    
+    # Stop background work before the window goes away
+    def closeEvent(self, event):
+        if self.is_built(self.visualization_tab):
+            self.cancel_chart_job()
+        if self.file_job is not None:
+            self.file_job.cancel()
+        if self.coach_job is not None:
+            self.coach_job.cancel()
+        self.thread_pool.waitForDone()
+        for repo in self.repos.values():
+            repo.close()
+        super().closeEvent(event)
+    
     # Reset fields
     def reset(self):
         self.date_box.setDate(QDate.currentDate())
@@ -854,7 +1063,7 @@ class FitTrack(QWidget):
                 subcontrol-position: top center;
                 padding: 0 5px;
             }
-            QTableWidget {
+            QTableView {
                 gridline-color: #5c5c5c;
             }
             QHeaderView::section {
@@ -879,9 +1088,8 @@ class FitTrack(QWidget):
         """)
         
         # Set matplotlib style
-        plt.style.use('dark_background')
-        self.update_mini_chart()
-        self.canvas.draw()
+        self.apply_chart_style()
+        self.refresh.invalidate("mini_chart", "chart")
     
     # Apply light theme
     def apply_light_theme(self):
@@ -901,7 +1109,7 @@ class FitTrack(QWidget):
                 subcontrol-position: top center;
                 padding: 0 5px;
             }
-            QTableWidget {
+            QTableView {
                 gridline-color: #d0d0d0;
             }
             QHeaderView::section {
@@ -925,9 +1133,8 @@ class FitTrack(QWidget):
         """)
         
         # Set matplotlib style
-        plt.style.use('default')
-        self.update_mini_chart()
-        self.canvas.draw()
+        self.apply_chart_style()
+        self.refresh.invalidate("mini_chart", "chart")
     
     # Apply styles based on current theme
     def apply_styles(self):
@@ -944,18 +1151,34 @@ if __name__ == "__main__":
     # Set application icon
     app.setWindowIcon(QIcon('fitness.ico'))
     
-    # Create database connection
-    db = QSqlDatabase.addDatabase("QSQLITE")
-    db.setDatabaseName("fitness.db")
-    
-    if not db.open():
-        QMessageBox.critical(None, "Database Error", 
-                           "Could not open database file: " + db.lastError().text())
-        sys.exit(1)
-    
     # Create and show window
-    window = FitTrack()
+    # --eager-tabs builds every tab before showing the window (old behaviour),
+    # --startup-probe reports startup timings and quits (see fittrack/startup.py)
+    # --debug-refresh prints the refresh scheduler counters on exit
+    # --trace FILE times the hot paths and writes every span to FILE (JSON lines)
+    # --profiles DIR works on the profile databases in DIR instead of fitness.db,
+    # --profile NAME picks the one to open first (see fittrack/profiles.py)
+    if "--trace" in sys.argv[:-1]:
+        from fittrack import instrument
+        instrument.enable(sys.argv[sys.argv.index("--trace") + 1])
+    profiles = profile = None
+    if "--profiles" in sys.argv[:-1]:
+        from fittrack.profiles import DEFAULT_PROFILE, ProfileStore
+        profiles = ProfileStore(sys.argv[sys.argv.index("--profiles") + 1])
+        if "--profile" in sys.argv[:-1]:
+            profile = sys.argv[sys.argv.index("--profile") + 1]
+        if not profiles.names():
+            profiles.create(DEFAULT_PROFILE)
+        if profile is not None and not profiles.exists(profile):
+            profiles.create(profile)
+    window = FitTrack(eager_tabs="--eager-tabs" in sys.argv, profiles=profiles, profile=profile)
+    if "--startup-probe" in sys.argv:
+        from fittrack.gui.startup_probe import StartupProbe
+        probe = StartupProbe(window, app)
     window.show()
     
     # Execute application
-    sys.exit(app.exec_())
\ No newline at end of file
+    status = app.exec_()
+    if "--debug-refresh" in sys.argv:
+        print("refreshes:", window.refresh.summary(), file=sys.stderr)
+    sys.exit(status)
\ No newline at end of file
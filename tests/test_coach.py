@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("sklearn")
+
+from fittrack import coach
+from fittrack.repository import WorkoutRepository
+
+START = date(2026, 1, 1)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "fitness.db")
+    with WorkoutRepository(path) as repo:
+        for offset in range(80):
+            repo.add_workout((START + timedelta(days=offset)).isoformat(), 400 + offset, 5)
+    return path
+
+
+def test_train_only_with_enough_new_rows(db_path):
+    assert coach.train(db_path).trained
+    with WorkoutRepository(db_path) as repo:
+        repo.add_workout("2026-04-01", 500, 6)
+        assert coach.pending_rows(repo.conn, coach.load_model(db_path)) == 1
+    result = coach.train(db_path)
+    assert not result.trained and result.new_rows == 1
+
+
+def test_deletes_mean_a_fresh_fit(db_path):
+    coach.train(db_path)
+    model = coach.load_model(db_path)
+    with WorkoutRepository(db_path) as repo:
+        # As many workouts deleted as added: the count doesn't change
+        for workout_id in range(1, 6):
+            repo.delete_workout(workout_id)
+        for offset in range(5):
+            repo.add_workout(f"2026-05-0{offset + 1}", 700, 9)
+        assert coach.pending_rows(repo.conn, model) == 80
+
+    result = coach.train(db_path)
+    assert result.trained and result.new_rows == result.rows == 79
+
+
+def test_recommend_from_cached_model(db_path):
+    coach.train(db_path)
+    with WorkoutRepository(db_path) as repo:
+        rec = coach.recommend(repo.conn, coach.load_model(db_path), today="2026-03-22")
+    assert rec.day == "2026-03-22"
+    assert rec.distance >= 0 and rec.calories >= 0
+    assert rec.calories <= rec.predicted_calories
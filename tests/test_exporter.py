@@ -0,0 +1,76 @@
+import csv
+import datetime
+import sqlite3
+
+import pytest
+
+from fittrack.exporter import COLUMN_NAMES, export_file
+from fittrack.migrations import LATEST_VERSION, schema_version
+
+ROWS = [
+    ("2026-01-01", 300.0, 5.0, 140, "easy run"),
+    ("2026-01-03", 450.0, 8.5, 152, "tempo"),
+    ("2026-01-04", 200.0, 3.0, None, ""),
+]
+
+
+# A database as old builds left it: the bare fitness table, user_version 0
+@pytest.fixture
+def old_db(tmp_path):
+    path = str(tmp_path / "fitness.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE fitness (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT, calories REAL, distance REAL, heart_rate INTEGER,
+            body_temp REAL, age INTEGER, weight REAL, height REAL, bmi REAL,
+            description TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO fitness(date, calories, distance, heart_rate, description) "
+        "VALUES (?, ?, ?, ?, ?)", ROWS)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_csv_export_from_unmigrated_database(old_db, tmp_path):
+    out = str(tmp_path / "out.csv")
+    result = export_file(old_db, out)
+    assert result.rows == len(ROWS)
+
+    with open(out, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == COLUMN_NAMES
+    assert [r["date"] for r in rows] == [r[0] for r in ROWS]
+    assert [float(r["calories"]) for r in rows] == [r[1] for r in ROWS]
+
+    with sqlite3.connect(old_db) as conn:
+        assert schema_version(conn) == LATEST_VERSION
+
+
+@pytest.mark.parametrize("ext", [".parquet", ".arrow"])
+def test_arrow_export_from_unmigrated_database(old_db, tmp_path, ext):
+    pa = pytest.importorskip("pyarrow")
+    out = str(tmp_path / ("out" + ext))
+    result = export_file(old_db, out, batch_size=2)
+    assert result.rows == len(ROWS)
+
+    if ext == ".parquet":
+        import pyarrow.parquet as pq
+        table = pq.read_table(out)
+    else:
+        with pa.OSFile(out, "rb") as source:
+            table = pa.ipc.open_file(source).read_all()
+    assert table.column_names == COLUMN_NAMES
+    assert table.column("date").to_pylist() == [
+        datetime.date.fromisoformat(r[0]) for r in ROWS]
+    assert table.column("heart_rate").to_pylist() == [r[3] for r in ROWS]
+
+
+def test_time_range_limits_rows(old_db, tmp_path):
+    out = str(tmp_path / "out.csv")
+    assert export_file(old_db, out, time_range="Last 7 Days").rows == 0
+    with pytest.raises(ValueError):
+        export_file(old_db, out, time_range="Last Century")
@@ -0,0 +1,99 @@
+import os
+import random
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+
+from fittrack.gui.database import close_thread_database, thread_database
+from fittrack.gui.history_model import WorkoutTableModel
+from fittrack.repository import WorkoutRepository
+
+# Few distinct dates, so most rows tie on the date and are ordered by id
+DATES = [None, "2026-01-01", "2026-01-02", "2026-01-03"]
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def db(app, tmp_path):
+    path = str(tmp_path / "fitness.db")
+    with WorkoutRepository(path) as repo:
+        yield repo.conn, thread_database(path)
+    close_thread_database(path)
+
+
+def _add(conn, rnd):
+    return conn.execute(
+        "INSERT INTO fitness(date, calories, distance) VALUES (?, 100, 1)",
+        (rnd.choice(DATES),)).lastrowid
+
+
+def _ids(model):
+    return [model.row_id(row) for row in range(model.rowCount())]
+
+
+def _reloaded(database):
+    model = WorkoutTableModel(database, chunk_size=7)
+    model.refresh()
+    while model.canFetchMore():
+        model.fetchMore()
+    return _ids(model)
+
+
+# The loaded rows are a prefix of a full reload and the total matches it
+def _check(model, database):
+    expected = _reloaded(database)
+    assert model.total_rows() == len(expected)
+    assert _ids(model) == expected[:model.rowCount()]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_insert_and_remove_match_full_reload(db, seed):
+    conn, database = db
+    rnd = random.Random(seed)
+    ids = [_add(conn, rnd) for _ in range(40)]
+
+    # Small chunks, few of them cached: evicted chunks are counted in SQL
+    model = WorkoutTableModel(database, chunk_size=5, max_chunks=2)
+    model.refresh()
+    model.fetchMore()
+
+    for _ in range(150):
+        action = rnd.random()
+        if action < 0.5 or not ids:
+            row_id = _add(conn, rnd)
+            ids.append(row_id)
+            assert model.insert_row(row_id)
+        elif action < 0.85:
+            row_id = ids.pop(rnd.randrange(len(ids)))
+            conn.execute("DELETE FROM fitness WHERE id = ?", (row_id,))
+            assert model.remove_row(row_id)
+        elif model.canFetchMore():
+            model.fetchMore()
+        else:
+            # Read rows back, reloading evicted chunks
+            for row in rnd.sample(range(model.rowCount()), min(5, model.rowCount())):
+                model.row_id(row)
+        _check(model, database)
+
+    while model.canFetchMore():
+        model.fetchMore()
+    assert _ids(model) == _reloaded(database)
+
+
+def test_null_dates_sort_after_dated_rows(db):
+    conn, database = db
+    for day in (None, "2026-01-02", None, "2026-01-01", "2026-01-02"):
+        conn.execute("INSERT INTO fitness(date, calories, distance) VALUES (?, 100, 1)", (day,))
+
+    model = WorkoutTableModel(database, chunk_size=2)
+    model.refresh()
+    while model.canFetchMore():
+        model.fetchMore()
+    assert _ids(model) == [5, 2, 4, 3, 1]
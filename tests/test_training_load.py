@@ -0,0 +1,101 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from fittrack import training_load
+from fittrack.repository import WorkoutRepository
+
+COLUMNS = "day, calories, acute_calories, chronic_calories, distance, acute_distance, chronic_distance"
+
+START = date(2026, 1, 1)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    with WorkoutRepository(str(tmp_path / "fitness.db")) as repo:
+        yield repo
+
+
+def _day(offset):
+    return (START + timedelta(days=offset)).isoformat()
+
+
+def _stored(conn):
+    return np.array(conn.execute(
+        f"SELECT {COLUMNS} FROM {training_load.TRAINING_LOAD_TABLE} ORDER BY day").fetchall())
+
+
+# The table after a full recompute, leaving the incremental one untouched
+def _full(conn):
+    conn.execute(f"UPDATE {training_load.STATE_TABLE} SET dirty_from = -1000000")
+    training_load.refresh(conn)
+    return _stored(conn)
+
+
+def _check(conn):
+    incremental = _stored(conn)
+    full = _full(conn)
+    assert incremental.shape == full.shape
+    np.testing.assert_allclose(incremental, full)
+
+
+def _history(repo, days=60):
+    for offset in range(0, days, 2):
+        repo.add_workout(_day(offset), 400 + offset, 5 + offset / 10)
+    training_load.refresh(repo.conn)
+
+
+def test_ewma_matches_recurrence():
+    values = np.random.default_rng(1).random(1000) * 500
+    alpha = 2 / 29
+    expected = []
+    state = 3.0
+    for value in values:
+        state = alpha * value + (1 - alpha) * state
+        expected.append(state)
+    np.testing.assert_allclose(training_load.ewma(values, alpha, 3.0), expected)
+
+
+def test_insert_next_day_recomputes_one_day(repo):
+    _history(repo)
+    repo.add_workout(_day(59), 500, 6)
+    assert training_load.refresh(repo.conn) == 1
+    _check(repo.conn)
+
+
+def test_insert_after_gap_recomputes_only_the_gap(repo):
+    _history(repo)
+    repo.add_workout(_day(62), 500, 6)
+    # The rest days since the last workout and the new day, not the history
+    assert training_load.refresh(repo.conn) == 4
+    _check(repo.conn)
+
+
+def test_backdated_insert_and_delete_recompute_suffix(repo):
+    _history(repo)
+    workout_id = repo.add_workout(_day(31), 900, 12)
+    assert training_load.refresh(repo.conn) == 28
+    _check(repo.conn)
+
+    repo.delete_workout(workout_id)
+    assert training_load.refresh(repo.conn) == 28
+    _check(repo.conn)
+
+
+def test_delete_last_workout_drops_trailing_days(repo):
+    _history(repo)
+    last = repo.add_workout(_day(70), 500, 6)
+    training_load.refresh(repo.conn)
+    repo.delete_workout(last)
+    training_load.refresh(repo.conn)
+    assert _stored(repo.conn)[-1, 0] == _stored(repo.conn)[0, 0] + 58
+    _check(repo.conn)
+
+
+def test_acwr_zone():
+    assert training_load.acwr_zone(None) == "Not enough data"
+    assert training_load.acwr_zone(0.5) == "Undertraining"
+    assert training_load.acwr_zone(1.0) == "Optimal"
+    assert training_load.acwr_zone(1.4) == "Caution"
+    assert training_load.acwr_zone(2.0) == "High risk"